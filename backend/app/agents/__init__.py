@@ -3,10 +3,27 @@ from app.agents.prediction_agent import PredictionAgent
 from app.agents.verification_agent import VerificationAgent
 from app.agents.coordination_agent import CoordinationAgent
 from app.agents.zynd_agent_wrapper import ZyndAgentWrapper
+from app.agents.tiering import TieringPolicy, tiering_policy, TIER_RULES, TIER_LLM
+from app.agents.registry import (
+    AgentRegistry,
+    registry,
+    get_prediction_agent,
+    get_verification_agent,
+    get_coordination_agent
+)
 
 __all__ = [
     "PredictionAgent",
     "VerificationAgent",
     "CoordinationAgent",
     "ZyndAgentWrapper",
+    "TieringPolicy",
+    "tiering_policy",
+    "TIER_RULES",
+    "TIER_LLM",
+    "AgentRegistry",
+    "registry",
+    "get_prediction_agent",
+    "get_verification_agent",
+    "get_coordination_agent",
 ]
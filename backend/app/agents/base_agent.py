@@ -1,8 +1,25 @@
 """Base agent class for all AI agents using Google Gemini."""
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
+import asyncio
 import google.generativeai as genai
 from app.config import settings
+from app.agents.prompt_builder import PromptBuilder
+from app.agents.model_backend import build_model_client
+from app.core.cache import LLMCache, llm_cache
+from app.core.scheduler import (
+    LLMScheduler,
+    llm_scheduler,
+    estimate_tokens,
+    PRIORITY_NORMAL
+)
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    gemini_breaker,
+    call_timeout,
+    within_budget,
+    UPSTREAM_UNAVAILABLE_ERRORS
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,12 +28,36 @@ logger = logging.getLogger(__name__)
 class BaseAgent(ABC):
     """Base class for all AI agents using Gemini."""
     
-    def __init__(self, name: str, model: str = "gemini-pro"):
+    # Default scheduling priority for this agent's LLM calls
+    priority: int = PRIORITY_NORMAL
+    max_output_tokens: int = 2000
+    
+    # Compacts contexts for prompts; None renders every field as-is
+    prompt_builder: Optional[PromptBuilder] = None
+    
+    def __init__(
+        self,
+        name: str,
+        model: str = "gemini-pro",
+        client: Optional[Any] = None
+    ):
         self.name = name
         self.model = model
-        # Configure Gemini
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.client = genai.GenerativeModel(model)
+        
+        if client is None:
+            # Standalone agent - configure its own Gemini client (or the
+            # MODEL_BACKEND stand-in). Agents built by the AgentRegistry
+            # share a single client instead.
+            def live_client() -> Any:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                return genai.GenerativeModel(model)
+            
+            client = build_model_client(live_client)
+        
+        self.client = client
+        self.cache: Optional[LLMCache] = llm_cache
+        self.scheduler: LLMScheduler = llm_scheduler
+        self.breaker: CircuitBreaker = gemini_breaker
         logger.info(f"Initialized agent: {name} with Gemini {model}")
     
     @abstractmethod
@@ -36,7 +77,9 @@ class BaseAgent(ABC):
         self, 
         system_prompt: str, 
         user_message: str,
-        temperature: float = 0.2
+        temperature: float = 0.2,
+        priority: Optional[int] = None,
+        max_output_tokens: Optional[int] = None
     ) -> str:
         """
         Call Gemini LLM with a system prompt and user message.
@@ -45,6 +88,8 @@ class BaseAgent(ABC):
             system_prompt: System instructions
             user_message: User message/context
             temperature: Sampling temperature (0.0 - 1.0)
+            priority: Scheduler priority (defaults to the agent's priority)
+            max_output_tokens: Response length limit (defaults to the agent's limit)
             
         Returns:
             LLM response text
@@ -53,21 +98,163 @@ class BaseAgent(ABC):
             # Combine system prompt and user message for Gemini
             full_prompt = f"{system_prompt}\n\n{user_message}"
             
-            # Generate content with Gemini
-            response = await self.client.generate_content_async(
-                full_prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=temperature,
-                    max_output_tokens=2000,
-                )
-            )
+            if max_output_tokens is None:
+                max_output_tokens = self.max_output_tokens
+            
+            # Serve repeated prompts from the response cache
+            cache_key = None
+            if self.cache is not None:
+                cache_key = LLMCache.make_key(self.model, temperature, full_prompt, max_output_tokens)
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    logger.debug(f"LLM cache hit for {self.name}")
+                    return cached
+            
+            # Skip the queue entirely while Gemini is known to be down
+            self.breaker.reject_if_open()
+            
+            # Generate content with Gemini once the scheduler admits the call,
+            # through the Gemini circuit breaker and within the latency budget
+            response = await within_budget(self.scheduler.run(
+                lambda: self.breaker.call(
+                    lambda: self.client.generate_content_async(
+                        full_prompt,
+                        generation_config=genai.types.GenerationConfig(
+                            temperature=temperature,
+                            max_output_tokens=max_output_tokens,
+                        )
+                    ),
+                    timeout=call_timeout(settings.LLM_CALL_TIMEOUT_SECONDS)
+                ),
+                priority=self.priority if priority is None else priority,
+                estimated_tokens=estimate_tokens(full_prompt) + max_output_tokens
+            ))
+            
+            if cache_key is not None:
+                await self.cache.aset(cache_key, response.text)
             return response.text
         except Exception as e:
-            logger.error(f"Gemini LLM call failed for {self.name}: {str(e)}")
+            logger.error(f"Gemini LLM call failed for {self.name}: {str(e) or type(e).__name__}")
             raise
     
+    async def _call_llm_or_fallback(
+        self,
+        system_prompt: str,
+        user_message: str,
+        fallback: str,
+        **kwargs: Any
+    ) -> str:
+        """
+        Call the LLM, returning `fallback` if Gemini is unavailable.
+        
+        Used where a deterministic explanation is an acceptable answer: the
+        breaker being open or the latency budget running out returns the
+        fallback immediately instead of failing the request.
+        """
+        try:
+            return await self._call_llm(system_prompt, user_message, **kwargs)
+        except UPSTREAM_UNAVAILABLE_ERRORS as e:
+            logger.warning(f"{self.name} using deterministic fallback: {str(e) or type(e).__name__}")
+            return fallback
+    
+    async def _stream_llm(
+        self,
+        system_prompt: str,
+        user_message: str,
+        temperature: float = 0.2,
+        priority: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a Gemini response chunk by chunk.
+        
+        Uses the same cache, scheduler, circuit breaker and latency budget as
+        _call_llm; the scheduler slot is held until the stream completes and
+        each chunk must arrive within the per-call timeout.
+        
+        Yields:
+            Response text chunks (a single chunk on a cache hit)
+        """
+        try:
+            full_prompt = f"{system_prompt}\n\n{user_message}"
+            
+            cache_key = None
+            if self.cache is not None:
+                cache_key = LLMCache.make_key(self.model, temperature, full_prompt, self.max_output_tokens)
+                cached = await self.cache.aget(cache_key)
+                if cached is not None:
+                    logger.debug(f"LLM cache hit for {self.name}")
+                    yield cached
+                    return
+            
+            self.breaker.reject_if_open()
+            
+            chunks: List[str] = []
+            async with self.scheduler.slot(
+                self.priority if priority is None else priority,
+                estimate_tokens(full_prompt) + self.max_output_tokens,
+                timeout=call_timeout()
+            ):
+                async with self.breaker.guard():
+                    response = await asyncio.wait_for(
+                        self.client.generate_content_async(
+                            full_prompt,
+                            generation_config=genai.types.GenerationConfig(
+                                temperature=temperature,
+                                max_output_tokens=self.max_output_tokens,
+                            ),
+                            stream=True
+                        ),
+                        call_timeout(settings.LLM_CALL_TIMEOUT_SECONDS)
+                    )
+                    
+                    stream = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(
+                                stream.__anext__(),
+                                call_timeout(settings.LLM_CALL_TIMEOUT_SECONDS)
+                            )
+                        except StopAsyncIteration:
+                            break
+                        
+                        if chunk.text:
+                            chunks.append(chunk.text)
+                            yield chunk.text
+            
+            if cache_key is not None:
+                await self.cache.aset(cache_key, "".join(chunks))
+        except Exception as e:
+            logger.error(f"Gemini LLM stream failed for {self.name}: {str(e) or type(e).__name__}")
+            raise
+    
+    async def _stream_llm_or_fallback(
+        self,
+        system_prompt: str,
+        user_message: str,
+        fallback: str,
+        **kwargs: Any
+    ) -> AsyncIterator[str]:
+        """
+        Stream the LLM response, yielding `fallback` if Gemini is unavailable.
+        
+        If the upstream fails part-way through, the chunks already sent stand
+        and the stream simply ends.
+        """
+        received = False
+        try:
+            async for chunk in self._stream_llm(system_prompt, user_message, **kwargs):
+                received = True
+                yield chunk
+        except UPSTREAM_UNAVAILABLE_ERRORS as e:
+            logger.warning(f"{self.name} using deterministic fallback: {str(e) or type(e).__name__}")
+            if not received:
+                yield fallback
+    
     def _format_context(self, context: Dict[str, Any]) -> str:
         """Format context dictionary into a readable string."""
+        if self.prompt_builder is not None:
+            return self.prompt_builder.build(context)
+        
         lines = []
         for key, value in context.items():
             lines.append(f"{key}: {value}")
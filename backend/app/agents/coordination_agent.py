@@ -1,7 +1,16 @@
 """Emergency coordination AI agent."""
 from app.agents.base_agent import BaseAgent
 from app.agents.zynd_agent_wrapper import ZyndAgentWrapper
-from typing import Dict, Any, List
+from app.agents.prompt_builder import (
+    PromptBuilder,
+    INCIDENT_FIELDS,
+    RESOURCE_FIELDS,
+    PREDICTION_SUMMARY_FIELDS,
+    proximity_to_incident
+)
+from app.config import settings
+from app.core.scheduler import severity_to_priority
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 
@@ -11,9 +20,28 @@ logger = logging.getLogger(__name__)
 class CoordinationAgent(BaseAgent):
     """AI Agent for coordinating emergency response operations."""
     
-    def __init__(self):
-        super().__init__(name="CoordinationAgent", model="gpt-4-turbo-preview")
-        self.zynd_agent = ZyndAgentWrapper(agent_type="coordination")
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        zynd_agent: Optional[ZyndAgentWrapper] = None
+    ):
+        super().__init__(name="CoordinationAgent", model=settings.GEMINI_MODEL, client=client)
+        self.zynd_agent = zynd_agent or ZyndAgentWrapper(llm=client)
+        
+        self.prompt_builder = PromptBuilder(self.name, fields={
+            'incident': INCIDENT_FIELDS,
+            'prediction': PREDICTION_SUMMARY_FIELDS,
+            'available_resources': RESOURCE_FIELDS,
+            'agencies': True,
+            'zynd_recommendations': {
+                'source': True,
+                'priority': True,
+                'recommendations': True,
+                'actions': True,
+                'resources_needed': True,
+                'estimated_responders': True
+            }
+        }, rank={'available_resources': proximity_to_incident})
         
         self.system_prompt = """You are an emergency coordination AI agent specialized in disaster response management.
 
@@ -75,8 +103,14 @@ Be decisive, clear, and actionable."""
             incident = context.get('incident', {})
             severity = incident.get('severity', 'medium')
             
+            # Critical incidents jump ahead of routine prediction sweeps
+            priority = severity_to_priority(severity)
+            
             # Get ZYND AI recommendations
-            zynd_recommendations = await self.zynd_agent.recommend_actions(context)
+            zynd_recommendations = await self.zynd_agent.recommend_actions(
+                context,
+                priority=priority
+            )
             
             # Create comprehensive action plan using LLM
             llm_context = self._format_context({
@@ -84,9 +118,11 @@ Be decisive, clear, and actionable."""
                 'zynd_recommendations': zynd_recommendations
             })
             
-            action_plan = await self._call_llm(
+            action_plan = await self._call_llm_or_fallback(
                 self.system_prompt,
-                f"Create emergency response plan for:\n\n{llm_context}"
+                f"Create emergency response plan for:\n\n{llm_context}",
+                fallback=self._fallback_action_plan(severity),
+                priority=priority
             )
             
             # Generate structured tasks
@@ -120,6 +156,13 @@ Be decisive, clear, and actionable."""
             logger.error(f"Coordination failed: {str(e)}")
             raise
     
+    def _fallback_action_plan(self, severity: str) -> str:
+        """Deterministic plan summary used when the LLM is unavailable."""
+        return (
+            f"Standard {severity}-severity flood response plan (LLM unavailable). "
+            f"Follow the priority tasks, resource allocation and response timeline below."
+        )
+    
     def _create_priority_tasks(
         self, 
         context: Dict[str, Any],
@@ -0,0 +1,439 @@
+"""Pluggable model backends: live, record, replay and synthetic stand-ins."""
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from app.config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# MODEL_BACKEND modes
+MODE_LIVE = "live"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_SYNTHETIC = "synthetic"
+
+# Recording channels
+CHANNEL_GEMINI = "gemini"
+CHANNEL_P3AI = "p3ai"
+
+
+def prompt_key(prompt: str) -> str:
+    """Stable key for a prompt in the recording file."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """
+    Sample simulated upstream latency (seconds) from a spec string.
+    
+    Specs:
+        "recorded"                 - the latency captured with the response
+        "none"                     - no delay
+        "fixed:0.8"                - constant
+        "uniform:0.2,1.5"          - uniform between bounds
+        "normal:0.9,0.3"           - normal (mean, std), clipped at 0
+        "lognormal:0.9,0.5"        - log-normal (median, sigma) - long tail
+    """
+    
+    def __init__(self, spec: str = "recorded", seed: Optional[int] = None):
+        self.spec = spec.strip().lower() or "none"
+        self._random = random.Random(seed)
+        
+        kind, _, args = self.spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a.strip()]
+        expected = {'recorded': 0, 'none': 0, 'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if kind not in expected or len(self.args) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+    
+    def sample(self, recorded: Optional[float] = None) -> float:
+        """Draw one latency, given the recorded latency if any."""
+        if self.kind == "recorded":
+            return max(0.0, recorded or 0.0)
+        if self.kind == "none":
+            return 0.0
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return self._random.uniform(*self.args)
+        if self.kind == "normal":
+            return max(0.0, self._random.gauss(*self.args))
+        median, sigma = self.args
+        return self._random.lognormvariate(math.log(median), sigma)
+
+
+class RecordingStore:
+    """Append-only JSONL file of captured upstream exchanges."""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, List[Dict[str, Any]]]]] = None
+        self._cursor: Dict[str, int] = {}
+    
+    def append(self, channel: str, prompt: str, response: str, latency: float) -> None:
+        """Capture one exchange."""
+        entry = {
+            'channel': channel,
+            'key': prompt_key(prompt),
+            'prompt': prompt,
+            'response': response,
+            'latency': round(latency, 4),
+            'recorded_at': datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+    
+    def lookup(self, channel: str, prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a captured response for `prompt`.
+        
+        Repeated prompts cycle through their recordings in capture order.
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            
+            matches = self._entries.get(channel, {}).get(prompt_key(prompt))
+            if not matches:
+                return None
+            
+            cursor_key = f"{channel}:{prompt_key(prompt)}"
+            index = self._cursor.get(cursor_key, 0)
+            self._cursor[cursor_key] = index + 1
+            return matches[index % len(matches)]
+    
+    def _load(self) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        entries: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        if not os.path.exists(self.path):
+            logger.warning(f"Model recording file not found: {self.path}")
+            return entries
+        
+        count = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entries.setdefault(entry['channel'], {}).setdefault(entry['key'], []).append(entry)
+                count += 1
+        
+        logger.info(f"Loaded {count} model recordings from {self.path}")
+        return entries
+
+
+class ModelResponse:
+    """Minimal stand-in for a Gemini response or stream chunk."""
+    
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ModelStream:
+    """Async-iterable stand-in for a streamed Gemini response."""
+    
+    def __init__(self, text: str, latency: float, chunks: int = 4):
+        size = max(1, math.ceil(len(text) / chunks))
+        self.parts = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        self.delay = latency / len(self.parts)
+    
+    async def __aiter__(self) -> AsyncIterator[ModelResponse]:
+        for part in self.parts:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield ModelResponse(part)
+
+
+class StandInModel(ABC):
+    """Base for offline model clients with the Gemini generate_content_async API."""
+    
+    mode = MODE_SYNTHETIC
+    
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        
+        # Metrics
+        self.calls = 0
+    
+    async def generate_content_async(
+        self,
+        prompt: str,
+        generation_config: Any = None,
+        stream: bool = False
+    ) -> Any:
+        self.calls += 1
+        text, recorded = self._respond(prompt)
+        delay = self.latency.sample(recorded)
+        
+        if stream:
+            return ModelStream(text, delay)
+        if delay:
+            await asyncio.sleep(delay)
+        return ModelResponse(text)
+    
+    @abstractmethod
+    def _respond(self, prompt: str) -> Tuple[str, Optional[float]]:
+        """Response text and its recorded latency (None if not recorded)."""
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'calls': self.calls, 'latency': self.latency.spec}
+
+
+class SyntheticModel(StandInModel):
+    """Fast canned JSON answers shaped like each agent's output format."""
+    
+    mode = MODE_SYNTHETIC
+    
+    def _respond(self, prompt: str) -> Tuple[str, Optional[float]]:
+        return synthetic_response(prompt), None
+
+
+class ReplayModel(StandInModel):
+    """Serve recorded responses; unknown prompts get synthetic answers."""
+    
+    mode = MODE_REPLAY
+    
+    def __init__(self, store: RecordingStore, latency: LatencyModel):
+        super().__init__(latency)
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+    
+    def _respond(self, prompt: str) -> Tuple[str, Optional[float]]:
+        entry = self.store.lookup(CHANNEL_GEMINI, prompt)
+        if entry is None:
+            self.misses += 1
+            logger.debug("Replay miss, answering with synthetic response")
+            return synthetic_response(prompt), None
+        
+        self.hits += 1
+        return entry['response'], entry.get('latency')
+    
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), 'hits': self.hits, 'misses': self.misses}
+
+
+class RecordingModel:
+    """Pass calls through to a live client and capture prompts and responses."""
+    
+    mode = MODE_RECORD
+    
+    def __init__(self, client: Any, store: RecordingStore):
+        self.client = client
+        self.store = store
+        self.calls = 0
+    
+    async def generate_content_async(
+        self,
+        prompt: str,
+        generation_config: Any = None,
+        stream: bool = False
+    ) -> Any:
+        self.calls += 1
+        started = time.monotonic()
+        response = await self.client.generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            stream=stream
+        )
+        if stream:
+            return self._record_stream(prompt, response, started)
+        
+        self.store.append(CHANNEL_GEMINI, prompt, response.text, time.monotonic() - started)
+        return response
+    
+    async def _record_stream(self, prompt: str, response: Any, started: float) -> AsyncIterator[Any]:
+        parts = []
+        async for chunk in response:
+            parts.append(chunk.text)
+            yield chunk
+        self.store.append(CHANNEL_GEMINI, prompt, "".join(parts), time.monotonic() - started)
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {'mode': self.mode, 'calls': self.calls, 'path': self.store.path}
+
+
+class StandInP3AIAgent:
+    """
+    Offline P3AI agent exposing the SDK calls ZyndAgentWrapper uses.
+    
+    Replies come from the recording file when available, otherwise a
+    synthetic analysis (or "No new messages" when `synthetic` is False).
+    Delays block, like the real SDK, and so run on the wrapper's executor.
+    """
+    
+    def __init__(
+        self,
+        latency: LatencyModel,
+        store: Optional[RecordingStore] = None,
+        synthetic: bool = True
+    ):
+        self.latency = latency
+        self.store = store
+        self.synthetic = synthetic
+        self._last_query: Optional[str] = None
+    
+    def search_agents_by_capabilities(self, capabilities: List[str], **kwargs: Any) -> List[Dict[str, Any]]:
+        time.sleep(self.latency.sample())
+        return [{'didIdentifier': 'did:p3ai:stand-in', 'name': 'StandInFloodAgent', 'capabilities': capabilities}]
+    
+    def connect_agent(self, agent: Any) -> None:
+        time.sleep(self.latency.sample())
+    
+    def send_message(self, message: str, message_type: str = "query") -> None:
+        self._last_query = message
+    
+    def read_messages(self) -> str:
+        query, self._last_query = self._last_query, None
+        if query is None:
+            return "No new messages"
+        
+        entry = self.store.lookup(CHANNEL_P3AI, query) if self.store else None
+        time.sleep(self.latency.sample(entry.get('latency') if entry else None))
+        if entry is not None:
+            return entry['response']
+        return synthetic_response(query) if self.synthetic else "No new messages"
+
+
+class RecordingP3AIAgent:
+    """Wrap a live P3AI agent and capture each query and its reply."""
+    
+    def __init__(self, agent: Any, store: RecordingStore):
+        self.agent = agent
+        self.store = store
+        self._last_query: Optional[str] = None
+        self._sent_at = 0.0
+    
+    def send_message(self, message: str, message_type: str = "query") -> Any:
+        self._last_query = message
+        self._sent_at = time.monotonic()
+        return self.agent.send_message(message, message_type=message_type)
+    
+    def read_messages(self) -> str:
+        response = self.agent.read_messages()
+        if self._last_query is not None and "No new messages" not in response:
+            self.store.append(CHANNEL_P3AI, self._last_query, response, time.monotonic() - self._sent_at)
+        self._last_query = None
+        return response
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.agent, name)
+
+
+def synthetic_response(prompt: str) -> str:
+    """Canned JSON in the output format the prompt asks for."""
+    match = re.search(r"calculated_risk_score: ([0-9.]+)", prompt)
+    score = float(match.group(1)) if match else 0.5
+    risk_level = (
+        'critical' if score >= 0.85 else
+        'high' if score >= 0.65 else
+        'medium' if score >= 0.35 else
+        'low'
+    )
+    
+    if "Verify this flood prediction" in prompt:
+        return json.dumps({
+            'is_verified': True,
+            'confidence': 0.8,
+            'validation_checks': {
+                'sensor_consistency': 'pass',
+                'historical_correlation': 'pass',
+                'physical_plausibility': 'pass',
+                'anomaly_check': 'pass'
+            },
+            'concerns': [],
+            'recommendation': 'PROCEED',
+            'reasoning': 'Synthetic verification response.'
+        })
+    
+    if "emergency response plan" in prompt:
+        return json.dumps({
+            'action_plan': {
+                'immediate': ['Dispatch nearest rescue units'],
+                'short_term': ['Open shelters near the incident'],
+                'ongoing': ['Monitor water levels']
+            },
+            'resource_allocation': [],
+            'communication_protocol': {'channels': ['SMS', 'radio']},
+            'timeline': {'0-2h': 'Deploy responders'}
+        })
+    
+    prediction = {
+        'risk_assessment': f'Synthetic assessment: {risk_level} risk.',
+        'primary_factors': ['rainfall', 'soil_saturation'],
+        'risk_level': risk_level,
+        'confidence': 0.8,
+        'recommended_actions': ['Monitor conditions'],
+        'time_sensitivity': 'hours'
+    }
+    
+    batch = re.search(r"JSON array of (\d+) objects", prompt)
+    if batch:
+        return json.dumps([{**prediction, 'index': i} for i in range(int(batch.group(1)))])
+    return json.dumps(prediction)
+
+
+_store: Optional[RecordingStore] = None
+
+
+def recording_store() -> RecordingStore:
+    """Shared recording file for record and replay modes."""
+    global _store
+    if _store is None:
+        _store = RecordingStore(settings.MODEL_RECORDING_PATH)
+    return _store
+
+
+def build_model_client(live_factory: Callable[[], Any]) -> Any:
+    """
+    Create the model client for the configured MODEL_BACKEND.
+    
+    Args:
+        live_factory: Builds the real Gemini client (not called offline)
+    """
+    mode = settings.MODEL_BACKEND
+    latency = LatencyModel(settings.MODEL_LATENCY, seed=settings.MODEL_BACKEND_SEED)
+    
+    if mode == MODE_SYNTHETIC:
+        return SyntheticModel(latency)
+    if mode == MODE_REPLAY:
+        return ReplayModel(recording_store(), latency)
+    
+    client = live_factory()
+    if mode == MODE_RECORD:
+        return RecordingModel(client, recording_store())
+    return client
+
+
+def build_p3ai_stand_in() -> Optional[StandInP3AIAgent]:
+    """Offline P3AI agent for replay/synthetic modes (None when live or recording)."""
+    mode = settings.MODEL_BACKEND
+    if mode not in (MODE_REPLAY, MODE_SYNTHETIC):
+        return None
+    
+    latency = LatencyModel(settings.MODEL_LATENCY, seed=settings.MODEL_BACKEND_SEED)
+    store = recording_store() if mode == MODE_REPLAY else None
+    # Synthetic mode answers every network query; replay only what was captured
+    return StandInP3AIAgent(latency, store=store, synthetic=mode == MODE_SYNTHETIC)
+
+
+def wrap_p3ai_agent(agent: Any) -> Any:
+    """Capture a live P3AI agent's exchanges when recording."""
+    if settings.MODEL_BACKEND == MODE_RECORD:
+        return RecordingP3AIAgent(agent, recording_store())
+    return agent
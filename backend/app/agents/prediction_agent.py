@@ -1,20 +1,94 @@
 """Flood prediction AI agent."""
 from app.agents.base_agent import BaseAgent
 from app.agents.zynd_agent_wrapper import ZyndAgentWrapper
-from typing import Dict, Any, List
+from app.agents.prompt_builder import PromptBuilder, FLOOD_INPUT_FIELDS, by_severity
+from app.agents.tiering import TieringPolicy, tiering_policy, TIER_RULES, TIER_LLM
+from app.config import settings
+from app.core.cache import LLMCache, MemoryCache
+from app.core.scheduler import PRIORITY_LOW
+from app.core.circuit_breaker import UPSTREAM_UNAVAILABLE_ERRORS
+from app.ml.ensemble import UncertaintyEnsemble, uncertainty_ensemble
+from app.ml.forecasting import WaterLevelForecaster, water_level_forecaster
+from app.ml.history import HistoricalIndex, historical_index
+from app.ml.kalman import GaugeRegistry, gauge_registry
+from app.ml.population import PopulationModel, population_model
+from app.ml.risk_engine import (
+    RISK_LEVELS,
+    RISK_LEVEL_THRESHOLDS,
+    BASIC_WEIGHTS,
+    NEUTRAL_HISTORICAL_SCORE
+)
+from app.ml.risk_model import RiskModelServer, risk_model_server
+from app.services.sensors import SensorStore, sensor_store
+from typing import Dict, Any, AsyncIterator, List, Optional
 from datetime import datetime, timedelta
 import numpy as np
+import asyncio
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# People per km² by area type, for locations without raster coverage
+AREA_DENSITY_PER_KM2 = {
+    'urban': 10000,
+    'suburban': 5000,
+    'rural': 1000
+}
+
 
 class PredictionAgent(BaseAgent):
     """AI Agent for flood prediction and risk assessment."""
     
-    def __init__(self):
-        super().__init__(name="FloodPredictionAgent", model="gpt-4-turbo-preview")
-        self.zynd_agent = ZyndAgentWrapper(agent_type="flood_analysis")
+    # Routine sweeps yield to incident coordination
+    priority = PRIORITY_LOW
+    
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        zynd_agent: Optional[ZyndAgentWrapper] = None
+    ):
+        super().__init__(name="FloodPredictionAgent", model=settings.GEMINI_MODEL, client=client)
+        self.zynd_agent = zynd_agent or ZyndAgentWrapper(llm=client)
+        self.tiering: TieringPolicy = tiering_policy
+        self.forecaster: WaterLevelForecaster = water_level_forecaster
+        self.ensemble: Optional[UncertaintyEnsemble] = (
+            uncertainty_ensemble if settings.ENSEMBLE_ENABLED else None
+        )
+        self.gauges: GaugeRegistry = gauge_registry
+        self.history: HistoricalIndex = historical_index
+        self.population: PopulationModel = population_model
+        self.risk_model: RiskModelServer = risk_model_server
+        self.sensors: SensorStore = sensor_store
+        
+        self.prompt_builder = PromptBuilder(self.name, fields={
+            **FLOOD_INPUT_FIELDS,
+            'calculated_risk_score': True,
+            'river_state': {
+                'level': True,
+                'rate_per_hour': True,
+                'level_std': True,
+                'forecast': True
+            },
+            'zynd_analysis': {
+                'source': True,
+                'risk_level': True,
+                'risk_score': True,
+                'confidence': True,
+                'factors': True,
+                'analysis': True
+            },
+            'sensor_history': True,
+            'historical_data': True
+        }, rank={'historical_data': by_severity})
+        
+        # Opt-in reuse of LLM reasoning for inputs that fall in the same bucket
+        self.reasoning_cache: Optional[LLMCache] = None
+        if settings.PREDICTION_REUSE_ENABLED:
+            self.reasoning_cache = LLMCache([MemoryCache(
+                max_entries=settings.PREDICTION_REUSE_MAX_ENTRIES,
+                ttl_seconds=settings.PREDICTION_REUSE_TTL_SECONDS
+            )])
         
         self.system_prompt = """You are an advanced flood prediction AI agent with expertise in hydrology, meteorology, and disaster management.
 
@@ -61,63 +135,489 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         logger.info(f"Executing prediction for region: {context.get('region')}")
         
         try:
-            # Step 1: Use ZYND AI for initial analysis
-            zynd_analysis = await self.zynd_agent.analyze_flood_risk(context)
-            
-            # Step 2: Calculate risk score using multiple methods
-            risk_score = self._calculate_comprehensive_risk_score(context, zynd_analysis)
+            # Steps 1-2 and 4-6: ZYND analysis, risk score and deterministic models
+            result = await self.assess(context)
             
             # Step 3: Get LLM reasoning
-            llm_context = self._format_context({
-                **context,
-                'zynd_analysis': zynd_analysis,
-                'calculated_risk_score': risk_score
-            })
+            result['ai_reasoning']['llm_analysis'] = await self.reason(context, result)
             
-            llm_reasoning = await self._call_llm(
-                self.system_prompt,
-                f"Analyze this flood risk scenario:\n\n{llm_context}"
-            )
+            logger.info(f"Prediction completed: {result['risk_level']} risk")
+            return result
             
-            # Step 4: Generate water level forecast
-            water_level_forecast = self._forecast_water_levels(context, risk_score)
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            raise
+    
+    async def assess(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Produce the prediction without waiting for LLM reasoning.
+        
+        The deterministic fields (risk score, forecast, population, time to
+        impact) are final. ai_reasoning.llm_analysis is None unless the rule
+        tier answered or reasoning was reused from the same input bucket;
+        reason() fills it in.
+        
+        Args:
+            context: Same as execute()
             
-            # Step 5: Estimate impact
-            affected_population = self._estimate_affected_population(
-                context, 
-                risk_score
+        Returns:
+            Prediction result
+        """
+        context = self._with_history(await self._with_sensor_history(context))
+        
+        # Clearly low-risk inputs are explained by the rule tier, with no
+        # ZYND or Gemini calls
+        tier = self.tiering.prediction_tier(
+            self._basic_risk_score(context),
+            self._identify_risk_factors(context)
+        )
+        
+        # Reuse reasoning from a recent prediction in the same input bucket
+        reused = None
+        if tier == TIER_LLM and self.reasoning_cache is not None:
+            reused = self.reasoning_cache.get(self._reuse_bucket_key(context))
+        
+        # Step 1: Use ZYND AI for initial analysis
+        if tier == TIER_RULES:
+            zynd_analysis = self.zynd_agent.quick_analysis(context)
+        elif reused:
+            zynd_analysis = reused['zynd_analysis']
+        else:
+            zynd_analysis = await self.zynd_agent.analyze_flood_risk(
+                context,
+                priority=self.priority
             )
+        
+        # Step 2: Calculate risk score using multiple methods
+        risk_score = self._calculate_comprehensive_risk_score(context, zynd_analysis)
+        
+        result = self._build_result(context, zynd_analysis, risk_score)
+        result['ai_reasoning']['tier'] = tier
+        if tier == TIER_RULES:
+            result['ai_reasoning']['llm_analysis'] = self._templated_reasoning(context, risk_score)
+        elif reused:
+            result['ai_reasoning']['llm_analysis'] = reused['llm_reasoning']
+            result['ai_reasoning']['reasoning_reused'] = True
+        return result
+    
+    async def reason(self, context: Dict[str, Any], prediction: Dict[str, Any]) -> str:
+        """
+        Get the LLM narrative for a prediction produced by assess().
+        
+        Args:
+            context: Same as execute()
+            prediction: Result of assess()
+            
+        Returns:
+            LLM reasoning text (deterministic explanation if Gemini is unavailable)
+        """
+        if prediction['ai_reasoning'].get('llm_analysis') is not None:
+            return prediction['ai_reasoning']['llm_analysis']
+        
+        zynd_analysis = prediction['ai_reasoning']['zynd_analysis']
+        risk_score = prediction['probability']
+        
+        fallback_reasoning = self._fallback_reasoning(context, risk_score)
+        llm_reasoning = await self._call_llm_or_fallback(
+            self.system_prompt,
+            self._reasoning_prompt(
+                context, zynd_analysis, risk_score, prediction['ai_reasoning'].get('sensor_history')
+            ),
+            fallback=fallback_reasoning
+        )
+        
+        # Only genuine LLM answers are worth reusing
+        if llm_reasoning is not fallback_reasoning:
+            self._remember_reasoning(context, zynd_analysis, llm_reasoning)
+        return llm_reasoning
+    
+    async def stream(self, context: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute flood prediction analysis incrementally.
+        
+        Args:
+            context: Same as execute()
             
-            # Step 6: Calculate time to impact
-            predicted_time = self._calculate_time_to_impact(context, risk_score)
+        Yields:
+            {'event': 'assessment', 'data': result of assess()}
+            {'event': 'reasoning', 'data': {'text': chunk}} for each LLM chunk
+            {'event': 'prediction', 'data': complete result, as from execute()}
+        """
+        logger.info(f"Streaming prediction for region: {context.get('region')}")
+        
+        result = await self.assess(context)
+        yield {'event': 'assessment', 'data': result}
+        
+        llm_reasoning = result['ai_reasoning']['llm_analysis']
+        if llm_reasoning is not None:
+            yield {'event': 'reasoning', 'data': {'text': llm_reasoning}}
+        else:
+            zynd_analysis = result['ai_reasoning']['zynd_analysis']
+            risk_score = result['probability']
+            fallback_reasoning = self._fallback_reasoning(context, risk_score)
             
-            result = {
-                'region': context['region'],
-                'center_lat': context['latitude'],
-                'center_lon': context['longitude'],
-                'risk_level': self._score_to_risk_level(risk_score),
-                'probability': risk_score,
-                'confidence': zynd_analysis.get('confidence', 0.85),
-                'predicted_time': predicted_time,
-                'affected_population': affected_population,
-                'water_level_forecast': water_level_forecast,
-                'rainfall_intensity': context.get('rainfall', 0),
-                'soil_saturation': context.get('soil_saturation', 0),
-                'river_level': context.get('river_level', 0),
-                'ai_reasoning': {
-                    'llm_analysis': llm_reasoning,
-                    'zynd_analysis': zynd_analysis,
-                    'risk_factors': self._identify_risk_factors(context),
-                    'methodology': 'hybrid_ai_ml'
-                }
-            }
+            chunks: List[str] = []
+            async for chunk in self._stream_llm_or_fallback(
+                self.system_prompt,
+                self._reasoning_prompt(
+                    context, zynd_analysis, risk_score, result['ai_reasoning'].get('sensor_history')
+                ),
+                fallback=fallback_reasoning
+            ):
+                chunks.append(chunk)
+                yield {'event': 'reasoning', 'data': {'text': chunk}}
             
-            logger.info(f"Prediction completed: {result['risk_level']} risk")
-            return result
+            llm_reasoning = "".join(chunks)
+            if chunks != [fallback_reasoning]:
+                self._remember_reasoning(context, zynd_analysis, llm_reasoning)
+        
+        result = {**result, 'ai_reasoning': {**result['ai_reasoning'], 'llm_analysis': llm_reasoning}}
+        logger.info(f"Prediction completed: {result['risk_level']} risk")
+        yield {'event': 'prediction', 'data': result}
+    
+    async def execute_batch(self, contexts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Execute flood prediction analysis for many regions at once.
+        
+        The deterministic assessments run concurrently; LLM reasoning is
+        requested for up to PREDICTION_BATCH_MAX_REGIONS regions per prompt.
+        
+        Args:
+            contexts: List of contexts, each as for execute()
             
+        Returns:
+            Prediction results, in the same order as `contexts`
+        """
+        logger.info(f"Executing batch prediction for {len(contexts)} regions")
+        
+        results = list(await asyncio.gather(*(self.assess(context) for context in contexts)))
+        reasonings = await self.reason_batch(contexts, results)
+        for result, llm_reasoning in zip(results, reasonings):
+            result['ai_reasoning']['llm_analysis'] = llm_reasoning
+        
+        logger.info(f"Batch prediction completed for {len(results)} regions")
+        return results
+    
+    async def reason_batch(
+        self,
+        contexts: List[Dict[str, Any]],
+        predictions: List[Dict[str, Any]]
+    ) -> List[str]:
+        """
+        Get LLM narratives for many predictions produced by assess().
+        
+        Regions are packed into shared prompts that ask for a JSON array.
+        Regions whose entry is missing or malformed fall back to reason().
+        
+        Args:
+            contexts: Contexts, as for execute()
+            predictions: Matching results of assess()
+            
+        Returns:
+            LLM reasoning text per prediction, in order
+        """
+        reasonings: List[Optional[str]] = [
+            prediction['ai_reasoning'].get('llm_analysis') for prediction in predictions
+        ]
+        pending = [i for i, text in enumerate(reasonings) if text is None]
+        
+        size = max(1, settings.PREDICTION_BATCH_MAX_REGIONS)
+        batches = [pending[start:start + size] for start in range(0, len(pending), size)]
+        answers = await asyncio.gather(*(
+            self._reason_chunk([contexts[i] for i in batch], [predictions[i] for i in batch])
+            for batch in batches
+        ))
+        for batch, batch_answers in zip(batches, answers):
+            for i, text in zip(batch, batch_answers):
+                reasonings[i] = text
+        
+        # Only the regions the batch could not answer get individual calls
+        failed = [i for i, text in enumerate(reasonings) if text is None]
+        if failed:
+            logger.warning(f"Batch reasoning incomplete, retrying {len(failed)} regions individually")
+            retried = await asyncio.gather(*(
+                self.reason(contexts[i], predictions[i]) for i in failed
+            ))
+            for i, text in zip(failed, retried):
+                reasonings[i] = text
+        
+        return reasonings
+    
+    async def _reason_chunk(
+        self,
+        contexts: List[Dict[str, Any]],
+        predictions: List[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """Ask for one prompt's worth of regions; None marks regions to retry."""
+        if len(contexts) == 1:
+            return [await self.reason(contexts[0], predictions[0])]
+        
+        try:
+            response = await self._call_llm(
+                self.system_prompt,
+                self._batch_reasoning_prompt(contexts, predictions),
+                max_output_tokens=settings.PREDICTION_BATCH_TOKENS_PER_REGION * len(contexts)
+            )
+        except UPSTREAM_UNAVAILABLE_ERRORS as e:
+            # Individual calls would hit the same outage
+            logger.warning(f"{self.name} using deterministic fallback: {str(e) or type(e).__name__}")
+            return [
+                self._fallback_reasoning(context, prediction['probability'])
+                for context, prediction in zip(contexts, predictions)
+            ]
         except Exception as e:
-            logger.error(f"Prediction failed: {str(e)}")
-            raise
+            logger.error(f"Batch reasoning failed: {str(e)}")
+            return [None] * len(contexts)
+        
+        entries = self._parse_batch_response(response, len(contexts))
+        reasonings: List[Optional[str]] = []
+        for index, (context, prediction) in enumerate(zip(contexts, predictions)):
+            entry = entries.get(index)
+            if entry is None:
+                reasonings.append(None)
+                continue
+            
+            llm_reasoning = json.dumps(entry, indent=2)
+            self._remember_reasoning(context, prediction['ai_reasoning']['zynd_analysis'], llm_reasoning)
+            reasonings.append(llm_reasoning)
+        return reasonings
+    
+    def _batch_reasoning_prompt(
+        self,
+        contexts: List[Dict[str, Any]],
+        predictions: List[Dict[str, Any]]
+    ) -> str:
+        """Build the user message for a multi-region reasoning call."""
+        sections = []
+        for index, (context, prediction) in enumerate(zip(contexts, predictions)):
+            llm_context = self._format_context({
+                **self._with_history(context),
+                'sensor_history': prediction['ai_reasoning'].get('sensor_history'),
+                'zynd_analysis': prediction['ai_reasoning']['zynd_analysis'],
+                'calculated_risk_score': prediction['probability']
+            })
+            sections.append(f"### Region {index}\n{llm_context}")
+        
+        return (
+            f"Analyze these {len(contexts)} flood risk scenarios independently.\n\n"
+            + "\n\n".join(sections)
+            + f"\n\nRespond with ONLY a JSON array of {len(contexts)} objects, one per region, "
+            f"each in the output format above plus an \"index\" field with the region number."
+        )
+    
+    @staticmethod
+    def _parse_batch_response(response: str, count: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Validate a batch response and split it per region.
+        
+        Returns:
+            Valid entries keyed by region index (without the index field)
+        """
+        text = response.strip()
+        if text.startswith("```"):
+            # Strip a markdown code fence
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+        
+        try:
+            items = json.loads(text)
+        except ValueError:
+            logger.warning("Batch reasoning response is not valid JSON")
+            return {}
+        if not isinstance(items, list):
+            return {}
+        
+        entries: Dict[int, Dict[str, Any]] = {}
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            
+            index = item.get('index', position)
+            if not isinstance(index, int) or not 0 <= index < count or index in entries:
+                continue
+            if not isinstance(item.get('risk_assessment'), str):
+                continue
+            if str(item.get('risk_level', '')).lower() not in RISK_LEVELS:
+                continue
+            
+            entries[index] = {key: value for key, value in item.items() if key != 'index'}
+        return entries
+    
+    def _reasoning_prompt(
+        self,
+        context: Dict[str, Any],
+        zynd_analysis: Dict[str, Any],
+        risk_score: float,
+        sensor_history: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build the user message for the LLM reasoning step."""
+        llm_context = self._format_context({
+            **self._with_history(context),
+            'sensor_history': sensor_history,
+            'zynd_analysis': zynd_analysis,
+            'calculated_risk_score': risk_score
+        })
+        return f"Analyze this flood risk scenario:\n\n{llm_context}"
+    
+    def _remember_reasoning(
+        self,
+        context: Dict[str, Any],
+        zynd_analysis: Dict[str, Any],
+        llm_reasoning: str
+    ) -> None:
+        """Store reasoning for reuse by later predictions in the same bucket."""
+        if self.reasoning_cache is not None:
+            self.reasoning_cache.set(self._reuse_bucket_key(context), {
+                'zynd_analysis': zynd_analysis,
+                'llm_reasoning': llm_reasoning
+            })
+    
+    def _build_result(
+        self,
+        context: Dict[str, Any],
+        zynd_analysis: Dict[str, Any],
+        risk_score: float
+    ) -> Dict[str, Any]:
+        """Assemble the prediction from the deterministic models (no LLM)."""
+        # Step 4: Generate water level forecast
+        water_level_forecast = self._forecast_water_levels(context, risk_score)
+        
+        # Step 5: Estimate impact
+        affected_population = self._estimate_affected_population(
+            context, 
+            risk_score
+        )
+        
+        # Step 6: Calculate time to impact
+        predicted_time = self._calculate_time_to_impact(context, risk_score)
+        
+        # Filtered gauge level and trend, maintained as readings arrive
+        river_state = self._river_state(context)
+        
+        # Spread of the probability and forecast under sensor error
+        uncertainty = self._uncertainty(context, zynd_analysis)
+        
+        return {
+            'region': context['region'],
+            'center_lat': context['latitude'],
+            'center_lon': context['longitude'],
+            'risk_level': self._score_to_risk_level(risk_score),
+            'probability': risk_score,
+            'confidence': zynd_analysis.get('confidence', 0.85),
+            'predicted_time': predicted_time,
+            'affected_population': affected_population,
+            'water_level_forecast': water_level_forecast,
+            'rainfall_intensity': context.get('rainfall', 0),
+            'soil_saturation': context.get('soil_saturation', 0),
+            'river_level': context.get('river_level', 0),
+            'ai_reasoning': {
+                'llm_analysis': None,
+                'zynd_analysis': zynd_analysis,
+                'risk_factors': self._identify_risk_factors(context),
+                'forecast': self.forecaster.describe(),
+                'risk_model': {'model': self.risk_model.active.name, 'version': self.risk_model.active.version},
+                'river_state': river_state,
+                'sensor_history': context.get('sensor_history'),
+                'uncertainty': uncertainty,
+                'similar_events': [
+                    {
+                        'id': event.get('id'),
+                        'region': event.get('region'),
+                        'severity': event.get('actual_severity'),
+                        'distance': event.get('distance'),
+                        'occurred_at': event.get('occurred_at')
+                    }
+                    for event in context.get('historical_data') or []
+                ],
+                'methodology': 'hybrid_ai_ml',
+                'tier': TIER_LLM,
+                'reasoning_reused': False
+            }
+        }
+    
+    def _uncertainty(
+        self,
+        context: Dict[str, Any],
+        zynd_analysis: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Monte Carlo percentile bands, or None when the ensemble is disabled."""
+        if self.ensemble is None:
+            return None
+        
+        # A network ZYND score does not move with our input draws; the
+        # rule-based one is recomputed per draw
+        zynd_score = None
+        if zynd_analysis.get('method') != 'fallback':
+            zynd_score = zynd_analysis.get('risk_score', float('nan'))  # NaN = basic score
+        
+        historical_score = None
+        if context.get('historical_data'):
+            historical_score = self._calculate_historical_risk(context)
+        
+        return self.ensemble.run(context, zynd_score=zynd_score, historical_score=historical_score)
+    
+    def _with_history(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Context with the most similar past events as historical_data, unless supplied."""
+        if context.get('latitude') is None or context.get('longitude') is None:
+            return context
+        if context.get('historical_data'):
+            return context
+        return {**context, 'historical_data': self.history.query(context, k=settings.HISTORY_NEIGHBOURS)}
+    
+    async def _with_sensor_history(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Context with a summary of nearby sensors' recent readings as
+        sensor_history, unless supplied (read from disk in a worker thread).
+        """
+        if 'sensor_history' in context:
+            return context
+        if context.get('latitude') is None or context.get('longitude') is None:
+            return context
+        sensor_history = await asyncio.to_thread(
+            self.sensors.history_near,
+            context['latitude'], context['longitude'], settings.SENSOR_HISTORY_HOURS
+        )
+        return {**context, 'sensor_history': sensor_history}
+    
+    def _river_state(self, context: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Filtered state of the nearest reporting river gauge (None without one)."""
+        if context.get('river_state') is not None:
+            return context['river_state']
+        if context.get('latitude') is None or context.get('longitude') is None:
+            return None
+        lat, lon = context['latitude'], context['longitude']
+        gauges = [sensor.sensor_id for sensor in self.sensors.nearby('river_level', lat, lon)]
+        return self.gauges.snapshot_at(lat, lon, gauges)
+    
+    def _fallback_reasoning(self, context: Dict[str, Any], risk_score: float) -> str:
+        """Deterministic explanation used when the LLM is unavailable."""
+        factors = "; ".join(self._identify_risk_factors(context))
+        return (
+            f"Deterministic assessment (LLM unavailable): "
+            f"{self._score_to_risk_level(risk_score)} risk, score {risk_score:.2f}. "
+            f"Factors: {factors}."
+        )
+    
+    def _templated_reasoning(self, context: Dict[str, Any], risk_score: float) -> str:
+        """Explanation for inputs the rule tier settles on its own."""
+        factors = "; ".join(self._identify_risk_factors(context))
+        return (
+            f"Rule-based assessment: {self._score_to_risk_level(risk_score)} risk, "
+            f"score {risk_score:.2f}. Factors: {factors}. "
+            f"Rainfall, soil saturation and river level are all within normal ranges."
+        )
+    
+    def _reuse_bucket_key(self, context: Dict[str, Any]) -> str:
+        """Quantize inputs into the bucket used for reasoning reuse."""
+        def bucket(value: float, size: float) -> int:
+            return int(np.floor(float(value or 0) / size))
+        
+        return ":".join(str(part) for part in (
+            bucket(context.get('latitude', 0), settings.PREDICTION_REUSE_CELL_DEGREES),
+            bucket(context.get('longitude', 0), settings.PREDICTION_REUSE_CELL_DEGREES),
+            bucket(context.get('rainfall', 0), settings.PREDICTION_REUSE_RAINFALL_BIN),
+            bucket(context.get('soil_saturation', 0), settings.PREDICTION_REUSE_SATURATION_BIN),
+            bucket(context.get('river_level', 0), settings.PREDICTION_REUSE_RIVER_BIN)
+        ))
     
     def _calculate_comprehensive_risk_score(
         self, 
@@ -125,16 +625,8 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         zynd_analysis: Dict[str, Any]
     ) -> float:
         """Calculate comprehensive risk score from multiple sources."""
-        rainfall = context.get('rainfall', 0)
-        saturation = context.get('soil_saturation', 0)
-        river_level = context.get('river_level', 0)
-        
         # Method 1: Basic weighted scoring
-        basic_score = (
-            min(rainfall / 100, 1.0) * 0.35 +
-            saturation * 0.30 +
-            min(river_level / 10, 1.0) * 0.35
-        )
+        basic_score = self._basic_risk_score(context)
         
         # Method 2: ZYND AI score
         zynd_score = zynd_analysis.get('risk_score', basic_score)
@@ -142,14 +634,28 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         # Method 3: Historical pattern matching (simplified)
         historical_score = self._calculate_historical_risk(context)
         
-        # Ensemble scoring with weights
-        final_score = (
-            basic_score * 0.3 +
-            zynd_score * 0.5 +
-            historical_score * 0.2
-        )
+        # Served risk model (weighted ensemble unless a trained model is loaded)
+        features = np.array([[
+            context.get('rainfall', 0),
+            context.get('soil_saturation', 0),
+            context.get('river_level', 0),
+            zynd_score,
+            historical_score
+        ]], dtype=np.float64)
+        
+        return float(self.risk_model.predict(features)[0])
+    
+    def _basic_risk_score(self, context: Dict[str, Any]) -> float:
+        """Weighted risk score from the sensor inputs alone."""
+        rainfall = context.get('rainfall', 0)
+        saturation = context.get('soil_saturation', 0)
+        river_level = context.get('river_level', 0)
         
-        return min(1.0, max(0.0, final_score))
+        return (
+            min(rainfall / 100, 1.0) * BASIC_WEIGHTS['rainfall'] +
+            saturation * BASIC_WEIGHTS['saturation'] +
+            min(river_level / 10, 1.0) * BASIC_WEIGHTS['river']
+        )
     
     def _calculate_historical_risk(self, context: Dict[str, Any]) -> float:
         """Calculate risk based on historical patterns."""
@@ -157,7 +663,7 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         historical_data = context.get('historical_data', [])
         
         if not historical_data:
-            return 0.5  # Neutral score if no historical data
+            return NEUTRAL_HISTORICAL_SCORE  # Neutral score if no historical data
         
         # Average of past flood occurrences with similar conditions
         return np.mean([d.get('severity', 0.5) for d in historical_data])
@@ -167,21 +673,12 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         context: Dict[str, Any],
         risk_score: float
     ) -> List[float]:
-        """Generate 24-hour water level forecast."""
-        current_level = context.get('river_level', 5.0)
-        rainfall = context.get('rainfall', 0)
-        
-        forecast = []
-        peak_hour = 6  # Peak typically 6 hours after heavy rain starts
-        
-        for hour in range(24):
-            # Gaussian curve for realistic water level rise and fall
-            time_factor = np.exp(-((hour - peak_hour) ** 2) / (2 * 3 ** 2))
-            increase = (rainfall / 50) * time_factor * risk_score * 2
-            forecast_level = current_level + increase
-            forecast.append(round(max(0, forecast_level), 2))
-        
-        return forecast
+        """Generate the water level forecast over the configured horizon."""
+        return self.forecaster.forecast_one(
+            context.get('river_level', 5.0),
+            context.get('rainfall', 0),
+            risk_score
+        )
     
     def _estimate_affected_population(
         self, 
@@ -189,23 +686,25 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
         risk_score: float
     ) -> int:
         """Estimate population at risk."""
-        # Simplified population density model
-        # In production, use actual census data and GIS
-        
-        base_density = {
-            'urban': 10000,
-            'suburban': 5000,
-            'rural': 1000
-        }
-        
         # Estimate affected radius in km
         affected_radius_km = risk_score * 10  # Max 10km radius
-        affected_area_km2 = np.pi * (affected_radius_km ** 2)
         
-        # Assume average density (should be derived from actual location)
-        avg_density_per_km2 = 3000
+        # Gridded population inside the affected circle, when a raster covers it
+        if context.get('latitude') is not None and context.get('longitude') is not None:
+            population = self.population.in_circle(
+                context['latitude'],
+                context['longitude'],
+                affected_radius_km
+            )
+            if population is not None:
+                return int(population * risk_score)
+        
+        # Otherwise the density of the location's area type
+        area_type = context.get('area_type') or settings.POPULATION_DEFAULT_AREA_TYPE
+        density_per_km2 = AREA_DENSITY_PER_KM2.get(area_type, AREA_DENSITY_PER_KM2['suburban'])
         
-        estimated_population = int(affected_area_km2 * avg_density_per_km2 * risk_score)
+        affected_area_km2 = np.pi * (affected_radius_km ** 2)
+        estimated_population = int(affected_area_km2 * density_per_km2 * risk_score)
         
         return estimated_population
     
@@ -241,11 +740,12 @@ Be precise, data-driven, and conservative (err on the side of caution)."""
     
     def _score_to_risk_level(self, score: float) -> str:
         """Convert risk score to risk level category."""
-        if score >= 0.85:
+        medium, high, critical = RISK_LEVEL_THRESHOLDS
+        if score >= critical:
             return 'critical'
-        elif score >= 0.65:
+        elif score >= high:
             return 'high'
-        elif score >= 0.35:
+        elif score >= medium:
             return 'medium'
         else:
             return 'low'
@@ -0,0 +1,203 @@
+"""Token-budgeted compaction of agent contexts into LLM prompt text."""
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+from app.config import settings
+from app.core.scheduler import estimate_tokens
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Field whitelist: True keeps the value, a nested dict whitelists the fields
+# of a dict value (or of each dict in a list value)
+FieldSpec = Dict[str, Union[bool, "FieldSpec"]]
+
+# Relevance of a list item, given the item and the whole context (higher is kept)
+RankFunc = Callable[[Any, Dict[str, Any]], float]
+
+# Field sets shared by several agents
+FLOOD_INPUT_FIELDS: FieldSpec = {
+    'region': True,
+    'latitude': True,
+    'longitude': True,
+    'rainfall': True,
+    'soil_saturation': True,
+    'river_level': True
+}
+
+INCIDENT_FIELDS: FieldSpec = {
+    'id': True,
+    'title': True,
+    'type': True,
+    'severity': True,
+    'status': True,
+    'latitude': True,
+    'longitude': True,
+    'description': True,
+    'notes': True
+}
+
+RESOURCE_FIELDS: FieldSpec = {
+    'unit_name': True,
+    'type': True,
+    'crew_size': True,
+    'max_capacity': True,
+    'fuel_level': True,
+    'latitude': True,
+    'longitude': True
+}
+
+PREDICTION_SUMMARY_FIELDS: FieldSpec = {
+    'region': True,
+    'risk_level': True,
+    'probability': True,
+    'affected_population': True,
+    'predicted_time': True
+}
+
+
+class PromptBuilder:
+    """
+    Render an agent context as compact "key: value" prompt lines.
+    
+    Only whitelisted fields are kept, floats are rounded, long lists keep
+    their top-k items by relevance (in original order), long text is
+    clipped, and the result is cut to a hard token budget - fields listed
+    first in the whitelist are kept first.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        fields: FieldSpec,
+        rank: Optional[Dict[str, RankFunc]] = None,
+        line_prefix: str = "",
+        token_budget: Optional[int] = None,
+        max_list_items: Optional[int] = None,
+        float_decimals: Optional[int] = None,
+        max_text_chars: Optional[int] = None
+    ):
+        self.name = name
+        self.fields = fields
+        self.rank = rank or {}
+        self.line_prefix = line_prefix
+        self.token_budget = token_budget or settings.PROMPT_TOKEN_BUDGET
+        self.max_list_items = max_list_items or settings.PROMPT_MAX_LIST_ITEMS
+        self.float_decimals = (
+            settings.PROMPT_FLOAT_DECIMALS if float_decimals is None else float_decimals
+        )
+        self.max_text_chars = max_text_chars or settings.PROMPT_MAX_TEXT_CHARS
+    
+    def build(self, context: Dict[str, Any]) -> str:
+        """
+        Compact `context` into prompt text within the token budget.
+        
+        Args:
+            context: Agent context (whitelisted fields only are rendered)
+        
+        Returns:
+            Prompt lines joined by newlines
+        """
+        lines: List[str] = []
+        used = 0
+        truncated = False
+        
+        for key, spec in self.fields.items():
+            if key not in context or context[key] is None:
+                continue
+            
+            value = self._compact(context[key], spec, key, context)
+            line = f"{self.line_prefix}{key}: {self._render(value)}"
+            tokens = estimate_tokens(line)
+            
+            if used + tokens > self.token_budget:
+                # Keep what fits of the first line over budget, then stop
+                remaining_chars = (self.token_budget - used) * 4
+                if remaining_chars > len(self.line_prefix) + len(key) + 16:
+                    lines.append(line[:remaining_chars] + "...")
+                truncated = True
+                break
+            
+            lines.append(line)
+            used += tokens
+        
+        text = "\n".join(lines)
+        logger.info(
+            f"{self.name} prompt context: {estimate_tokens(text)} tokens "
+            f"(budget {self.token_budget}{', truncated' if truncated else ''})"
+        )
+        return text
+    
+    def _compact(self, value: Any, spec: Any, path: str, context: Dict[str, Any]) -> Any:
+        if isinstance(value, dict):
+            if isinstance(spec, dict):
+                return {
+                    key: self._compact(value[key], spec[key], f"{path}.{key}", context)
+                    for key in spec if key in value and value[key] is not None
+                }
+            return {
+                key: self._compact(item, True, f"{path}.{key}", context)
+                for key, item in value.items()
+            }
+        
+        if isinstance(value, (list, tuple)):
+            items = list(value)
+            if len(items) > self.max_list_items:
+                items = self._top_k(items, path, context)
+            return [self._compact(item, spec, path, context) for item in items]
+        
+        if isinstance(value, float):
+            return round(value, self.float_decimals)
+        
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M")
+        
+        if isinstance(value, date):
+            return value.isoformat()
+        
+        if isinstance(value, str) and len(value) > self.max_text_chars:
+            return value[:self.max_text_chars] + "..."
+        
+        if value is None or isinstance(value, (bool, int, str)):
+            return value
+        
+        # numpy scalars and other numeric types
+        try:
+            return round(float(value), self.float_decimals)
+        except (TypeError, ValueError):
+            return str(value)
+    
+    def _top_k(self, items: List[Any], path: str, context: Dict[str, Any]) -> List[Any]:
+        """Keep the max_list_items most relevant items, in their original order."""
+        rank = self.rank.get(path)
+        if rank is None:
+            return items[:self.max_list_items]
+        
+        scored = sorted(range(len(items)), key=lambda i: rank(items[i], context), reverse=True)
+        keep = sorted(scored[:self.max_list_items])
+        return [items[i] for i in keep]
+    
+    @staticmethod
+    def _render(value: Any) -> str:
+        if isinstance(value, str):
+            return value
+        return json.dumps(value, separators=(", ", ": "), default=str)
+
+
+def proximity_to_incident(item: Dict[str, Any], context: Dict[str, Any]) -> float:
+    """Rank resources by closeness to the incident (closer is more relevant)."""
+    incident = context.get('incident') or {}
+    try:
+        d_lat = float(item.get('latitude')) - float(incident.get('latitude'))
+        d_lon = float(item.get('longitude')) - float(incident.get('longitude'))
+    except (TypeError, ValueError):
+        return float('-inf')
+    return -(d_lat ** 2 + d_lon ** 2)
+
+
+def by_severity(item: Dict[str, Any], context: Dict[str, Any]) -> float:
+    """Rank historical events by severity."""
+    try:
+        return float(item.get('severity', 0))
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,131 @@
+"""Process-wide registry of long-lived AI agents."""
+from typing import Any, Dict, Optional
+import google.generativeai as genai
+from app.config import settings
+from app.agents.prediction_agent import PredictionAgent
+from app.agents.verification_agent import VerificationAgent
+from app.agents.coordination_agent import CoordinationAgent
+from app.agents.zynd_agent_wrapper import ZyndAgentWrapper
+from app.agents.model_backend import build_model_client
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AgentRegistry:
+    """
+    Create each agent type once and share it across requests.
+    
+    All agents share a single Gemini model client and a single
+    ZyndAgentWrapper (and therefore a single P3AI/MQTT connection).
+    """
+    
+    def __init__(self):
+        self._model_client: Optional[Any] = None
+        self._zynd_agent: Optional[ZyndAgentWrapper] = None
+        self._prediction_agent: Optional[PredictionAgent] = None
+        self._verification_agent: Optional[VerificationAgent] = None
+        self._coordination_agent: Optional[CoordinationAgent] = None
+    
+    @property
+    def model_client(self) -> Any:
+        """Get the shared Gemini model client (or its MODEL_BACKEND stand-in)."""
+        if self._model_client is None:
+            def live_client() -> Any:
+                genai.configure(api_key=settings.GEMINI_API_KEY)
+                return genai.GenerativeModel(settings.GEMINI_MODEL)
+            
+            self._model_client = build_model_client(live_client)
+            logger.info(
+                f"Shared Gemini client initialized: {settings.GEMINI_MODEL} "
+                f"({settings.MODEL_BACKEND} backend)"
+            )
+        return self._model_client
+    
+    @property
+    def zynd_agent(self) -> ZyndAgentWrapper:
+        """Get the shared ZYND AI wrapper."""
+        if self._zynd_agent is None:
+            self._zynd_agent = ZyndAgentWrapper(llm=self.model_client)
+        return self._zynd_agent
+    
+    @property
+    def prediction_agent(self) -> PredictionAgent:
+        """Get the shared prediction agent."""
+        if self._prediction_agent is None:
+            self._prediction_agent = PredictionAgent(
+                client=self.model_client,
+                zynd_agent=self.zynd_agent
+            )
+        return self._prediction_agent
+    
+    @property
+    def verification_agent(self) -> VerificationAgent:
+        """Get the shared verification agent."""
+        if self._verification_agent is None:
+            self._verification_agent = VerificationAgent(client=self.model_client)
+        return self._verification_agent
+    
+    @property
+    def coordination_agent(self) -> CoordinationAgent:
+        """Get the shared coordination agent."""
+        if self._coordination_agent is None:
+            self._coordination_agent = CoordinationAgent(
+                client=self.model_client,
+                zynd_agent=self.zynd_agent
+            )
+        return self._coordination_agent
+    
+    def startup(self) -> None:
+        """Eagerly create all agents so the first request pays no setup cost."""
+        self.prediction_agent
+        self.verification_agent
+        self.coordination_agent
+        logger.info("Agent registry started")
+    
+    async def shutdown(self) -> None:
+        """Release shared agent resources."""
+        if self._zynd_agent is not None:
+            self._zynd_agent.close()
+        
+        self._prediction_agent = None
+        self._verification_agent = None
+        self._coordination_agent = None
+        self._zynd_agent = None
+        self._model_client = None
+        logger.info("Agent registry shut down")
+    
+    def status(self) -> Dict[str, Any]:
+        """Report which agents have been created."""
+        return {
+            'prediction_agent': self._prediction_agent is not None,
+            'verification_agent': self._verification_agent is not None,
+            'coordination_agent': self._coordination_agent is not None,
+            'zynd_network': bool(self._zynd_agent and self._zynd_agent.agent),
+            'model_backend': settings.MODEL_BACKEND
+        }
+    
+    def model_backend_stats(self) -> Optional[Dict[str, Any]]:
+        """Call counters of the record/replay/synthetic backend (None when live)."""
+        stats = getattr(self._model_client, 'stats', None)
+        return stats() if callable(stats) else None
+
+
+# Global agent registry
+registry = AgentRegistry()
+
+
+# Dependency providers
+def get_prediction_agent() -> PredictionAgent:
+    """Get prediction agent for dependency injection."""
+    return registry.prediction_agent
+
+
+def get_verification_agent() -> VerificationAgent:
+    """Get verification agent for dependency injection."""
+    return registry.verification_agent
+
+
+def get_coordination_agent() -> CoordinationAgent:
+    """Get coordination agent for dependency injection."""
+    return registry.coordination_agent
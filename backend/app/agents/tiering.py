@@ -0,0 +1,86 @@
+"""Tiered inference policy: decide when the rule-based verdict is final."""
+from typing import Any, Dict, List
+from app.config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Which tier produced an agent's explanation
+TIER_RULES = "rules"
+TIER_LLM = "llm"
+
+# Verification checks that must all pass for a prediction to be verified
+REQUIRED_VERIFICATION_CHECKS = ('sensor_consistency', 'physical_plausibility', 'anomaly_check')
+
+
+class TieringPolicy:
+    """
+    Route clear-cut cases to templated explanations and the rest to Gemini.
+    
+    The deterministic checks already decide every verdict; the LLM only
+    explains it. When the verdict is unambiguous the explanation is
+    templated instead, saving a Gemini round trip.
+    """
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        verification_confidence: float = 0.9,
+        prediction_max_risk: float = 0.3
+    ):
+        self.enabled = enabled
+        self.verification_confidence = verification_confidence
+        self.prediction_max_risk = prediction_max_risk
+        
+        # Metrics
+        self.decisions: Dict[str, Dict[str, int]] = {}
+    
+    def verification_tier(self, validation_checks: Dict[str, Any], confidence: float) -> str:
+        """
+        Pick the tier for a verification.
+        
+        Clear cases: a required check failed (the prediction is rejected
+        whatever the LLM says), or every required check passed with
+        confidence at or above the threshold.
+        """
+        required = [validation_checks.get(name) for name in REQUIRED_VERIFICATION_CHECKS]
+        clear = (
+            'fail' in required or
+            (all(v in ['pass', True] for v in required) and
+             confidence >= self.verification_confidence)
+        )
+        return self._decide("verification", clear)
+    
+    def prediction_tier(self, basic_risk_score: float, risk_factors: List[str]) -> str:
+        """
+        Pick the tier for a prediction.
+        
+        Clear case: the input-only risk score is at or below the threshold
+        and no risk factor is present.
+        """
+        clear = (
+            basic_risk_score <= self.prediction_max_risk and
+            risk_factors == ["Normal conditions"]
+        )
+        return self._decide("prediction", clear)
+    
+    def _decide(self, agent: str, clear: bool) -> str:
+        tier = TIER_RULES if self.enabled and clear else TIER_LLM
+        counts = self.decisions.setdefault(agent, {TIER_RULES: 0, TIER_LLM: 0})
+        counts[tier] += 1
+        return tier
+    
+    def stats(self) -> Dict[str, Any]:
+        """Tier decisions per agent for monitoring."""
+        return {
+            'enabled': self.enabled,
+            'decisions': {agent: dict(counts) for agent, counts in self.decisions.items()}
+        }
+
+
+# Global tiering policy shared by all agents
+tiering_policy = TieringPolicy(
+    enabled=settings.TIERING_ENABLED,
+    verification_confidence=settings.TIERING_VERIFICATION_CONFIDENCE,
+    prediction_max_risk=settings.TIERING_PREDICTION_MAX_RISK
+)
@@ -1,6 +1,11 @@
 """Risk verification AI agent."""
 from app.agents.base_agent import BaseAgent
-from typing import Dict, Any
+from app.agents.prompt_builder import PromptBuilder
+from app.agents.tiering import TieringPolicy, tiering_policy, TIER_RULES
+from app.config import settings
+from app.ml.history import HistoricalIndex, historical_index
+from app.services.sensors import SensorStore, sensor_store
+from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,8 +14,35 @@ logger = logging.getLogger(__name__)
 class VerificationAgent(BaseAgent):
     """AI Agent for verifying flood predictions and reducing false positives."""
     
-    def __init__(self):
-        super().__init__(name="VerificationAgent", model="gpt-4-turbo-preview")
+    def __init__(self, client: Optional[Any] = None):
+        super().__init__(name="VerificationAgent", model=settings.GEMINI_MODEL, client=client)
+        self.tiering: TieringPolicy = tiering_policy
+        self.history: HistoricalIndex = historical_index
+        self.sensors: SensorStore = sensor_store
+        
+        self.prompt_builder = PromptBuilder(self.name, fields={
+            'prediction': {
+                'region': True,
+                'risk_level': True,
+                'probability': True,
+                'confidence': True,
+                'rainfall_intensity': True,
+                'soil_saturation': True,
+                'river_level': True,
+                'affected_population': True,
+                'predicted_time': True,
+                'water_level_forecast': True,
+                'ai_reasoning': {
+                    'risk_factors': True,
+                    'zynd_analysis': {'risk_level': True, 'risk_score': True, 'confidence': True}
+                }
+            },
+            'validation_checks': True,
+            'calculated_confidence': True
+        }, rank={
+            # Keep the forecast peak
+            'prediction.water_level_forecast': lambda level, context: level
+        })
         
         self.system_prompt = """You are a risk verification AI agent specializing in cross-validation of flood predictions.
 
@@ -79,18 +111,6 @@ Be rigorous - false alarms erode public trust."""
             # Calculate confidence score
             confidence = self._calculate_confidence(validation_checks)
             
-            # Get LLM verification reasoning
-            llm_context = self._format_context({
-                'prediction': prediction,
-                'validation_checks': validation_checks,
-                'calculated_confidence': confidence
-            })
-            
-            llm_reasoning = await self._call_llm(
-                self.system_prompt,
-                f"Verify this flood prediction:\n\n{llm_context}"
-            )
-            
             # Determine if verified
             is_verified = confidence >= 0.70 and all(
                 v in ['pass', True] for v in [
@@ -105,6 +125,27 @@ Be rigorous - false alarms erode public trust."""
             
             recommendation = self._make_recommendation(is_verified, confidence, concerns)
             
+            # Clear-cut verdicts get a templated explanation; only borderline
+            # cases are sent to the LLM
+            tier = self.tiering.verification_tier(validation_checks, confidence)
+            if tier == TIER_RULES:
+                llm_reasoning = self._templated_reasoning(
+                    recommendation, validation_checks, confidence, concerns
+                )
+            else:
+                # Get LLM verification reasoning
+                llm_context = self._format_context({
+                    'prediction': prediction,
+                    'validation_checks': validation_checks,
+                    'calculated_confidence': confidence
+                })
+                
+                llm_reasoning = await self._call_llm_or_fallback(
+                    self.system_prompt,
+                    f"Verify this flood prediction:\n\n{llm_context}",
+                    fallback=self._fallback_reasoning(validation_checks, confidence)
+                )
+            
             result = {
                 'is_verified': is_verified,
                 'confidence': confidence,
@@ -112,6 +153,7 @@ Be rigorous - false alarms erode public trust."""
                 'concerns': concerns,
                 'recommendation': recommendation,
                 'reasoning': llm_reasoning,
+                'tier': tier,
                 'adjustments': self._suggest_adjustments(prediction, validation_checks)
             }
             
@@ -122,9 +164,35 @@ Be rigorous - false alarms erode public trust."""
             logger.error(f"Verification failed: {str(e)}")
             raise
     
+    def _fallback_reasoning(
+        self,
+        validation_checks: Dict[str, str],
+        confidence: float
+    ) -> str:
+        """Deterministic explanation used when the LLM is unavailable."""
+        checks = ", ".join(f"{name}={result}" for name, result in validation_checks.items())
+        return (
+            f"Rule-based verification (LLM unavailable): confidence {confidence:.2f}. "
+            f"Checks: {checks}."
+        )
+    
+    def _templated_reasoning(
+        self,
+        recommendation: str,
+        validation_checks: Dict[str, str],
+        confidence: float,
+        concerns: list
+    ) -> str:
+        """Explanation for verdicts the rule checks settle on their own."""
+        checks = ", ".join(f"{name}={result}" for name, result in validation_checks.items())
+        return (
+            f"Rule-based verification: {recommendation} with confidence {confidence:.2f}. "
+            f"Checks: {checks}. Concerns: {'; '.join(concerns)}."
+        )
+    
     def _check_sensor_consistency(self, context: Dict[str, Any]) -> str:
         """Check if multiple sensors provide consistent readings."""
-        sensor_data = context.get('sensor_data', {})
+        sensor_data = context.get('sensor_data') or self._live_sensor_data(context.get('prediction', {}))
         
         if not sensor_data:
             return 'insufficient_data'
@@ -145,10 +213,16 @@ Be rigorous - false alarms erode public trust."""
         
         return 'pass'
     
+    def _live_sensor_data(self, prediction: Dict[str, Any]) -> Dict[str, List[float]]:
+        """Latest readings of the sensors reporting near the prediction."""
+        if prediction.get('center_lat') is None or prediction.get('center_lon') is None:
+            return {}
+        return self.sensors.sensor_data(prediction['center_lat'], prediction['center_lon'])
+    
     def _check_historical_correlation(self, context: Dict[str, Any]) -> str:
         """Check if prediction correlates with historical patterns."""
-        historical = context.get('historical_patterns', [])
         prediction = context.get('prediction', {})
+        historical = context.get('historical_patterns') or self._similar_events(prediction)
         
         if not historical:
             return 'no_data'
@@ -175,6 +249,18 @@ Be rigorous - false alarms erode public trust."""
         else:
             return 'partial'
     
+    def _similar_events(self, prediction: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Past events most similar to the prediction's location and inputs."""
+        if prediction.get('center_lat') is None or prediction.get('center_lon') is None:
+            return []
+        return self.history.query({
+            'latitude': prediction['center_lat'],
+            'longitude': prediction['center_lon'],
+            'rainfall': prediction.get('rainfall_intensity'),
+            'soil_saturation': prediction.get('soil_saturation'),
+            'river_level': prediction.get('river_level')
+        }, k=settings.HISTORY_NEIGHBOURS)
+    
     def _check_physical_plausibility(self, prediction: Dict[str, Any]) -> str:
         """Check if prediction is physically plausible."""
         rainfall = prediction.get('rainfall_intensity', 0)
@@ -1,11 +1,39 @@
 """Wrapper for ZYND AI Agent (P3 AI Network) integration."""
-from typing import Dict, Any, Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Callable, Optional, List
 from app.config import settings
+from app.core.cache import MemoryCache
+from app.agents.model_backend import build_model_client, build_p3ai_stand_in, wrap_p3ai_agent
+from app.agents.prompt_builder import (
+    PromptBuilder,
+    FLOOD_INPUT_FIELDS,
+    INCIDENT_FIELDS,
+    RESOURCE_FIELDS,
+    PREDICTION_SUMMARY_FIELDS,
+    by_severity,
+    proximity_to_incident
+)
+from app.ml.risk_engine import RISK_LEVEL_THRESHOLDS, FALLBACK_WEIGHTS, FALLBACK_CONFIDENCE
+from app.core.singleflight import SingleFlight
+from app.core.scheduler import llm_scheduler, estimate_tokens, PRIORITY_NORMAL
+from app.core.circuit_breaker import (
+    gemini_breaker,
+    p3ai_breaker,
+    call_timeout,
+    within_budget,
+    UPSTREAM_UNAVAILABLE_ERRORS
+)
+import asyncio
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Capabilities searched for when looking for collaborating agents
+FLOOD_CAPABILITIES = ["flood_analysis", "weather_prediction", "risk_assessment"]
+
 try:
     from p3ai_agent.agent import AgentConfig, P3AIAgent
     import google.generativeai as genai
@@ -18,12 +46,45 @@ except ImportError:
 class ZyndAgentWrapper:
     """Wrapper for P3 AI Network Agent functionality."""
     
-    def __init__(self, agent_name: str = "FloodAnalysisAgent"):
+    def __init__(self, agent_name: str = "FloodAnalysisAgent", llm: Optional[Any] = None):
         self.agent_name = agent_name
         self.agent = None
         self.llm = None
         
-        if ZYND_AI_AVAILABLE and settings.ZYND_AI_SEED:
+        # The P3AI SDK is synchronous - its calls run on a dedicated executor
+        # so a slow registry or broker never blocks the event loop
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._discovery_cache = MemoryCache(
+            max_entries=32,
+            ttl_seconds=settings.P3AI_DISCOVERY_TTL_SECONDS
+        )
+        self._discovery_flight = SingleFlight(name="p3ai_discovery")
+        
+        # The SDK holds one active connection and inbox, so a connect/send/read
+        # exchange must not interleave with another one
+        self._exchange_lock = threading.Lock()
+        self._connected_agent_id: Optional[str] = None
+        
+        # Covers both flood-analysis inputs and coordination contexts
+        self.prompt_builder = PromptBuilder(agent_name, fields={
+            **FLOOD_INPUT_FIELDS,
+            'historical_data': True,
+            'incident': INCIDENT_FIELDS,
+            'prediction': PREDICTION_SUMMARY_FIELDS,
+            'available_resources': RESOURCE_FIELDS,
+            'agencies': True
+        }, rank={
+            'historical_data': by_severity,
+            'available_resources': proximity_to_incident
+        }, line_prefix="- ")
+        
+        stand_in = build_p3ai_stand_in()
+        if stand_in is not None:
+            # Offline replay/synthetic backend - no registry or broker needed
+            self.agent = stand_in
+            self.llm = llm or build_model_client(lambda: None)
+            logger.info(f"P3AI ZYND Agent stand-in initialized: {agent_name} ({settings.MODEL_BACKEND})")
+        elif ZYND_AI_AVAILABLE and settings.ZYND_AI_SEED:
             try:
                 # Configure P3AI Agent
                 agent_config = AgentConfig(
@@ -38,10 +99,16 @@ class ZyndAgentWrapper:
                 # Initialize P3AI Agent
                 self.agent = P3AIAgent(agent_config=agent_config)
                 
-                # Setup Gemini LLM for the agent
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                self.llm = genai.GenerativeModel('gemini-pro')
+                # Setup Gemini LLM for the agent (reuse the shared client if given)
+                if llm is None:
+                    def live_client() -> Any:
+                        genai.configure(api_key=settings.GEMINI_API_KEY)
+                        return genai.GenerativeModel(settings.GEMINI_MODEL)
+                    
+                    llm = build_model_client(live_client)
+                self.llm = llm
                 self.agent.set_agent_executor(self.llm)
+                self.agent = wrap_p3ai_agent(self.agent)
                 
                 logger.info(f"P3AI ZYND Agent initialized: {agent_name}")
             except Exception as e:
@@ -50,37 +117,60 @@ class ZyndAgentWrapper:
         else:
             logger.warning("ZYND AI not configured or available, using fallback mode")
     
-    async def analyze_flood_risk(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Thread pool for blocking P3AI SDK calls (created on first use)."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.P3AI_EXECUTOR_WORKERS,
+                thread_name_prefix="p3ai"
+            )
+        return self._executor
+    
+    def close(self) -> None:
+        """Release the P3AI agent, its MQTT connection and the executor."""
+        if self._executor is not None:
+            # Don't wait on calls stuck in the SDK
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        
+        if self.agent is None:
+            return
+        
+        try:
+            for method_name in ("disconnect", "close", "stop"):
+                method = getattr(self.agent, method_name, None)
+                if callable(method):
+                    method()
+                    break
+            logger.info(f"P3AI ZYND Agent closed: {self.agent_name}")
+        except Exception as e:
+            logger.error(f"Failed to close P3AI ZYND Agent: {str(e)}")
+        finally:
+            self.agent = None
+            self._connected_agent_id = None
+    
+    async def analyze_flood_risk(
+        self,
+        data: Dict[str, Any],
+        priority: int = PRIORITY_NORMAL
+    ) -> Dict[str, Any]:
         """
         Analyze flood risk using P3 AI Network Agent with Gemini.
         
         Args:
             data: Input data including weather, geography, etc.
+            priority: LLM scheduler priority
             
         Returns:
             Risk analysis result
         """
         if self.agent and self.llm:
             try:
-                # Search for flood analysis agents on P3 network
-                agents = self.agent.search_agents_by_capabilities(
-                    capabilities=["flood_analysis", "weather_prediction", "risk_assessment"],
-                    match_score_gte=0.6,
-                    top_k=3
-                )
-                
-                # If other agents found, use collaborative analysis
-                if agents:
-                    logger.info(f"Found {len(agents)} collaborative agents on P3 network")
-                    # Connect to top agent
-                    self.agent.connect_agent(agents[0])
-                    query = f"Analyze flood risk for: {data}"
-                    self.agent.send_message(query, message_type="query")
-                    
-                    # Wait for response
-                    response = self.agent.read_messages()
-                    if "No new messages" not in response:
-                        return {"source": "p3ai_network", "analysis": response}
+                # Ask collaborative agents on the P3 network first
+                network_result = await self._query_network(data)
+                if network_result is not None:
+                    return network_result
                 
                 # Use local Gemini if no network agents available
                 prompt = f"""Analyze flood risk based on the following data:
@@ -92,7 +182,7 @@ class ZyndAgentWrapper:
                 3. Key factors
                 4. Recommendations
                 """
-                result = await self.llm.generate_content_async(prompt)
+                result = await self._generate(prompt, priority)
                 return {"source": "local_gemini", "analysis": result.text}
                 
             except Exception as e:
@@ -101,12 +191,17 @@ class ZyndAgentWrapper:
         else:
             return self._fallback_analysis(data)
     
-    async def predict_flood_timeline(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    async def predict_flood_timeline(
+        self,
+        data: Dict[str, Any],
+        priority: int = PRIORITY_NORMAL
+    ) -> Dict[str, Any]:
         """
         Predict flood timeline using P3 AI Network.
         
         Args:
             data: Input data for prediction
+            priority: LLM scheduler priority
             
         Returns:
             Timeline prediction
@@ -122,7 +217,7 @@ class ZyndAgentWrapper:
                 3. Expected duration
                 4. Affected areas over time
                 """
-                result = await self.llm.generate_content_async(prompt)
+                result = await self._generate(prompt, priority)
                 return {"source": "zynd_ai", "prediction": result.text}
             except Exception as e:
                 logger.error(f"ZYND Agent prediction failed: {str(e)}")
@@ -130,12 +225,17 @@ class ZyndAgentWrapper:
         else:
             return self._fallback_timeline(data)
     
-    async def recommend_actions(self, context: Dict[str, Any]) -> Dict[str, Any]:
+    async def recommend_actions(
+        self,
+        context: Dict[str, Any],
+        priority: int = PRIORITY_NORMAL
+    ) -> Dict[str, Any]:
         """
         Get action recommendations using P3 AI Network.
         
         Args:
             context: Current situation context
+            priority: LLM scheduler priority
             
         Returns:
             Recommended actions
@@ -152,7 +252,7 @@ class ZyndAgentWrapper:
                 4. Resource requirements
                 5. Priority levels
                 """
-                result = await self.llm.generate_content_async(prompt)
+                result = await self._generate(prompt, priority)
                 return {"source": "zynd_ai", "recommendations": result.text}
             except Exception as e:
                 logger.error(f"ZYND Agent recommendation failed: {str(e)}")
@@ -160,12 +260,127 @@ class ZyndAgentWrapper:
         else:
             return self._fallback_recommendations(context)
     
+    async def _query_network(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Query collaborative P3 network agents through the P3AI circuit breaker.
+        
+        Returns None when no agent answered or the network is unavailable,
+        so the caller can continue with local analysis.
+        """
+        try:
+            return await p3ai_breaker.call(
+                lambda: self._network_analysis(data),
+                timeout=call_timeout(settings.P3AI_CALL_TIMEOUT_SECONDS)
+            )
+        except UPSTREAM_UNAVAILABLE_ERRORS as e:
+            logger.warning(f"P3 network unavailable, using local analysis: {str(e) or type(e).__name__}")
+            return None
+    
+    async def _network_analysis(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Search, connect and query the top matching agent on the P3 network."""
+        # Search for flood analysis agents on P3 network
+        agents = await self._discover_agents()
+        
+        # If other agents found, use collaborative analysis
+        if agents:
+            logger.info(f"Found {len(agents)} collaborative agents on P3 network")
+            try:
+                response = await self._run_blocking(
+                    self._exchange, agents[0], f"Analyze flood risk for:\n{self._format_data(data)}"
+                )
+            except BaseException:
+                # Also on cancellation (breaker timeout), when the exchange
+                # may still be running on the executor: rediscover and
+                # reconnect on the next analysis
+                self._connected_agent_id = None
+                self._discovery_cache.clear()
+                raise
+            
+            if "No new messages" not in response:
+                return {"source": "p3ai_network", "analysis": response}
+        
+        return None
+    
+    async def _discover_agents(self) -> List[Any]:
+        """
+        Find collaborating agents, cached for P3AI_DISCOVERY_TTL_SECONDS.
+        
+        Concurrent lookups share a single registry search.
+        """
+        key = ",".join(FLOOD_CAPABILITIES)
+        cached = self._discovery_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        agents, _ = await self._discovery_flight.do(
+            key,
+            lambda: self._run_blocking(
+                self.agent.search_agents_by_capabilities,
+                capabilities=FLOOD_CAPABILITIES,
+                match_score_gte=0.6,
+                top_k=3
+            )
+        )
+        agents = list(agents or [])
+        self._discovery_cache.set(key, agents)
+        return agents
+    
+    def _exchange(self, target: Any, query: str) -> str:
+        """
+        Send a query to `target` and read the reply (runs on the executor).
+        
+        The connection is kept open and reused while the top agent stays the
+        same. Replies left in the inbox by an earlier, abandoned exchange are
+        discarded before sending, so they are never read as this query's answer.
+        """
+        with self._exchange_lock:
+            target_id = self._agent_id(target)
+            if target_id != self._connected_agent_id:
+                self.agent.connect_agent(target)
+                self._connected_agent_id = target_id
+            
+            stale = self.agent.read_messages()
+            if stale and "No new messages" not in stale:
+                logger.info("Discarded stale P3 network reply before a new query")
+            
+            self.agent.send_message(query, message_type="query")
+            
+            # Wait for response
+            return self.agent.read_messages()
+    
+    @staticmethod
+    def _agent_id(agent: Any) -> str:
+        """Stable identifier for a search result."""
+        if isinstance(agent, dict):
+            for field in ("didIdentifier", "id", "name"):
+                if agent.get(field):
+                    return str(agent[field])
+        return repr(agent)
+    
+    async def _run_blocking(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking SDK call on the P3AI executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+    
+    async def _generate(self, prompt: str, priority: int) -> Any:
+        """Call Gemini through the shared scheduler, circuit breaker and latency budget."""
+        gemini_breaker.reject_if_open()
+        return await within_budget(llm_scheduler.run(
+            lambda: gemini_breaker.call(
+                lambda: self.llm.generate_content_async(prompt),
+                timeout=call_timeout(settings.LLM_CALL_TIMEOUT_SECONDS)
+            ),
+            priority=priority,
+            estimated_tokens=estimate_tokens(prompt) + 2000
+        ))
+    
     def _format_data(self, data: Dict[str, Any]) -> str:
         """Format data dictionary for LLM prompt."""
-        lines = []
-        for key, value in data.items():
-            lines.append(f"- {key}: {value}")
-        return "\n".join(lines)
+        return self.prompt_builder.build(data)
+    
+    def quick_analysis(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Rule-based risk analysis without network or LLM calls."""
+        return self._fallback_analysis(data)
     
     def _fallback_analysis(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback analysis when ZYND AI is unavailable."""
@@ -175,23 +390,24 @@ class ZyndAgentWrapper:
         
         # Simple risk calculation
         risk_score = (
-            (rainfall / 100) * 0.4 +
-            saturation * 0.3 +
-            (river_level / 10) * 0.3
+            (rainfall / 100) * FALLBACK_WEIGHTS['rainfall'] +
+            saturation * FALLBACK_WEIGHTS['saturation'] +
+            (river_level / 10) * FALLBACK_WEIGHTS['river']
         )
         
+        medium, high, critical = RISK_LEVEL_THRESHOLDS
         risk_level = 'low'
-        if risk_score >= 0.85:
+        if risk_score >= critical:
             risk_level = 'critical'
-        elif risk_score >= 0.65:
+        elif risk_score >= high:
             risk_level = 'high'
-        elif risk_score >= 0.35:
+        elif risk_score >= medium:
             risk_level = 'medium'
         
         return {
             'risk_level': risk_level,
             'risk_score': risk_score,
-            'confidence': 0.75,
+            'confidence': FALLBACK_CONFIDENCE,
             'method': 'fallback',
             'factors': {
                 'rainfall_impact': rainfall / 100,
@@ -3,10 +3,14 @@ from app.api.predictions import router as predictions_router
 from app.api.incidents import router as incidents_router
 from app.api.alerts import router as alerts_router
 from app.api.websocket import router as websocket_router
+from app.api.jobs import router as jobs_router
+from app.api.sensors import router as sensors_router
 
 __all__ = [
     "predictions_router",
     "incidents_router",
     "alerts_router",
     "websocket_router",
+    "jobs_router",
+    "sensors_router",
 ]
@@ -1,16 +1,21 @@
 """Incident (Crisis) API endpoints."""
 from fastapi import APIRouter, HTTPException, File, UploadFile, Form
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from app.database import get_service_client
 from app.schemas.incident import IncidentResponse
-from app.agents import CoordinationAgent
+from app.agents import registry
+from app.services.jobs import job_queue
+from app.ml.history import historical_index, event_from_incident
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/crisis", tags=["incidents"])
 
+# Background job that fills in an incident's ai_analysis
+COORDINATION_JOB = "incident_coordination"
+
 
 @router.get("/active", response_model=dict)
 async def get_active_incidents():
@@ -51,9 +56,11 @@ async def report_incident(
     This endpoint:
     1. Validates the incident report
     2. Stores it in database
-    3. Triggers AI analysis
-    4. Generates coordination plan
-    5. Returns incident ID
+    3. Queues AI analysis and coordination planning as a background job
+    4. Returns incident ID and job ID
+    
+    The incident's ai_analysis column is filled in when the job completes;
+    poll GET /api/jobs/{job_id} for progress.
     """
     try:
         logger.info(f"New incident reported: {title}")
@@ -89,42 +96,21 @@ async def report_incident(
         
         incident_id = result.data[0]['id']
         logger.info(f"Incident created with ID: {incident_id}")
+        historical_index.add(event_from_incident(result.data[0]))
         
-        # Run AI analysis and coordination (async in background)
-        # For demo, run synchronously
+        # Run AI analysis and coordination in the background
+        job_id = None
         try:
-            coordination_agent = CoordinationAgent()
-            
-            # Get available resources
-            resources_result = supabase.table('resources')\
-                .select('*')\
-                .eq('status', 'available')\
-                .limit(10)\
-                .execute()
-            
-            coordination_context = {
-                'incident': result.data[0],
-                'available_resources': resources_result.data if resources_result.data else [],
-                'agencies': ['Fire Department', 'Police', 'Medical Services', 'NGOs']
-            }
-            
-            coordination_plan = await coordination_agent.execute(coordination_context)
-            
-            # Update incident with AI analysis
-            supabase.table('incidents')\
-                .update({'ai_analysis': coordination_plan})\
-                .eq('id', incident_id)\
-                .execute()
-            
-            logger.info(f"AI analysis completed for incident {incident_id}")
-            
-        except Exception as ai_error:
-            logger.error(f"AI analysis failed: {str(ai_error)}")
-            # Continue even if AI fails
+            job_id = await job_queue.enqueue(COORDINATION_JOB, {'incident_id': incident_id})
+        except Exception as queue_error:
+            logger.error(f"Failed to queue AI analysis: {str(queue_error)}")
+            # Continue even if AI analysis can't be queued
         
         return {
             'success': True,
             'incident_id': incident_id,
+            'job_id': job_id,
+            'analysis_status': 'queued' if job_id else 'unavailable',
             'message': 'Incident reported successfully'
         }
         
@@ -194,3 +180,48 @@ async def update_incident_status(
     except Exception as e:
         logger.error(f"Failed to update incident: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _coordinate_incident(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job: build the coordination plan and store it on the incident."""
+    incident_id = payload['incident_id']
+    supabase = get_service_client()
+    
+    incident_result = supabase.table('incidents')\
+        .select('*')\
+        .eq('id', incident_id)\
+        .execute()
+    
+    if not incident_result.data:
+        logger.warning(f"Incident {incident_id} no longer exists, skipping AI analysis")
+        return {'incident_id': incident_id, 'skipped': True}
+    
+    # Get available resources
+    resources_result = supabase.table('resources')\
+        .select('*')\
+        .eq('status', 'available')\
+        .limit(10)\
+        .execute()
+    
+    coordination_context = {
+        'incident': incident_result.data[0],
+        'available_resources': resources_result.data if resources_result.data else [],
+        'agencies': ['Fire Department', 'Police', 'Medical Services', 'NGOs']
+    }
+    
+    coordination_plan = await registry.coordination_agent.execute(coordination_context)
+    
+    # Update incident with AI analysis
+    supabase.table('incidents')\
+        .update({'ai_analysis': coordination_plan})\
+        .eq('id', incident_id)\
+        .execute()
+    
+    logger.info(f"AI analysis completed for incident {incident_id}")
+    return {
+        'incident_id': incident_id,
+        'priority_tasks': len(coordination_plan.get('priority_tasks', []))
+    }
+
+
+job_queue.register(COORDINATION_JOB, _coordinate_incident)
@@ -0,0 +1,45 @@
+"""Background job status API endpoints."""
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+from app.services.jobs import job_queue, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/", response_model=dict)
+async def list_jobs(status: Optional[str] = None, limit: int = 50):
+    """List recent background jobs, optionally filtered by status."""
+    if status and status not in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED):
+        raise HTTPException(status_code=400, detail=f"Unknown job status: {status}")
+    
+    try:
+        jobs = await job_queue.list(status=status, limit=min(max(limit, 1), 200))
+        return {
+            'jobs': jobs,
+            'count': len(jobs)
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to list jobs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{job_id}", response_model=dict)
+async def get_job(job_id: str):
+    """Get a background job's status, attempts and result."""
+    try:
+        job = await job_queue.get(job_id)
+        
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        return job
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch job: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
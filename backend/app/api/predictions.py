@@ -1,19 +1,53 @@
 """Prediction API endpoints."""
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime, timedelta
+from app.config import settings
 from app.database import get_service_client
+from app.core.cache import MemoryCache
+from app.core.singleflight import SingleFlight
+from app.core.circuit_breaker import latency_budget
+from app.core.stage_graph import StageGraph
 from app.schemas.prediction import (
     PredictionResponse,
-    GeneratePredictionRequest
+    GeneratePredictionRequest,
+    GenerateBatchPredictionRequest,
+    RiskGridRequest
 )
-from app.agents import PredictionAgent, VerificationAgent
+from app.agents import (
+    PredictionAgent,
+    VerificationAgent,
+    get_prediction_agent,
+    get_verification_agent
+)
+from app.ml.forecasting import water_level_forecaster
+from app.ml.grid import GridSpec, idw_interpolate
+from app.ml.history import historical_index, event_from_prediction
+from app.ml.risk_engine import risk_engine, RISK_LEVELS, FACTOR_NAMES
+from app.services.sensors import SENSOR_KINDS, sensor_store
+from app.services.weather import weather_provider
+import asyncio
+import hashlib
+import json
 import logging
+import time
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/predictions", tags=["predictions"])
 
+# Coalesces concurrent /generate requests for the same region
+prediction_flight = SingleFlight(name="prediction_generate")
+
+# Risk grids keyed by bbox, cell size and input version
+grid_cache = MemoryCache(
+    max_entries=settings.GRID_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.GRID_CACHE_TTL_SECONDS
+)
+grid_flight = SingleFlight(name="risk_grid")
+
 
 @router.get("/", response_model=List[dict])
 async def get_predictions(
@@ -64,7 +98,11 @@ async def get_prediction(prediction_id: int):
 
 
 @router.post("/generate", response_model=dict)
-async def generate_prediction(request: GeneratePredictionRequest):
+async def generate_prediction(
+    request: GeneratePredictionRequest,
+    prediction_agent: PredictionAgent = Depends(get_prediction_agent),
+    verification_agent: VerificationAgent = Depends(get_verification_agent)
+):
     """
     Generate new flood prediction using AI agents.
     
@@ -73,81 +111,146 @@ async def generate_prediction(request: GeneratePredictionRequest):
     2. Runs prediction through AI agent
     3. Verifies prediction with verification agent
     4. Stores verified prediction in database
+    
+    Concurrent requests for the same region and location are coalesced:
+    they share one pipeline run and receive the same saved row.
     """
     try:
-        logger.info(f"Generating prediction for region: {request.region}")
-        
-        # Prepare context for prediction agent
-        # In production, fetch real weather data from APIs
-        weather_context = {
-            'region': request.region,
-            'latitude': request.latitude,
-            'longitude': request.longitude,
-            'rainfall': await _fetch_rainfall_data(request.latitude, request.longitude),
-            'soil_saturation': await _fetch_soil_saturation(request.latitude, request.longitude),
-            'river_level': await _fetch_river_level(request.latitude, request.longitude),
-            'historical_data': []  # Would fetch from database
-        }
+        # Upstream calls share one latency budget; once it is spent the
+        # agents answer with their deterministic fallbacks
+        with latency_budget(settings.PREDICTION_LATENCY_BUDGET_SECONDS):
+            result, coalesced = await prediction_flight.do(
+                _coalescing_key(request),
+                lambda: _run_prediction_pipeline(request, prediction_agent, verification_agent)
+            )
+        return {**result, 'coalesced': coalesced}
         
-        # Step 1: Run Prediction Agent
-        prediction_agent = PredictionAgent()
-        prediction_result = await prediction_agent.execute(weather_context)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Prediction generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/batch", response_model=dict)
+async def generate_prediction_batch(
+    request: GenerateBatchPredictionRequest,
+    prediction_agent: PredictionAgent = Depends(get_prediction_agent),
+    verification_agent: VerificationAgent = Depends(get_verification_agent)
+):
+    """
+    Generate flood predictions for many regions in one sweep.
+    
+    LLM reasoning for the regions is requested in shared multi-region
+    prompts; each prediction is then verified and stored individually.
+    """
+    try:
+        with latency_budget(settings.PREDICTION_LATENCY_BUDGET_SECONDS):
+            contexts = await asyncio.gather(*(
+                _build_weather_context(region) for region in request.regions
+            ))
+            prediction_results = await prediction_agent.execute_batch(list(contexts))
+            verification_results = await asyncio.gather(*(
+                _verify_prediction(verification_agent, prediction_result)
+                for prediction_result in prediction_results
+            ))
         
-        logger.info(f"Prediction generated: {prediction_result['risk_level']} risk")
+        saved, rejected = [], []
+        for prediction_result, verification_result in zip(prediction_results, verification_results):
+            if _is_approved(verification_result):
+                saved.append(_save_prediction(prediction_result, verification_result))
+            else:
+                rejected.append({
+                    'region': prediction_result['region'],
+                    'detail': f"Prediction failed verification: {verification_result['reasoning']}"
+                })
         
-        # Step 2: Verify with Verification Agent
-        verification_agent = VerificationAgent()
-        verification_result = await verification_agent.execute({
-            'prediction': prediction_result,
-            'sensor_data': {},  # Would include real sensor data
-            'historical_patterns': []
-        })
+        logger.info(f"Batch prediction: {len(saved)} saved, {len(rejected)} rejected")
+        return {'predictions': saved, 'rejected': rejected}
         
-        logger.info(f"Verification: {verification_result['recommendation']}")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Batch prediction generation failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/generate/stream")
+async def generate_prediction_stream(
+    request: GeneratePredictionRequest,
+    prediction_agent: PredictionAgent = Depends(get_prediction_agent),
+    verification_agent: VerificationAgent = Depends(get_verification_agent)
+):
+    """
+    Generate a flood prediction, streaming each stage as server-sent events.
+    
+    Events, in order:
+    1. assessment - deterministic risk score and water level forecast
+    2. reasoning - LLM reasoning text chunks as they arrive
+    3. verification - verification verdict
+    4. saved (persisted row ID) or rejected
+    5. done
+    
+    An error event is sent instead if a stage fails.
+    """
+    return StreamingResponse(
+        _prediction_event_stream(request, prediction_agent, verification_agent),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@router.post("/grid", response_model=dict)
+async def get_risk_grid(request: RiskGridRequest):
+    """
+    Score a bounding box as a grid of cells.
+    
+    Each input is interpolated from the latest sensor readings in and
+    around the box (or, for inputs no sensor reports there, from the
+    weather providers at a few control points) and cells are scored with
+    the deterministic risk model - no LLM calls.
+    Grids are cached by bbox, cell size and input version, so repeated
+    views and pans back to a seen area are served from memory.
+    """
+    try:
+        if request.max_lat <= request.min_lat or request.max_lon <= request.min_lon:
+            raise HTTPException(status_code=400, detail="Bounding box max must exceed min")
         
-        # Step 3: Save if verified
-        if verification_result['is_verified'] and verification_result['recommendation'] == 'PROCEED':
-            supabase = get_service_client()
-            
-            # Prepare data for database
-            prediction_data = {
-                'region_name': prediction_result['region'],
-                'risk_level': prediction_result['risk_level'],
-                'probability': prediction_result['probability'],
-                'confidence': verification_result['confidence'],
-                'center_lat': prediction_result['center_lat'],
-                'center_lon': prediction_result['center_lon'],
-                'predicted_time': prediction_result['predicted_time'].isoformat(),
-                'affected_population': prediction_result['affected_population'],
-                'water_level_forecast': prediction_result['water_level_forecast'],
-                'rainfall_intensity': prediction_result['rainfall_intensity'],
-                'soil_saturation': prediction_result['soil_saturation'],
-                'river_level': prediction_result.get('river_level'),
-                'ai_reasoning': prediction_result['ai_reasoning'],
-                'created_at': datetime.utcnow().isoformat(),
-                'expires_at': (datetime.utcnow() + timedelta(days=1)).isoformat()
-            }
-            
-            result = supabase.table('flood_predictions').insert(prediction_data).execute()
-            
-            if result.data:
-                logger.info(f"Prediction saved with ID: {result.data[0]['id']}")
-                return {
-                    **result.data[0],
-                    'verification': verification_result
-                }
-            else:
-                raise HTTPException(status_code=500, detail="Failed to save prediction")
-        else:
+        spec = GridSpec(
+            request.min_lat, request.min_lon,
+            request.max_lat, request.max_lon,
+            request.cell_size_km
+        )
+        if spec.size > settings.GRID_MAX_CELLS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Prediction failed verification: {verification_result['reasoning']}"
+                detail=f"Grid has {spec.size} cells (max {settings.GRID_MAX_CELLS}); use a larger cell size"
             )
-            
+        
+        # Sensor inputs are cheap to read; provider inputs are only fetched
+        # on a cache miss, keyed by their input window
+        inputs = _grid_sensor_inputs(spec)
+        missing = [kind for kind in SENSOR_KINDS if kind not in inputs]
+        version = _grid_input_version(missing)
+        key = _grid_cache_key(request, version)
+        
+        cached = grid_cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+        
+        async def compute() -> dict:
+            grid_inputs = {**inputs, **await _grid_provider_inputs(spec, missing)}
+            grid = await asyncio.to_thread(_score_grid, spec, grid_inputs, version, request.include_forecast)
+            grid_cache.set(key, grid)
+            return grid
+        
+        grid, coalesced = await grid_flight.do(key, compute)
+        return {**grid, 'cached': coalesced}
+        
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Prediction generation failed: {str(e)}")
+        logger.error(f"Risk grid computation failed: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -171,22 +274,381 @@ async def get_predictions_by_region(region_name: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _coalescing_key(request: GeneratePredictionRequest) -> tuple:
+    """Key identifying prediction requests that can share one pipeline run."""
+    precision = settings.PREDICTION_COALESCE_PRECISION
+    return (
+        request.region.strip().lower(),
+        round(request.latitude, precision),
+        round(request.longitude, precision)
+    )
+
+
+async def _run_prediction_pipeline(
+    request: GeneratePredictionRequest,
+    prediction_agent: PredictionAgent,
+    verification_agent: VerificationAgent
+) -> dict:
+    """Run the Zynd -> LLM -> verification -> insert pipeline for one request."""
+    logger.info(f"Generating prediction for region: {request.region}")
+    
+    lat, lon = request.latitude, request.longitude
+    graph = (
+        StageGraph("prediction_pipeline")
+        # Sensor inputs are independent of each other
+        .add('rainfall', lambda r: _fetch_rainfall_data(lat, lon))
+        .add('soil_saturation', lambda r: _fetch_soil_saturation(lat, lon))
+        .add('river_level', lambda r: _fetch_river_level(lat, lon))
+        .add(
+            'context',
+            lambda r: _weather_context(request, r),
+            depends_on=('rainfall', 'soil_saturation', 'river_level')
+        )
+        # Step 1: ZYND analysis, risk score and deterministic forecast
+        .add(
+            'assessment',
+            lambda r: prediction_agent.assess(r['context']),
+            depends_on=('context',)
+        )
+        # Step 2: LLM reasoning and verification run side by side - the
+        # verification checks only use the deterministic fields
+        .add(
+            'reasoning',
+            lambda r: prediction_agent.reason(r['context'], r['assessment']),
+            depends_on=('context', 'assessment')
+        )
+        .add(
+            'verification',
+            lambda r: _verify_prediction(verification_agent, r['assessment']),
+            depends_on=('assessment',)
+        )
+    )
+    results, timings = await graph.run()
+    logger.info(f"Prediction pipeline stage timings (ms): {timings}")
+    
+    assessment = results['assessment']
+    prediction_result = {
+        **assessment,
+        'ai_reasoning': {**assessment['ai_reasoning'], 'llm_analysis': results['reasoning']}
+    }
+    verification_result = results['verification']
+    
+    logger.info(f"Prediction generated: {prediction_result['risk_level']} risk")
+    
+    # Step 3: Save if verified
+    if _is_approved(verification_result):
+        saved = _save_prediction(prediction_result, verification_result)
+        return {**saved, 'stage_timings_ms': timings}
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Prediction failed verification: {verification_result['reasoning']}"
+        )
+
+
+async def _prediction_event_stream(
+    request: GeneratePredictionRequest,
+    prediction_agent: PredictionAgent,
+    verification_agent: VerificationAgent
+) -> AsyncIterator[str]:
+    """Run the prediction pipeline, emitting each stage as a server-sent event."""
+    verification_task = None
+    try:
+        with latency_budget(settings.PREDICTION_LATENCY_BUDGET_SECONDS):
+            weather_context = await _build_weather_context(request)
+            
+            # Steps 1-2: deterministic assessment, then LLM reasoning chunks.
+            # Verification starts as soon as the assessment is available.
+            prediction_result = None
+            async for event in prediction_agent.stream(weather_context):
+                if event['event'] == 'prediction':
+                    prediction_result = event['data']
+                    continue
+                
+                if event['event'] == 'assessment':
+                    verification_task = asyncio.ensure_future(
+                        _verify_prediction(verification_agent, event['data'])
+                    )
+                yield _sse_event(event['event'], event['data'])
+            
+            # Step 3: verification verdict
+            verification_result = await verification_task
+        
+        yield _sse_event('verification', verification_result)
+        
+        # Step 4: persisted row ID
+        if _is_approved(verification_result):
+            saved = _save_prediction(prediction_result, verification_result)
+            yield _sse_event('saved', {'id': saved['id']})
+        else:
+            yield _sse_event('rejected', {
+                'detail': f"Prediction failed verification: {verification_result['reasoning']}"
+            })
+    except HTTPException as e:
+        yield _sse_event('error', {'detail': e.detail})
+    except Exception as e:
+        logger.error(f"Streaming prediction failed: {str(e)}")
+        yield _sse_event('error', {'detail': str(e)})
+    finally:
+        if verification_task is not None and not verification_task.done():
+            verification_task.cancel()
+    
+    yield _sse_event('done', {})
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def _build_weather_context(request: GeneratePredictionRequest) -> dict:
+    """Gather the prediction agent's input context for a request."""
+    rainfall, soil_saturation, river_level = await asyncio.gather(
+        _fetch_rainfall_data(request.latitude, request.longitude),
+        _fetch_soil_saturation(request.latitude, request.longitude),
+        _fetch_river_level(request.latitude, request.longitude)
+    )
+    return _weather_context(request, {
+        'rainfall': rainfall,
+        'soil_saturation': soil_saturation,
+        'river_level': river_level
+    })
+
+
+def _weather_context(request: GeneratePredictionRequest, readings: dict) -> dict:
+    """Build the prediction agent's input context from fetched readings."""
+    # In production, fetch real weather data from APIs. These readings may
+    # be modelled or mocked, so they never feed the gauge filters; the
+    # agent adds the river_state of nearby real gauges.
+    return {
+        'region': request.region,
+        'latitude': request.latitude,
+        'longitude': request.longitude,
+        'area_type': request.area_type,
+        'rainfall': readings['rainfall'],
+        'soil_saturation': readings['soil_saturation'],
+        'river_level': readings['river_level'],
+        'historical_data': []  # Filled from the historical event index by the agent
+    }
+
+
+async def _verify_prediction(
+    verification_agent: VerificationAgent,
+    prediction_result: dict
+) -> dict:
+    """Run the verification agent on a prediction."""
+    verification_result = await verification_agent.execute({
+        'prediction': prediction_result,
+        'sensor_data': {},  # Filled from the live sensor buffers by the agent
+        'historical_patterns': []
+    })
+    
+    logger.info(f"Verification: {verification_result['recommendation']}")
+    return verification_result
+
+
+def _is_approved(verification_result: dict) -> bool:
+    """Whether a verified prediction should be saved."""
+    return verification_result['is_verified'] and verification_result['recommendation'] == 'PROCEED'
+
+
+def _save_prediction(prediction_result: dict, verification_result: dict) -> dict:
+    """Insert a verified prediction and return the saved row."""
+    supabase = get_service_client()
+    
+    # Prepare data for database
+    prediction_data = {
+        'region_name': prediction_result['region'],
+        'risk_level': prediction_result['risk_level'],
+        'probability': prediction_result['probability'],
+        'confidence': verification_result['confidence'],
+        'center_lat': prediction_result['center_lat'],
+        'center_lon': prediction_result['center_lon'],
+        'predicted_time': prediction_result['predicted_time'].isoformat(),
+        'affected_population': prediction_result['affected_population'],
+        'water_level_forecast': prediction_result['water_level_forecast'],
+        'rainfall_intensity': prediction_result['rainfall_intensity'],
+        'soil_saturation': prediction_result['soil_saturation'],
+        'river_level': prediction_result.get('river_level'),
+        'ai_reasoning': prediction_result['ai_reasoning'],
+        'created_at': datetime.utcnow().isoformat(),
+        'expires_at': (datetime.utcnow() + timedelta(days=1)).isoformat()
+    }
+    
+    result = supabase.table('flood_predictions').insert(prediction_data).execute()
+    
+    if result.data:
+        logger.info(f"Prediction saved with ID: {result.data[0]['id']}")
+        historical_index.add(event_from_prediction(result.data[0]))
+        return {
+            **result.data[0],
+            'verification': verification_result
+        }
+    else:
+        raise HTTPException(status_code=500, detail="Failed to save prediction")
+
+
+def _grid_cache_key(request: RiskGridRequest, input_version: str) -> str:
+    """Hash of the grid request and the version of its inputs."""
+    payload = json.dumps([
+        round(request.min_lat, 5), round(request.min_lon, 5),
+        round(request.max_lat, 5), round(request.max_lon, 5),
+        round(request.cell_size_km, 4),
+        request.include_forecast,
+        input_version
+    ])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _grid_sensor_inputs(spec: GridSpec) -> Dict[str, Dict[str, Any]]:
+    """
+    Latest sensor readings inside the bbox padded by half its size.
+    
+    Returns:
+        Per input kind with fresh sensors: station lat/lon/value arrays
+        (at most GRID_MAX_STATIONS, the most recent) and the source
+    """
+    pad_lat = (spec.max_lat - spec.min_lat) / 2
+    pad_lon = (spec.max_lon - spec.min_lon) / 2
+    
+    inputs = {}
+    for kind in SENSOR_KINDS:
+        lat, lon, values, timestamps = sensor_store.latest_in_box(
+            kind,
+            spec.min_lat - pad_lat, spec.min_lon - pad_lon,
+            spec.max_lat + pad_lat, spec.max_lon + pad_lon
+        )
+        if not len(values):
+            continue
+        keep = np.argsort(-timestamps, kind='stable')[:settings.GRID_MAX_STATIONS]
+        inputs[kind] = {'lat': lat[keep], 'lon': lon[keep], 'values': values[keep], 'source': 'sensors'}
+    return inputs
+
+
+def _grid_input_version(provider_kinds: List[str]) -> str:
+    """
+    Sensor inputs change when readings are ingested; provider readings
+    change over time, so they are versioned per input window.
+    """
+    version = f"sensors-{sensor_store.ingested}"
+    if provider_kinds:
+        window = int(time.time() // settings.GRID_INPUT_TTL_SECONDS)
+        version += f":providers-{window}-{'+'.join(provider_kinds)}"
+    return version
+
+
+async def _grid_provider_inputs(spec: GridSpec, kinds: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Weather provider readings of `kinds` on a small lattice of control points."""
+    if not kinds:
+        return {}
+    
+    samples = max(settings.GRID_PROVIDER_SAMPLES, 1)
+    lat_points = np.linspace(spec.min_lat, spec.max_lat, samples)
+    lon_points = np.linspace(spec.min_lon, spec.max_lon, samples)
+    lat, lon = (a.ravel() for a in np.meshgrid(lat_points, lon_points, indexing='ij'))
+    
+    fetchers = {
+        'rainfall': _fetch_rainfall_data,
+        'soil_saturation': _fetch_soil_saturation,
+        'river_level': _fetch_river_level
+    }
+    readings = await asyncio.gather(*[
+        asyncio.gather(*[fetchers[kind](float(a), float(b)) for kind in kinds])
+        for a, b in zip(lat, lon)
+    ])
+    values = np.array(readings, dtype=np.float64)
+    return {
+        kind: {'lat': lat, 'lon': lon, 'values': values[:, i], 'source': 'providers'}
+        for i, kind in enumerate(kinds)
+    }
+
+
+def _score_grid(
+    spec: GridSpec,
+    inputs: Dict[str, Dict[str, Any]],
+    version: str,
+    include_forecast: bool = False
+) -> dict:
+    """Interpolate each input onto every cell and score (and forecast) them in one batch."""
+    lat, lon = spec.centers()
+    cells = np.column_stack([
+        idw_interpolate(
+            lat, lon,
+            inputs[kind]['lat'], inputs[kind]['lon'], inputs[kind]['values'],
+            power=settings.GRID_IDW_POWER
+        )[:, 0]
+        for kind in SENSOR_KINDS
+    ])
+    batch = risk_engine.score(
+        rainfall=cells[:, 0],
+        saturation=np.clip(cells[:, 1], 0.0, 1.0),
+        river_level=cells[:, 2]
+    )
+    level_counts = np.bincount(batch.level, minlength=len(RISK_LEVELS))
+    
+    grid = {
+        'grid': spec.metadata(),
+        'input_source': {kind: inputs[kind]['source'] for kind in SENSOR_KINDS},
+        'input_points': {kind: len(inputs[kind]['values']) for kind in SENSOR_KINDS},
+        'input_version': version,
+        'levels': list(RISK_LEVELS),
+        'factor_flags': {name: flag for flag, name in FACTOR_NAMES.items()},
+        'risk_score': np.round(batch.score, 3).tolist(),
+        'risk_level': batch.level.tolist(),
+        'risk_factors': batch.factors.tolist(),
+        'summary': {
+            'cells': len(batch),
+            'max_risk_score': round(float(batch.score.max()), 3),
+            'mean_risk_score': round(float(batch.score.mean()), 3),
+            'cells_by_level': dict(zip(RISK_LEVELS, level_counts.tolist()))
+        },
+        'generated_at': datetime.utcnow().isoformat()
+    }
+    
+    if include_forecast:
+        levels = water_level_forecaster.forecast(batch.river_level, batch.rainfall, batch.score)
+        grid['forecast'] = water_level_forecaster.describe()
+        grid['peak_water_level'] = np.round(levels.max(axis=1), 2).tolist()
+        grid['peak_step'] = levels.argmax(axis=1).tolist()
+    
+    return grid
+
+
 # Helper functions for fetching weather data
+# Live sensor readings are used when sensors near the location report,
+# then the weather provider (cached per geohash cell); otherwise the
+# values are mocked.
+async def _live_reading(kind: str, lat: float, lon: float) -> Optional[float]:
+    """Nearby sensor mean, else the provider's reading for the cell."""
+    value = sensor_store.value_near(kind, lat, lon)
+    if value is not None:
+        return value
+    return await weather_provider.reading(kind, lat, lon)
+
+
 async def _fetch_rainfall_data(lat: float, lon: float) -> float:
-    """Fetch rainfall data from weather API (mock for now)."""
-    # In production, integrate with OpenWeatherMap, NOAA, etc.
+    """Fetch rainfall data from sensors or the weather provider (mock as a last resort)."""
+    value = await _live_reading('rainfall', lat, lon)
+    if value is not None:
+        return round(value, 1)
     # For demo, return realistic mock data
     import random
     return round(random.uniform(10, 80), 1)
 
 
 async def _fetch_soil_saturation(lat: float, lon: float) -> float:
-    """Fetch soil saturation data (mock for now)."""
+    """Fetch soil saturation data from sensors or the weather provider (mock as a last resort)."""
+    value = await _live_reading('soil_saturation', lat, lon)
+    if value is not None:
+        return round(value, 2)
     import random
     return round(random.uniform(0.4, 0.95), 2)
 
 
 async def _fetch_river_level(lat: float, lon: float) -> float:
-    """Fetch river level data (mock for now)."""
+    """Fetch river level data from gauges or the weather provider (mock as a last resort)."""
+    value = await _live_reading('river_level', lat, lon)
+    if value is not None:
+        return round(value, 2)
     import random
     return round(random.uniform(3.0, 9.0), 1)
@@ -0,0 +1,202 @@
+"""Sensor ingestion API endpoints."""
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional, Tuple
+from app.config import settings
+from app.services.sensors import sensor_store, SENSOR_KINDS
+from app.services.timeseries import timeseries_store, RESOLUTIONS
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/sensors", tags=["sensors"])
+
+# Largest search radius accepted by /nearby
+MAX_NEARBY_RADIUS_KM = 100
+
+# History window when no start is given
+DEFAULT_HISTORY_SECONDS = 7 * 86400
+
+
+@router.post("/readings", response_model=dict)
+async def ingest_readings(request: Request):
+    """
+    Bulk-ingest sensor readings.
+    
+    The body is NDJSON (one reading object per line) or, with a text/csv
+    content type, CSV with a header row. Fields: sensor_id, kind
+    (rainfall | soil_saturation | river_level), value, timestamp (optional)
+    and latitude/longitude (required for a sensor's first reading).
+    """
+    body = await _read_body(request, settings.SENSOR_MAX_BODY_BYTES)
+    
+    content_type = request.headers.get('content-type', '')
+    fmt = "csv" if "csv" in content_type else "ndjson"
+    
+    try:
+        text = body.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Body must be UTF-8")
+    
+    try:
+        # Parsing a large batch would otherwise block the event loop
+        result = await asyncio.to_thread(sensor_store.ingest_text, text, fmt)
+        return {**result, 'format': fmt}
+        
+    except Exception as e:
+        logger.error(f"Failed to ingest sensor readings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/", response_model=dict)
+async def list_sensors(kind: Optional[str] = None, limit: int = 100):
+    """Latest state of reporting sensors, optionally filtered by kind."""
+    if kind and kind not in SENSOR_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sensor kind: {kind}")
+    
+    sensors = sensor_store.summaries(kind, limit=min(max(limit, 1), 1000))
+    return {
+        'sensors': sensors,
+        'count': len(sensors)
+    }
+
+
+@router.get("/nearby", response_model=dict)
+async def get_nearby_sensors(
+    kind: str,
+    latitude: float,
+    longitude: float,
+    radius_km: Optional[float] = None
+):
+    """Sensors of a kind reporting near a location, nearest first."""
+    if kind not in SENSOR_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sensor kind: {kind}")
+    if radius_km is not None and not 0 < radius_km <= MAX_NEARBY_RADIUS_KM:
+        raise HTTPException(status_code=400, detail=f"radius_km must be in (0, {MAX_NEARBY_RADIUS_KM}]")
+    
+    sensors = sensor_store.nearby(kind, latitude, longitude, radius_km)
+    return {
+        'sensors': [sensor.summary() for sensor in sensors],
+        'count': len(sensors)
+    }
+
+
+@router.get("/history", response_model=dict)
+async def get_kind_history(
+    kind: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    resolution: str = '1h'
+):
+    """
+    Rolled-up history of every sensor of a kind (defaults to the last 7 days).
+    
+    start/end are epoch seconds; resolution is 1m, 15m or 1h.
+    """
+    if kind not in SENSOR_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sensor kind: {kind}")
+    start, end = _history_range(start, end, resolution)
+    
+    try:
+        return await asyncio.to_thread(timeseries_store.rollup, kind, start, end, resolution)
+        
+    except Exception as e:
+        logger.error(f"Failed to read sensor history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{sensor_id}/history", response_model=dict)
+async def get_sensor_history(
+    sensor_id: str,
+    kind: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    resolution: str = '1h'
+):
+    """
+    One sensor's history: rollups, or its raw readings with resolution=raw
+    (defaults to the last 7 days).
+    
+    Works for sensors that have not reported since a restart; their kind is
+    read from the stored history unless given.
+    """
+    if kind is not None and kind not in SENSOR_KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sensor kind: {kind}")
+    start, end = _history_range(start, end, resolution)
+    
+    try:
+        if kind is None:
+            sensor = sensor_store.get(sensor_id)
+            kind = sensor.kind if sensor else await asyncio.to_thread(timeseries_store.sensor_kind, sensor_id)
+        if kind is None:
+            raise HTTPException(status_code=404, detail="Sensor not found")
+        
+        if resolution == 'raw':
+            timestamps, values = await asyncio.to_thread(
+                timeseries_store.raw, kind, sensor_id, start, end
+            )
+            return {
+                'resolution': 'raw',
+                'kind': kind,
+                'timestamps': timestamps.tolist(),
+                'values': values.tolist()
+            }
+        result = await asyncio.to_thread(
+            timeseries_store.rollup, kind, start, end, resolution, [sensor_id]
+        )
+        return {**result, 'kind': kind}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to read sensor history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{sensor_id}", response_model=dict)
+async def get_sensor(sensor_id: str, include_window: bool = False):
+    """A sensor's latest reading and rolling mean, optionally with its buffered window."""
+    sensor = sensor_store.get(sensor_id)
+    if sensor is None:
+        raise HTTPException(status_code=404, detail="Sensor not found")
+    
+    result = sensor.summary()
+    if include_window:
+        times, values = sensor.buffer.window()
+        result['window'] = {'timestamps': times.tolist(), 'values': values.tolist()}
+    return result
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """Request body, or 413 as soon as it exceeds `limit` bytes (never buffered past it)."""
+    declared = request.headers.get('content-length')
+    if declared and declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _history_range(start: Optional[float], end: Optional[float], resolution: str) -> Tuple[float, float]:
+    """Validated [start, end) for a history query."""
+    if not timeseries_store.enabled:
+        raise HTTPException(status_code=503, detail="Sensor history is not enabled")
+    if resolution != 'raw' and resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown resolution: {resolution}")
+    
+    end = time.time() if end is None else end
+    start = end - DEFAULT_HISTORY_SECONDS if start is None else start
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    seconds = RESOLUTIONS.get(resolution, RESOLUTIONS['1m'])
+    if (end - start) / seconds > settings.TIMESERIES_MAX_BINS:
+        raise HTTPException(status_code=400, detail="Range too large for this resolution")
+    return start, end
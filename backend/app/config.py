@@ -19,19 +19,160 @@ class Settings(BaseSettings):
     
     # AI Configuration - Using Google Gemini
     GEMINI_API_KEY: str
+    GEMINI_MODEL: str = "gemini-pro"
+    
+    # Model backend: live | record | replay | synthetic (offline load tests)
+    MODEL_BACKEND: str = "live"
+    MODEL_RECORDING_PATH: str = "./model_recordings.jsonl"
+    MODEL_LATENCY: str = "recorded"  # recorded | none | fixed:S | uniform:A,B | normal:M,SD | lognormal:MEDIAN,SIGMA
+    MODEL_BACKEND_SEED: int = 0
+    
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_SECONDS: int = 900
+    LLM_CACHE_MAX_ENTRIES: int = 1024
+    LLM_CACHE_SQLITE_PATH: str = ""  # Empty = memory tier only
+    
+    # LLM Scheduler (0 = unlimited rate)
+    LLM_MAX_IN_FLIGHT: int = 4
+    LLM_REQUESTS_PER_MINUTE: int = 60
+    LLM_TOKENS_PER_MINUTE: int = 32000
+    
+    # Latency budgets and circuit breakers (Gemini, P3AI)
+    LLM_CALL_TIMEOUT_SECONDS: float = 20.0
+    P3AI_CALL_TIMEOUT_SECONDS: float = 5.0
+    PREDICTION_LATENCY_BUDGET_SECONDS: float = 30.0
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_SLOW_CALL_SECONDS: float = 10.0
+    BREAKER_SLOW_CALL_RATE: float = 0.8
+    BREAKER_WINDOW_SIZE: int = 20
+    BREAKER_MIN_CALLS: int = 5
+    BREAKER_OPEN_SECONDS: float = 30.0
+    
+    # Concurrent /generate requests are coalesced on region + lat/lon
+    # rounded to this many decimal places (3 = ~110m)
+    PREDICTION_COALESCE_PRECISION: int = 3
+    
+    # Prediction reasoning reuse (opt-in): inputs are bucketed into bins and
+    # the LLM narrative + ZYND analysis is reused within the freshness window
+    PREDICTION_REUSE_ENABLED: bool = False
+    PREDICTION_REUSE_TTL_SECONDS: int = 600
+    PREDICTION_REUSE_MAX_ENTRIES: int = 4096
+    PREDICTION_REUSE_RAINFALL_BIN: float = 5.0  # mm/h
+    PREDICTION_REUSE_SATURATION_BIN: float = 0.05
+    PREDICTION_REUSE_RIVER_BIN: float = 0.25  # meters
+    PREDICTION_REUSE_CELL_DEGREES: float = 0.05  # ~5km region cell
+    
+    # Multi-region sweeps: regions packed into a single LLM prompt
+    PREDICTION_BATCH_MAX_REGIONS: int = 10
+    PREDICTION_BATCH_TOKENS_PER_REGION: int = 400  # output budget per region
+    
+    # Prompt compaction (per-call context budget, ~4 characters per token)
+    PROMPT_TOKEN_BUDGET: int = 1200
+    PROMPT_MAX_LIST_ITEMS: int = 5  # longer lists keep their most relevant items
+    PROMPT_FLOAT_DECIMALS: int = 2
+    PROMPT_MAX_TEXT_CHARS: int = 600
+    
+    # Tiered inference: clear-cut cases get templated explanations, not Gemini
+    TIERING_ENABLED: bool = True
+    TIERING_VERIFICATION_CONFIDENCE: float = 0.9  # all required checks pass at/above this
+    TIERING_PREDICTION_MAX_RISK: float = 0.3  # input-only risk score at/below this
+    
+    # Water level forecasts (default: 24 hourly levels)
+    FORECAST_HORIZON_HOURS: float = 24
+    FORECAST_STEP_MINUTES: float = 60
+    FORECAST_PEAK_HOURS: float = 6  # river peak after heavy rain starts
+    FORECAST_SIGMA_HOURS: float = 3  # spread of the rise and fall
+    
+    # Monte Carlo uncertainty bands (per-sensor error models)
+    ENSEMBLE_ENABLED: bool = True
+    ENSEMBLE_DRAWS: int = 2000
+    ENSEMBLE_TIME_BUDGET_MS: float = 5.0  # stop drawing once spent (at least one chunk runs)
+    ENSEMBLE_RAINFALL_ERROR: float = 0.2  # relative std of rainfall readings
+    ENSEMBLE_SATURATION_ERROR: float = 0.05  # absolute std (fraction)
+    ENSEMBLE_RIVER_ERROR: float = 0.1  # absolute std (m)
+    
+    # River gauge state (Kalman filter per gauge; level in m, rate in m/h)
+    GAUGE_CELL_DEGREES: float = 0.01  # virtual gauge cell for readings without a gauge id
+    GAUGE_MAX_TRACKED: int = 10000
+    GAUGE_FORECAST_HOURS: float = 6
+    GAUGE_MEASUREMENT_STD: float = 0.05
+    GAUGE_ACCEL_STD: float = 0.1  # how quickly the rate of rise may change
+    GAUGE_INITIAL_RATE_STD: float = 0.5
+    
+    # Historical event index (k most similar past floods)
+    HISTORY_SEED_PATH: str = ""  # optional JSON / JSON-lines file of past events
+    HISTORY_NEIGHBOURS: int = 5
+    HISTORY_MAX_DISTANCE: float = 3.0  # scaled feature distance still counted as similar
+    HISTORY_MAX_EVENTS: int = 500000
+    HISTORY_REBUILD_THRESHOLD: int = 1024  # new events buffered before the tree is rebuilt
+    
+    # Population raster: .npy of people per cell + .json sidecar (north, west, cell_degrees)
+    POPULATION_RASTER_PATH: str = ""  # empty = density heuristic only
+    POPULATION_SAT_PATH: str = ""  # summed-area table; default <raster>.sat.npy
+    POPULATION_DEFAULT_AREA_TYPE: str = "suburban"  # density class when a request gives none
+    
+    # Trained risk model: <path>/<version>/model.joblib + meta.json (train_risk_model.py)
+    RISK_MODEL_PATH: str = ""  # empty = built-in weighted formula
+    RISK_MODEL_VERSION: str = "latest"  # version directory, or latest by name
+    
+    # Live sensor ingestion (POST /api/sensors/readings)
+    SENSOR_BUFFER_SIZE: int = 720  # readings kept in memory per sensor
+    SENSOR_MAX_SENSORS: int = 50000
+    SENSOR_CELL_DEGREES: float = 0.05  # spatial index cell
+    SENSOR_RADIUS_KM: float = 10.0  # sensors counted as "near" a location
+    SENSOR_MAX_AGE_SECONDS: int = 3600  # older last readings are ignored
+    SENSOR_FLUSH_INTERVAL_SECONDS: float = 30.0
+    SENSOR_FLUSH_BATCH_SIZE: int = 1000
+    SENSOR_MAX_PENDING: int = 200000  # unflushed readings kept before the oldest are dropped
+    SENSOR_MAX_BODY_BYTES: int = 20000000
+    
+    # Local sensor history: columnar day/sensor partitions with 1m/15m/1h rollups
+    TIMESERIES_PATH: str = "./timeseries"  # empty = no local history
+    SENSOR_HISTORY_HOURS: float = 24  # window summarized for the prediction agent
+    TIMESERIES_MAX_BINS: int = 50000  # largest rollup range served by the API
+    
+    # City risk grids (deterministic scoring, no LLM per cell)
+    GRID_MAX_CELLS: int = 40000
+    GRID_CACHE_TTL_SECONDS: int = 600
+    GRID_CACHE_MAX_ENTRIES: int = 256
+    GRID_INPUT_TTL_SECONDS: int = 300  # provider readings reused for this long
+    GRID_MAX_STATIONS: int = 500  # most recent sensors per input
+    GRID_IDW_POWER: float = 2.0
+    GRID_PROVIDER_SAMPLES: int = 3  # provider readings per bbox side for inputs without sensors
     
     # ZYND AI Configuration (P3 AI Network)
     ZYND_AI_SEED: str = ""
     ZYND_IDENTITY_CREDENTIAL_PATH: str = "./identity_credential.json"
     ZYND_REGISTRY_URL: str = "https://registry.p3ai.network"
     ZYND_MQTT_BROKER: str = "mqtt://registry.p3ai.network:1883"
+    P3AI_EXECUTOR_WORKERS: int = 4  # threads for the blocking P3AI SDK calls
+    P3AI_DISCOVERY_TTL_SECONDS: float = 300  # cached agent search results
     
     # Weather APIs (Optional)
-    OPENWEATHER_API_KEY: str = ""
+    OPENWEATHER_API_KEY: str = ""  # empty = no provider calls
+    WEATHER_API_URL: str = "https://api.openweathermap.org/data/2.5/weather"
+    WEATHER_GEOHASH_PRECISION: int = 5  # ~4.9 km cells share one upstream reading
+    WEATHER_REFRESH_SECONDS: int = 600  # provider update interval (cache bucket)
+    WEATHER_TIMEOUT_SECONDS: float = 5.0
+    WEATHER_MAX_CONNECTIONS: int = 100
+    WEATHER_MAX_KEEPALIVE: int = 20
+    WEATHER_HTTP2: bool = True  # needs the h2 package (httpx[http2])
+    WEATHER_CACHE_MAX_ENTRIES: int = 50000
     
     # Redis (Optional - only if using background tasks)
     REDIS_URL: str = "redis://localhost:6379"
     
+    # Background job queue (incident coordination etc.)
+    JOB_QUEUE_BACKEND: str = "sqlite"  # sqlite | redis (uses REDIS_URL)
+    JOB_QUEUE_SQLITE_PATH: str = "./jobs.sqlite"
+    JOB_WORKERS: int = 2
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 2.0  # doubled after each failed attempt
+    JOB_RETRY_MAX_SECONDS: float = 300.0
+    JOB_TIMEOUT_SECONDS: float = 120.0
+    JOB_POLL_SECONDS: float = 1.0
+    
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
     
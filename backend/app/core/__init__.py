@@ -0,0 +1,65 @@
+"""Shared runtime infrastructure (caching, concurrency, resilience)."""
+from app.core.cache import (
+    CacheBackend,
+    MemoryCache,
+    SQLiteCache,
+    LLMCache,
+    llm_cache
+)
+from app.core.scheduler import (
+    LLMScheduler,
+    TokenBucket,
+    llm_scheduler,
+    severity_to_priority,
+    estimate_tokens,
+    PRIORITY_CRITICAL,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW
+)
+from app.core.singleflight import SingleFlight
+from app.core.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    UPSTREAM_UNAVAILABLE_ERRORS,
+    breakers,
+    gemini_breaker,
+    p3ai_breaker,
+    weather_breaker,
+    latency_budget,
+    remaining_budget,
+    call_timeout,
+    within_budget
+)
+from app.core.stage_graph import Stage, StageGraph
+
+__all__ = [
+    "CacheBackend",
+    "MemoryCache",
+    "SQLiteCache",
+    "LLMCache",
+    "llm_cache",
+    "LLMScheduler",
+    "TokenBucket",
+    "llm_scheduler",
+    "severity_to_priority",
+    "estimate_tokens",
+    "PRIORITY_CRITICAL",
+    "PRIORITY_HIGH",
+    "PRIORITY_NORMAL",
+    "PRIORITY_LOW",
+    "SingleFlight",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "UPSTREAM_UNAVAILABLE_ERRORS",
+    "breakers",
+    "gemini_breaker",
+    "p3ai_breaker",
+    "weather_breaker",
+    "latency_budget",
+    "remaining_budget",
+    "call_timeout",
+    "within_budget",
+    "Stage",
+    "StageGraph",
+]
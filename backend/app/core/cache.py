@@ -0,0 +1,304 @@
+"""Tiered, content-addressed cache for LLM responses."""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """Base class for a single cache tier."""
+    
+    name: str = "cache"
+    
+    # Tiers doing disk or network I/O are called from a worker thread by
+    # LLMCache.aget()/aset()
+    blocking: bool = False
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or expiry."""
+        pass
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value under key."""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every entry."""
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with per-entry TTL."""
+    
+    name = "memory"
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """On-disk cache tier that survives restarts. Values are stored as JSON."""
+    
+    name = "sqlite"
+    blocking = True
+    
+    def __init__(self, path: str, ttl_seconds: float = 900):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            logger.info(f"SQLite LLM cache opened: {self.path}")
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            value, expires_at = row
+            if expires_at < time.time():
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.conn.commit()
+                return None
+            
+            return json.loads(value)
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time() + ttl)
+            )
+            self.conn.commit()
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM llm_cache")
+            self.conn.commit()
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows and return how many were removed."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)
+            )
+            self.conn.commit()
+            return cursor.rowcount
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+async def _call_tier(tier: CacheBackend, method: Any, *args: Any) -> Any:
+    if tier.blocking:
+        return await asyncio.to_thread(method, *args)
+    return method(*args)
+
+
+class LLMCache:
+    """
+    Look up LLM responses across cache tiers, fastest first.
+    
+    A hit in a slower tier is promoted into every faster tier.
+    """
+    
+    def __init__(self, tiers: List[CacheBackend]):
+        self.tiers = tiers
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits: Dict[str, int] = {tier.name: 0 for tier in tiers}
+    
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        prompt: str,
+        max_output_tokens: Optional[int] = None
+    ) -> str:
+        """Build a content-addressed key from the request parameters."""
+        payload = json.dumps(
+            {
+                'model': model,
+                'temperature': round(temperature, 4),
+                'max_output_tokens': max_output_tokens,
+                'prompt': prompt
+            },
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value from the first tier that has it."""
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except Exception as e:
+                logger.error(f"LLM cache tier {tier.name} read failed: {str(e)}")
+                continue
+            
+            if value is not None:
+                self.hits += 1
+                self.tier_hits[tier.name] += 1
+                for faster_tier in self.tiers[:index]:
+                    try:
+                        faster_tier.set(key, value)
+                    except Exception as e:
+                        logger.error(f"LLM cache tier {faster_tier.name} write failed: {str(e)}")
+                return value
+        
+        self.misses += 1
+        return None
+    
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value in every tier."""
+        for tier in self.tiers:
+            try:
+                tier.set(key, value, ttl_seconds)
+            except Exception as e:
+                logger.error(f"LLM cache tier {tier.name} write failed: {str(e)}")
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for the event loop: blocking tiers are read in a worker thread."""
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = await _call_tier(tier, tier.get, key)
+            except Exception as e:
+                logger.error(f"LLM cache tier {tier.name} read failed: {str(e)}")
+                continue
+            
+            if value is not None:
+                self.hits += 1
+                self.tier_hits[tier.name] += 1
+                for faster_tier in self.tiers[:index]:
+                    try:
+                        await _call_tier(faster_tier, faster_tier.set, key, value)
+                    except Exception as e:
+                        logger.error(f"LLM cache tier {faster_tier.name} write failed: {str(e)}")
+                return value
+        
+        self.misses += 1
+        return None
+    
+    async def aset(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """set() for the event loop: blocking tiers are written in a worker thread."""
+        for tier in self.tiers:
+            try:
+                await _call_tier(tier, tier.set, key, value, ttl_seconds)
+            except Exception as e:
+                logger.error(f"LLM cache tier {tier.name} write failed: {str(e)}")
+    
+    def clear(self) -> None:
+        """Clear every tier and reset counters."""
+        for tier in self.tiers:
+            tier.clear()
+        self.hits = 0
+        self.misses = 0
+        self.tier_hits = {tier.name: 0 for tier in self.tiers}
+    
+    def close(self) -> None:
+        """Release tier resources such as database connections."""
+        for tier in self.tiers:
+            close = getattr(tier, "close", None)
+            if callable(close):
+                close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'tier_hits': dict(self.tier_hits),
+            'tiers': [tier.name for tier in self.tiers]
+        }
+
+
+def build_llm_cache() -> Optional[LLMCache]:
+    """Build the LLM cache described by the application settings."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    
+    tiers: List[CacheBackend] = [
+        MemoryCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        )
+    ]
+    if settings.LLM_CACHE_SQLITE_PATH:
+        tiers.append(SQLiteCache(
+            settings.LLM_CACHE_SQLITE_PATH,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+        ))
+    
+    return LLMCache(tiers)
+
+
+# Global LLM response cache (None when disabled)
+llm_cache = build_llm_cache()
@@ -0,0 +1,304 @@
+"""Circuit breakers and request-level latency budgets for upstream calls."""
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional, Tuple, TypeVar
+)
+from app.config import settings
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's breaker is open."""
+    
+    def __init__(self, name: str):
+        super().__init__(f"Circuit breaker '{name}' is open")
+        self.name = name
+
+
+# Errors after which callers should switch to their deterministic fallback
+UPSTREAM_UNAVAILABLE_ERRORS = (CircuitOpenError, asyncio.TimeoutError)
+
+
+class CircuitBreaker:
+    """
+    Track recent call outcomes for one upstream and stop calling it when unhealthy.
+    
+    The breaker opens when, over the last `window_size` calls, either the
+    failure rate or the slow-call rate crosses its threshold. After
+    `open_seconds` it lets a single probe through (half-open); a healthy
+    probe closes it again, anything else re-opens it.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_seconds: float = 10.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        min_calls: int = 5,
+        open_seconds: float = 30.0
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        
+        self.state = STATE_CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        
+        # Metrics
+        self.rejected = 0
+        self.times_opened = 0
+    
+    def is_open(self) -> bool:
+        """True while the breaker is open and not yet ready for a probe."""
+        return (
+            self.state == STATE_OPEN and
+            time.monotonic() - self._opened_at < self.open_seconds
+        )
+    
+    def reject_if_open(self) -> None:
+        """
+        Fail fast before queueing work for an upstream that is known to be down.
+        
+        Raises:
+            CircuitOpenError: If the breaker is open
+        """
+        if self.is_open():
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may be attempted now."""
+        if self.state == STATE_CLOSED:
+            return True
+        
+        if self.state == STATE_OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self.state = STATE_HALF_OPEN
+            self._probe_in_flight = False
+            logger.info(f"Circuit breaker '{self.name}' half-open, probing upstream")
+        
+        # Half-open: allow a single probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+    
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of a call."""
+        slow = latency >= self.slow_call_seconds
+        
+        if self.state == STATE_HALF_OPEN:
+            self._probe_in_flight = False
+            if success and not slow:
+                self.state = STATE_CLOSED
+                self._outcomes.clear()
+                logger.info(f"Circuit breaker '{self.name}' closed")
+            else:
+                self._open()
+            return
+        
+        self._outcomes.append((success, slow))
+        if self.state == STATE_CLOSED and len(self._outcomes) >= self.min_calls:
+            failure_rate, slow_rate = self._rates()
+            if (failure_rate >= self.failure_rate_threshold or
+                    slow_rate >= self.slow_call_rate_threshold):
+                self._open()
+    
+    def release(self) -> None:
+        """End a call without recording an outcome (it was cancelled by its caller)."""
+        if self.state == STATE_HALF_OPEN:
+            # Let the next request probe instead
+            self._probe_in_flight = False
+    
+    def _open(self) -> None:
+        self.state = STATE_OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        logger.warning(f"Circuit breaker '{self.name}' opened")
+    
+    def _rates(self) -> Tuple[float, float]:
+        total = len(self._outcomes)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for success, _ in self._outcomes if not success)
+        slow = sum(1 for _, is_slow in self._outcomes if is_slow)
+        return failures / total, slow / total
+    
+    async def call(
+        self,
+        call: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None
+    ) -> T:
+        """
+        Run a call through the breaker.
+        
+        Args:
+            call: Zero-argument coroutine factory
+            timeout: Per-call deadline in seconds (None = no deadline)
+        
+        Returns:
+            The call's result
+        
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+            asyncio.TimeoutError: If the call exceeds its deadline
+        """
+        async with self.guard():
+            if timeout is not None:
+                return await asyncio.wait_for(call(), timeout)
+            return await call()
+    
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Record the outcome and latency of the enclosed block.
+        
+        Used directly for streaming calls, where the upstream work spans
+        many awaits rather than a single coroutine.
+        
+        Raises:
+            CircuitOpenError: If the breaker rejects the call
+        """
+        if not self.allow_request():
+            self.rejected += 1
+            raise CircuitOpenError(self.name)
+        
+        started = time.monotonic()
+        try:
+            yield
+        except GeneratorExit:
+            # Consumer stopped reading a stream - not the upstream's fault
+            self.record(True, time.monotonic() - started)
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by the caller (e.g. a client disconnecting) - no
+            # verdict on the upstream; its own deadlines raise TimeoutError
+            self.release()
+            raise
+        except BaseException:
+            # Upstream errors and timeouts
+            self.record(False, time.monotonic() - started)
+            raise
+        
+        self.record(True, time.monotonic() - started)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state and rates for monitoring."""
+        failure_rate, slow_rate = self._rates()
+        return {
+            'state': self.state,
+            'failure_rate': round(failure_rate, 3),
+            'slow_call_rate': round(slow_rate, 3),
+            'window_calls': len(self._outcomes),
+            'rejected': self.rejected,
+            'times_opened': self.times_opened
+        }
+
+
+def _build_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate_threshold=settings.BREAKER_FAILURE_RATE,
+        slow_call_seconds=settings.BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate_threshold=settings.BREAKER_SLOW_CALL_RATE,
+        window_size=settings.BREAKER_WINDOW_SIZE,
+        min_calls=settings.BREAKER_MIN_CALLS,
+        open_seconds=settings.BREAKER_OPEN_SECONDS
+    )
+
+
+# Per-upstream circuit breakers
+gemini_breaker = _build_breaker("gemini")
+p3ai_breaker = _build_breaker("p3ai")
+weather_breaker = _build_breaker("weather")
+
+breakers: Dict[str, CircuitBreaker] = {
+    gemini_breaker.name: gemini_breaker,
+    p3ai_breaker.name: p3ai_breaker,
+    weather_breaker.name: weather_breaker
+}
+
+
+# Request-level latency budget (absolute monotonic deadline)
+_deadline: ContextVar[Optional[float]] = ContextVar("latency_deadline", default=None)
+
+
+@contextmanager
+def latency_budget(seconds: float) -> Iterator[None]:
+    """
+    Bound the total time upstream calls may take within this block.
+    
+    Nested budgets can only shorten the deadline, never extend it.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        try:
+            _deadline.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned streaming response)
+            pass
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current latency budget (None if no budget is set)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def call_timeout(max_seconds: Optional[float] = None) -> Optional[float]:
+    """
+    Deadline for the next upstream call: the smaller of `max_seconds` and
+    the remaining request budget.
+    
+    Raises:
+        asyncio.TimeoutError: If the request budget is already spent
+    """
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise asyncio.TimeoutError("Latency budget exhausted")
+    
+    candidates = [t for t in (max_seconds, remaining) if t is not None]
+    return min(candidates) if candidates else None
+
+
+async def within_budget(awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, bounded by the remaining request budget."""
+    try:
+        timeout = call_timeout()
+    except asyncio.TimeoutError:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    
+    if timeout is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout)
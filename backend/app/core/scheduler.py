@@ -0,0 +1,254 @@
+"""Priority-aware concurrency scheduler with token-bucket rate limiting for LLM calls."""
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+)
+from app.config import settings
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Priority levels (lower value is served first)
+PRIORITY_CRITICAL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_LOW = 3
+
+PRIORITY_NAMES = {
+    PRIORITY_CRITICAL: 'critical',
+    PRIORITY_HIGH: 'high',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_LOW: 'low'
+}
+
+
+def severity_to_priority(severity: str) -> int:
+    """Map an incident/risk severity to a scheduler priority."""
+    return {
+        'critical': PRIORITY_CRITICAL,
+        'high': PRIORITY_HIGH,
+        'medium': PRIORITY_NORMAL,
+        'low': PRIORITY_LOW
+    }.get(str(severity).lower(), PRIORITY_NORMAL)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for Gemini prompts (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+    
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill()
+        # Requests larger than the bucket are admitted once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def consume(self, amount: float) -> None:
+        """Take `amount` tokens from the bucket."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """
+    Admit LLM calls by priority while respecting concurrency and rate limits.
+    
+    Calls wait in a priority queue; the head of the queue is admitted once
+    an in-flight slot is free and both the requests-per-minute and
+    tokens-per-minute buckets can cover it.
+    """
+    
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        
+        self._queue: List[Tuple[int, int, asyncio.Future, int]] = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        self._submitted_by_priority: Dict[str, int] = {name: 0 for name in PRIORITY_NAMES.values()}
+    
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        priority: int = PRIORITY_NORMAL,
+        estimated_tokens: int = 0
+    ) -> T:
+        """
+        Wait for admission, then run the call.
+        
+        Args:
+            call: Zero-argument coroutine factory performing the LLM request
+            priority: Scheduling priority (PRIORITY_CRITICAL .. PRIORITY_LOW)
+            estimated_tokens: Prompt + expected output tokens, for the TPM bucket
+            
+        Returns:
+            Whatever the call returns
+        """
+        async with self.slot(priority, estimated_tokens):
+            return await call()
+    
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: int = PRIORITY_NORMAL,
+        estimated_tokens: int = 0,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """
+        Hold an in-flight slot for the duration of the block.
+        
+        Used directly for streaming calls, which must keep their slot until
+        the last chunk has arrived.
+        
+        Args:
+            priority: Scheduling priority
+            estimated_tokens: Prompt + expected output tokens
+            timeout: Maximum seconds to wait for admission (None = no limit)
+        
+        Raises:
+            asyncio.TimeoutError: If not admitted within `timeout`
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future, estimated_tokens))
+        
+        self.submitted += 1
+        self._submitted_by_priority[PRIORITY_NAMES.get(priority, 'normal')] += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        
+        enqueued_at = time.monotonic()
+        self._dispatch()
+        
+        try:
+            if timeout is not None:
+                await asyncio.wait_for(future, timeout)
+            else:
+                await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before cancellation - give the slot back
+                self._release()
+            raise
+        
+        self._wait_times.append(time.monotonic() - enqueued_at)
+        
+        try:
+            yield
+            self.completed += 1
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self._release()
+    
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+    
+    def _dispatch(self) -> None:
+        """Admit queued calls in priority order while capacity allows."""
+        while self._queue and self._in_flight < self.max_in_flight:
+            priority, _, future, tokens = self._queue[0]
+            if future.done():
+                # Caller gave up while waiting
+                heapq.heappop(self._queue)
+                continue
+            
+            delay = max(
+                self.request_bucket.wait_time(1) if self.request_bucket else 0.0,
+                self.token_bucket.wait_time(tokens) if self.token_bucket else 0.0
+            )
+            if delay > 0:
+                self._schedule_wakeup(delay)
+                return
+            
+            heapq.heappop(self._queue)
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(tokens)
+            
+            self._in_flight += 1
+            future.set_result(None)
+    
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None and not self._wakeup.cancelled():
+            return
+        
+        def wakeup():
+            self._wakeup = None
+            self._dispatch()
+        
+        self._wakeup = asyncio.get_running_loop().call_later(delay, wakeup)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, throughput and wait-time metrics."""
+        waits = sorted(self._wait_times)
+        
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 2)
+        
+        return {
+            'queue_depth': len(self._queue),
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight': self._in_flight,
+            'max_in_flight': self.max_in_flight,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'submitted_by_priority': dict(self._submitted_by_priority),
+            'wait_ms': {
+                'avg': round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'max': round(waits[-1] * 1000, 2) if waits else 0.0
+            }
+        }
+
+
+# Global LLM scheduler shared by all agents
+llm_scheduler = LLMScheduler(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE
+)
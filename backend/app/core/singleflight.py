@@ -0,0 +1,67 @@
+"""Single-flight coalescing of concurrent identical async calls."""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time.
+    
+    The first caller for a key (the leader) starts the call; callers that
+    arrive while it is in flight (followers) await the leader's result
+    instead of starting their own. Errors are shared the same way.
+    """
+    
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run `call` for `key`, or join the call already in flight.
+        
+        Args:
+            key: Coalescing key
+            call: Zero-argument coroutine factory
+            
+        Returns:
+            (result, shared) - shared is True when this caller was a follower
+        """
+        in_flight = self._calls.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            logger.info(f"{self.name}: joined in-flight call for {key}")
+            # Shield so a disconnecting follower does not cancel the leader's work
+            return await asyncio.shield(in_flight), True
+        
+        self.leaders += 1
+        task = asyncio.ensure_future(call())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task), False
+    
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved if nobody is left waiting
+        if not task.cancelled():
+            task.exception()
+    
+    def in_flight(self) -> int:
+        """Number of keys currently in flight."""
+        return len(self._calls)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Leader/follower counters for monitoring."""
+        return {
+            'in_flight': len(self._calls),
+            'leaders': self.leaders,
+            'coalesced': self.coalesced
+        }
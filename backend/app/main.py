@@ -6,9 +6,17 @@ from app.api import (
     predictions_router,
     incidents_router,
     alerts_router,
-    websocket_router
+    websocket_router,
+    jobs_router,
+    sensors_router
 )
+from app.agents import registry, tiering_policy
+from app.core import llm_cache, llm_scheduler, breakers
+from app.api.predictions import prediction_flight
+from app.services import job_queue, sensor_store, timeseries_store, weather_provider
+from app.ml import gauge_registry, historical_index, load_historical_events, population_model, risk_model_server
 import logging
+import threading
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +49,8 @@ app.include_router(predictions_router)
 app.include_router(incidents_router)
 app.include_router(alerts_router)
 app.include_router(websocket_router)
+app.include_router(jobs_router)
+app.include_router(sensors_router)
 
 # Root endpoint
 @app.get("/")
@@ -61,7 +71,33 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "2.0.0",
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "agents": registry.status()
+    }
+
+# Runtime metrics endpoint
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for caches and schedulers."""
+    return {
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "llm_scheduler": llm_scheduler.metrics(),
+        "prediction_coalescing": prediction_flight.stats(),
+        "circuit_breakers": {name: breaker.stats() for name, breaker in breakers.items()},
+        "tiering": tiering_policy.stats(),
+        "jobs": await job_queue.stats(),
+        "model_backend": registry.model_backend_stats(),
+        "gauges": gauge_registry.stats(),
+        "historical_index": historical_index.stats(),
+        "population": population_model.stats(),
+        "risk_model": risk_model_server.stats(),
+        "sensors": sensor_store.stats(),
+        "sensor_history": timeseries_store.stats(),
+        "weather_provider": weather_provider.stats(),
+        "prediction_reuse": (
+            registry.prediction_agent.reasoning_cache.stats()
+            if registry.prediction_agent.reasoning_cache else None
+        )
     }
 
 # Startup event
@@ -72,6 +108,13 @@ async def startup_event():
     logger.info("Flood Resilience Network API Starting...")
     logger.info(f"Environment: {settings.ENVIRONMENT}")
     logger.info(f"CORS Origins: {settings.cors_origins_list}")
+    risk_model_server.load()
+    registry.startup()
+    job_queue.start()
+    sensor_store.start()
+    # Index past events without holding up startup
+    threading.Thread(target=load_historical_events, name="historical-load", daemon=True).start()
+    threading.Thread(target=population_model.load, name="population-load", daemon=True).start()
     logger.info("=" * 50)
 
 # Shutdown event
@@ -79,6 +122,12 @@ async def startup_event():
 async def shutdown_event():
     """Run on application shutdown."""
     logger.info("Flood Resilience Network API Shutting Down...")
+    await job_queue.stop()
+    await sensor_store.stop()
+    await weather_provider.close()
+    await registry.shutdown()
+    if llm_cache:
+        llm_cache.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,54 @@
+"""Numerical models (risk scoring, forecasting, uncertainty, gauge state, history, population, model serving)."""
+from app.ml.ensemble import SensorErrorModel, UncertaintyEnsemble, uncertainty_ensemble
+from app.ml.forecasting import WaterLevelForecaster, water_level_forecaster, response_kernel
+from app.ml.history import (
+    HistoricalIndex,
+    historical_index,
+    load_historical_events,
+    event_from_prediction,
+    event_from_incident
+)
+from app.ml.population import PopulationRaster, PopulationModel, population_model
+from app.ml.risk_model import RiskModelServer, WeightedRiskModel, SklearnRiskModel, risk_model_server, MODEL_FEATURES
+from app.ml.kalman import RiverLevelFilter, GaugeRegistry, gauge_registry
+from app.ml.risk_engine import (
+    RiskEngine,
+    RiskBatch,
+    risk_engine,
+    risk_level_codes,
+    risk_level_names,
+    RISK_LEVELS,
+    RISK_LEVEL_THRESHOLDS
+)
+
+__all__ = [
+    "SensorErrorModel",
+    "UncertaintyEnsemble",
+    "uncertainty_ensemble",
+    "WaterLevelForecaster",
+    "water_level_forecaster",
+    "response_kernel",
+    "HistoricalIndex",
+    "historical_index",
+    "load_historical_events",
+    "event_from_prediction",
+    "event_from_incident",
+    "PopulationRaster",
+    "PopulationModel",
+    "population_model",
+    "RiskModelServer",
+    "WeightedRiskModel",
+    "SklearnRiskModel",
+    "risk_model_server",
+    "MODEL_FEATURES",
+    "RiverLevelFilter",
+    "GaugeRegistry",
+    "gauge_registry",
+    "RiskEngine",
+    "RiskBatch",
+    "risk_engine",
+    "risk_level_codes",
+    "risk_level_names",
+    "RISK_LEVELS",
+    "RISK_LEVEL_THRESHOLDS",
+]
@@ -0,0 +1,159 @@
+"""Monte Carlo uncertainty bands for flood predictions."""
+from typing import Any, Dict, Optional, Sequence
+from app.config import settings
+from app.ml.forecasting import WaterLevelForecaster, water_level_forecaster
+from app.ml.risk_engine import RiskEngine, risk_engine, risk_level_codes, RISK_LEVELS
+import time
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reported percentiles of each ensemble output
+PERCENTILES = (5, 50, 95)
+
+# Draws evaluated between time-budget checks
+ENSEMBLE_CHUNK_DRAWS = 500
+
+
+class SensorErrorModel:
+    """
+    Measurement error of one sensor.
+    
+    'relative' errors scale the reading (std is a fraction of it),
+    'absolute' errors add noise in the sensor's unit. Draws are clipped to
+    [floor, ceiling].
+    """
+    
+    def __init__(
+        self,
+        kind: str,
+        std: float,
+        bias: float = 0.0,
+        floor: float = 0.0,
+        ceiling: Optional[float] = None
+    ):
+        if kind not in ('relative', 'absolute'):
+            raise ValueError(f"Unknown sensor error kind: {kind}")
+        self.kind = kind
+        self.std = std
+        self.bias = bias
+        self.floor = floor
+        self.ceiling = ceiling
+    
+    def sample(self, reading: float, draws: int, rng: np.random.Generator) -> np.ndarray:
+        """`draws` plausible true values for a reading."""
+        noise = rng.standard_normal(draws) * self.std + self.bias
+        values = reading * (1 + noise) if self.kind == 'relative' else reading + noise
+        return np.clip(values, self.floor, self.ceiling)
+
+
+class UncertaintyEnsemble:
+    """
+    Perturb a prediction's inputs with their sensor error models and push
+    every draw through the deterministic scorer and forecaster at once.
+    
+    Draws are evaluated in chunks until `draws` is reached or the time
+    budget runs out (at least one chunk always runs).
+    """
+    
+    def __init__(
+        self,
+        rainfall_error: SensorErrorModel,
+        saturation_error: SensorErrorModel,
+        river_error: SensorErrorModel,
+        draws: int = 2000,
+        time_budget_ms: float = 5.0,
+        percentiles: Sequence[int] = PERCENTILES,
+        engine: Optional[RiskEngine] = None,
+        forecaster: Optional[WaterLevelForecaster] = None,
+        seed: Optional[int] = None
+    ):
+        self.rainfall_error = rainfall_error
+        self.saturation_error = saturation_error
+        self.river_error = river_error
+        self.draws = draws
+        self.time_budget_ms = time_budget_ms
+        self.percentiles = tuple(percentiles)
+        self.engine = engine or risk_engine
+        self.forecaster = forecaster or water_level_forecaster
+        self.rng = np.random.default_rng(seed)
+    
+    def run(
+        self,
+        context: Dict[str, Any],
+        zynd_score: Optional[float] = None,
+        historical_score: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Uncertainty bands for one prediction.
+        
+        Args:
+            context: rainfall, soil_saturation and river_level readings
+            zynd_score: ZYND network score, held fixed across draws (NaN =
+                no score, use the basic score; None re-runs the rule-based
+                ZYND analysis on every draw)
+            historical_score: Historical severity (None = neutral)
+        
+        Returns:
+            Percentile bands for the probability and water level forecast,
+            the share of draws at each risk level, and the draws used
+        """
+        started = time.perf_counter()
+        deadline = started + self.time_budget_ms / 1000
+        
+        rainfall = float(context.get('rainfall', 0))
+        saturation = float(context.get('soil_saturation', 0))
+        river_level = float(context.get('river_level', 5.0))
+        
+        scores, forecasts = [], []
+        done = 0
+        while done < self.draws:
+            n = min(ENSEMBLE_CHUNK_DRAWS, self.draws - done)
+            r = self.rainfall_error.sample(rainfall, n, self.rng)
+            s = self.saturation_error.sample(saturation, n, self.rng)
+            v = self.river_error.sample(river_level, n, self.rng)
+            
+            batch = self.engine.score(
+                r, s, v,
+                historical=None if historical_score is None else np.full(n, historical_score),
+                zynd_scores=None if zynd_score is None else np.full(n, zynd_score)
+            )
+            scores.append(batch.score)
+            forecasts.append(self.forecaster.forecast(v, r, batch.score))
+            done += n
+            
+            if time.perf_counter() >= deadline:
+                break
+        
+        score = np.concatenate(scores)
+        forecast = np.concatenate(forecasts)
+        levels = np.bincount(risk_level_codes(score), minlength=len(RISK_LEVELS)) / len(score)
+        
+        score_bands = np.percentile(score, self.percentiles)
+        forecast_bands = np.percentile(forecast, self.percentiles, axis=0)
+        
+        return {
+            'draws': int(len(score)),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2),
+            'probability': {
+                **{f"p{p}": round(float(b), 4) for p, b in zip(self.percentiles, score_bands)},
+                'mean': round(float(score.mean()), 4),
+                'std': round(float(score.std()), 4)
+            },
+            'risk_levels': {level: round(float(share), 4) for level, share in zip(RISK_LEVELS, levels)},
+            'water_level_forecast': {
+                f"p{p}": np.round(band.astype(np.float64), 2).tolist()
+                for p, band in zip(self.percentiles, forecast_bands)
+            }
+        }
+
+
+# Global ensemble configured from settings
+uncertainty_ensemble = UncertaintyEnsemble(
+    rainfall_error=SensorErrorModel('relative', settings.ENSEMBLE_RAINFALL_ERROR),
+    saturation_error=SensorErrorModel('absolute', settings.ENSEMBLE_SATURATION_ERROR, ceiling=1.0),
+    river_error=SensorErrorModel('absolute', settings.ENSEMBLE_RIVER_ERROR),
+    draws=settings.ENSEMBLE_DRAWS,
+    time_budget_ms=settings.ENSEMBLE_TIME_BUDGET_MS
+)
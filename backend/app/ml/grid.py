@@ -0,0 +1,115 @@
+"""Regular lat/lon grids: cell layout and input interpolation."""
+from typing import Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Kilometers per degree of latitude, and of longitude at the equator
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+
+# Cells interpolated per pass (bounds the cells x stations distance matrix)
+IDW_CHUNK_CELLS = 4096
+
+
+class GridSpec:
+    """
+    A bounding box split into square cells of roughly `cell_size_km`.
+    
+    Rows run south to north and columns west to east; flattened arrays
+    are row-major, so cell (row, col) is index row * cols + col.
+    """
+    
+    def __init__(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        cell_size_km: float
+    ):
+        self.min_lat = min_lat
+        self.min_lon = min_lon
+        self.max_lat = max_lat
+        self.max_lon = max_lon
+        self.cell_size_km = cell_size_km
+        
+        # Longitude degrees shrink with latitude; size cells at the bbox center
+        center_lat = np.radians((min_lat + max_lat) / 2)
+        self.lat_step = cell_size_km / KM_PER_DEG_LAT
+        self.lon_step = cell_size_km / (KM_PER_DEG_LON * max(np.cos(center_lat), 1e-6))
+        
+        self.rows = max(int(np.ceil((max_lat - min_lat) / self.lat_step)), 1)
+        self.cols = max(int(np.ceil((max_lon - min_lon) / self.lon_step)), 1)
+    
+    @property
+    def size(self) -> int:
+        return self.rows * self.cols
+    
+    def centers(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Flattened (lat, lon) of every cell center."""
+        lats = self.min_lat + (np.arange(self.rows) + 0.5) * self.lat_step
+        lons = self.min_lon + (np.arange(self.cols) + 0.5) * self.lon_step
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+        return lat_grid.ravel(), lon_grid.ravel()
+    
+    def metadata(self) -> dict:
+        """Grid layout for clients rebuilding cell positions."""
+        return {
+            'bbox': [self.min_lat, self.min_lon, self.max_lat, self.max_lon],
+            'cell_size_km': self.cell_size_km,
+            'rows': self.rows,
+            'cols': self.cols,
+            'lat_step': round(float(self.lat_step), 8),
+            'lon_step': round(float(self.lon_step), 8),
+            'order': 'row-major, rows south to north, columns west to east'
+        }
+
+
+def idw_interpolate(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    station_lat: np.ndarray,
+    station_lon: np.ndarray,
+    station_values: np.ndarray,
+    power: float = 2.0
+) -> np.ndarray:
+    """
+    Inverse-distance-weighted interpolation of station readings.
+    
+    Args:
+        lat, lon: Target points
+        station_lat, station_lon: Station locations
+        station_values: Readings, one column per variable (stations x variables)
+        power: Distance exponent (higher = more local)
+    
+    Returns:
+        Interpolated values (points x variables); a point on top of a
+        station takes that station's reading
+    """
+    station_values = np.asarray(station_values, dtype=np.float64)
+    if station_values.ndim == 1:
+        station_values = station_values[:, None]
+    
+    out = np.empty((len(lat), station_values.shape[1]), dtype=np.float64)
+    
+    # Equirectangular distances are plenty at city scale
+    lon_scale = np.cos(np.radians(np.mean(lat))) if len(lat) else 1.0
+    
+    for start in range(0, len(lat), IDW_CHUNK_CELLS):
+        stop = start + IDW_CHUNK_CELLS
+        d_lat = lat[start:stop, None] - station_lat[None, :]
+        d_lon = (lon[start:stop, None] - station_lon[None, :]) * lon_scale
+        dist_sq = d_lat ** 2 + d_lon ** 2
+        
+        with np.errstate(divide='ignore'):
+            weights = dist_sq ** (-power / 2)
+        
+        exact = np.isinf(weights)
+        hits = exact.any(axis=1)
+        weights[hits] = exact[hits]
+        
+        out[start:stop] = (weights @ station_values) / weights.sum(axis=1, keepdims=True)
+    
+    return out
@@ -0,0 +1,311 @@
+"""Nearest-neighbour index of past flood events."""
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sklearn.neighbors import KDTree
+from app.config import settings
+from app.database import get_service_client
+import json
+import os
+import threading
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Event features, and how far along each counts as one unit of distance
+FEATURES = ('latitude', 'longitude', 'rainfall', 'soil_saturation', 'river_level')
+DEFAULT_SCALES = (0.5, 0.5, 20.0, 0.15, 1.5)  # degrees, degrees, mm/h, fraction, m
+
+# Numeric severity of a risk / incident severity level
+SEVERITY_SCORES = {'low': 0.25, 'medium': 0.5, 'high': 0.75, 'critical': 1.0}
+
+# Incident types that count as flood events
+FLOOD_INCIDENT_TYPES = ('flood',)
+
+
+def event_from_prediction(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Historical event for a flood_predictions row (None if it lacks a location)."""
+    if row.get('center_lat') is None or row.get('center_lon') is None:
+        return None
+    risk_level = row.get('risk_level', 'low')
+    probability = row.get('probability')
+    return {
+        'id': f"prediction:{row.get('id')}",
+        'source': 'prediction',
+        'region': row.get('region_name'),
+        'latitude': row['center_lat'],
+        'longitude': row['center_lon'],
+        'rainfall': row.get('rainfall_intensity'),
+        'soil_saturation': row.get('soil_saturation'),
+        'river_level': row.get('river_level'),
+        'probability': probability if probability is not None else SEVERITY_SCORES.get(risk_level, 0.5),
+        'severity': probability if probability is not None else SEVERITY_SCORES.get(risk_level, 0.5),
+        'actual_severity': risk_level,
+        'occurred_at': str(row.get('created_at') or '')
+    }
+
+
+def event_from_incident(row: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Historical event for a flood incident row (incidents carry no sensor readings)."""
+    if row.get('type') not in FLOOD_INCIDENT_TYPES:
+        return None
+    if row.get('latitude') is None or row.get('longitude') is None:
+        return None
+    severity = row.get('severity', 'medium')
+    score = SEVERITY_SCORES.get(severity, 0.5)
+    return {
+        'id': f"incident:{row.get('id')}",
+        'source': 'incident',
+        'region': row.get('title'),
+        'latitude': row['latitude'],
+        'longitude': row['longitude'],
+        'rainfall': None,
+        'soil_saturation': None,
+        'river_level': None,
+        'probability': score,
+        'severity': score,
+        'actual_severity': severity,
+        'occurred_at': str(row.get('created_at') or '')
+    }
+
+
+class HistoricalIndex:
+    """
+    k-nearest past flood events by location and conditions.
+    
+    Events are scaled per feature (DEFAULT_SCALES) and held in a KD-tree.
+    New events go to a small pending buffer that queries scan directly;
+    once it outgrows rebuild_threshold (or a tenth of the tree) the tree is
+    rebuilt in a background thread and swapped in. Missing readings
+    (incidents) are imputed with the indexed medians, so those events match
+    on location.
+    """
+    
+    def __init__(
+        self,
+        scales: Sequence[float] = DEFAULT_SCALES,
+        rebuild_threshold: int = 1024,
+        max_distance: float = 3.0,
+        max_events: int = 500000,
+        leaf_size: int = 40
+    ):
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.rebuild_threshold = rebuild_threshold
+        self.max_distance = max_distance
+        self.max_events = max_events
+        self.leaf_size = leaf_size
+        
+        self._tree: Optional[KDTree] = None
+        self._events: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_features = np.empty((0, len(FEATURES)))
+        self._medians = np.array([0.0, 0.0, 30.0, 0.6, 5.0])
+        
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._rebuilding = False
+        self.rebuilds = 0
+    
+    def __len__(self) -> int:
+        return len(self._events) + len(self._pending)
+    
+    def _features(self, events: Iterable[Dict[str, Any]]) -> np.ndarray:
+        raw = np.array(
+            [[np.nan if e.get(f) is None else float(e[f]) for f in FEATURES] for e in events],
+            dtype=np.float64
+        ).reshape(-1, len(FEATURES))
+        raw = np.where(np.isnan(raw), self._medians, raw)
+        return raw / self.scales
+    
+    def add(self, event: Optional[Dict[str, Any]]) -> None:
+        """Index one event (None is ignored)."""
+        if event is not None:
+            self.add_many([event])
+    
+    def add_many(self, events: Iterable[Optional[Dict[str, Any]]]) -> None:
+        """Index events; the tree is rebuilt in the background when enough accumulate."""
+        events = [e for e in events if e is not None]
+        if not events:
+            return
+        
+        features = self._features(events)
+        with self._lock:
+            self._pending.extend(events)
+            self._pending_features = np.vstack([self._pending_features, features])
+            due = (
+                len(self._pending) >= max(self.rebuild_threshold, len(self._events) // 10) and
+                not self._rebuilding
+            )
+            if due:
+                self._rebuilding = True
+        
+        if due:
+            threading.Thread(target=self._rebuild_in_background, name="historical-index", daemon=True).start()
+    
+    def _rebuild_in_background(self) -> None:
+        try:
+            self._rebuild()
+        except Exception as e:
+            logger.error(f"Historical index rebuild failed: {str(e)}")
+    
+    def _claim_rebuild(self) -> None:
+        """Wait for any running rebuild, then mark one as running."""
+        with self._idle:
+            while self._rebuilding:
+                self._idle.wait()
+            self._rebuilding = True
+    
+    def rebuild(self) -> None:
+        """Fold pending events into a new tree, refreshing the imputation medians."""
+        self._claim_rebuild()
+        self._rebuild()
+    
+    def _rebuild(self, base: Optional[List[Dict[str, Any]]] = None) -> None:
+        """
+        Build and swap in a new tree (the caller has claimed the rebuild).
+        
+        Args:
+            base: Indexed events to replace the current ones (None keeps them)
+        """
+        try:
+            with self._lock:
+                events = ((self._events if base is None else base) + self._pending)[-self.max_events:]
+                taken = len(self._pending)
+            
+            raw = np.array(
+                [[np.nan if e.get(f) is None else float(e[f]) for f in FEATURES] for e in events],
+                dtype=np.float64
+            ).reshape(-1, len(FEATURES))
+            if len(raw):
+                medians = np.nanmedian(np.vstack([raw, self._medians]), axis=0)
+                raw = np.where(np.isnan(raw), medians, raw)
+            else:
+                medians = self._medians
+            tree = KDTree(raw / self.scales, leaf_size=self.leaf_size) if len(raw) else None
+            
+            with self._lock:
+                # Events added during the build stay pending for the next one
+                self._pending = self._pending[taken:]
+                self._pending_features = self._pending_features[taken:]
+                self._events = events
+                self._tree = tree
+                self._medians = medians
+                self.rebuilds += 1
+        finally:
+            with self._idle:
+                self._rebuilding = False
+                self._idle.notify_all()
+        logger.info(f"Historical index rebuilt with {len(events)} events")
+    
+    def query(
+        self,
+        conditions: Dict[str, Any],
+        k: int = 5,
+        max_distance: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Most similar past events.
+        
+        Args:
+            conditions: latitude, longitude and (optionally) rainfall,
+                soil_saturation, river_level of the current situation
+            k: Number of events
+            max_distance: Scaled distance beyond which events are not similar
+        
+        Returns:
+            Up to k events, nearest first, each with its 'distance'
+        """
+        limit = self.max_distance if max_distance is None else max_distance
+        point = self._features([conditions])
+        
+        with self._lock:
+            tree, events = self._tree, self._events
+            pending, pending_features = self._pending, self._pending_features
+        
+        candidates = []
+        if tree is not None and events:
+            dist, idx = tree.query(point, k=min(k, len(events)))
+            candidates.extend(zip(dist[0], (events[i] for i in idx[0])))
+        if len(pending):
+            dist = np.sqrt(((pending_features - point) ** 2).sum(axis=1))
+            for i in np.argsort(dist)[:k]:
+                candidates.append((dist[i], pending[i]))
+        
+        candidates.sort(key=lambda c: c[0])
+        return [
+            {**event, 'distance': round(float(d), 3)}
+            for d, event in candidates[:k] if d <= limit
+        ]
+    
+    def load(self, supabase: Any = None, seed_path: str = "") -> int:
+        """
+        (Re)load events from a seed file and the database, then rebuild.
+        
+        Safe to run while events are being added or a rebuild is running.
+        
+        Args:
+            supabase: Supabase client (None skips the database)
+            seed_path: JSON list or JSON-lines file of event dicts
+        
+        Returns:
+            Number of events indexed
+        """
+        events: List[Dict[str, Any]] = []
+        
+        if seed_path and os.path.exists(seed_path):
+            with open(seed_path) as f:
+                text = f.read().strip()
+            if text.startswith('['):
+                events.extend(json.loads(text))
+            else:
+                events.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        
+        if supabase is not None:
+            limit = self.max_events
+            predictions = supabase.table('flood_predictions')\
+                .select('id, region_name, risk_level, probability, center_lat, center_lon, '
+                        'rainfall_intensity, soil_saturation, river_level, created_at')\
+                .order('created_at', desc=True)\
+                .limit(limit)\
+                .execute()
+            events.extend(filter(None, map(event_from_prediction, predictions.data or [])))
+            
+            incidents = supabase.table('incidents')\
+                .select('id, title, type, severity, latitude, longitude, created_at')\
+                .in_('type', list(FLOOD_INCIDENT_TYPES))\
+                .order('created_at', desc=True)\
+                .limit(limit)\
+                .execute()
+            events.extend(filter(None, map(event_from_incident, incidents.data or [])))
+        
+        # The loaded events replace the indexed ones; events added meanwhile
+        # stay pending and are folded in with them
+        self._claim_rebuild()
+        self._rebuild(base=events)
+        return len(self._events)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Index size for monitoring."""
+        return {
+            'events': len(self._events),
+            'pending': len(self._pending),
+            'rebuilds': self.rebuilds
+        }
+
+
+def load_historical_events() -> None:
+    """Load the global index from the seed file and database (run at startup)."""
+    try:
+        supabase = get_service_client()
+        count = historical_index.load(supabase, settings.HISTORY_SEED_PATH)
+    except Exception as e:
+        logger.warning(f"Historical events unavailable from database, seed file only: {str(e)}")
+        count = historical_index.load(None, settings.HISTORY_SEED_PATH)
+    logger.info(f"Historical index loaded with {count} events")
+
+
+# Global historical event index
+historical_index = HistoricalIndex(
+    rebuild_threshold=settings.HISTORY_REBUILD_THRESHOLD,
+    max_distance=settings.HISTORY_MAX_DISTANCE,
+    max_events=settings.HISTORY_MAX_EVENTS
+)
@@ -0,0 +1,230 @@
+"""Per-gauge Kalman filtering of river level readings."""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Union
+from app.config import settings
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Reading time: epoch seconds or a datetime (naive = UTC); None = now
+Timestamp = Optional[Union[float, datetime]]
+
+
+def _epoch(timestamp: Timestamp) -> float:
+    if timestamp is None:
+        return time.time()
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            return (timestamp - datetime(1970, 1, 1)).total_seconds()
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+class RiverLevelFilter:
+    """
+    Constant-velocity Kalman filter over one gauge's readings.
+    
+    State is the level (m) and its rate of rise (m/h). Each reading is a
+    fixed number of scalar operations, so the estimate stays current at
+    O(1) cost however many readings have been seen.
+    """
+    
+    __slots__ = (
+        'measurement_var', 'accel_var', 'initial_rate_var',
+        'level', 'rate', 'p00', 'p01', 'p11', 'updated_at', 'readings'
+    )
+    
+    def __init__(
+        self,
+        measurement_std: float = 0.05,
+        accel_std: float = 0.1,
+        initial_rate_std: float = 0.5
+    ):
+        self.measurement_var = measurement_std ** 2
+        self.accel_var = accel_std ** 2
+        self.initial_rate_var = initial_rate_std ** 2
+        
+        self.level = 0.0
+        self.rate = 0.0
+        self.p00 = self.p01 = self.p11 = 0.0
+        self.updated_at: Optional[float] = None
+        self.readings = 0
+    
+    def update(self, level: float, timestamp: Timestamp = None) -> None:
+        """Fold in one reading (meters) taken at `timestamp`."""
+        at = _epoch(timestamp)
+        
+        if self.updated_at is None:
+            self.level, self.rate = float(level), 0.0
+            self.p00, self.p01, self.p11 = self.measurement_var, 0.0, self.initial_rate_var
+            self.updated_at = at
+            self.readings = 1
+            return
+        
+        # Predict to the reading time (late readings are applied in place)
+        dt = max(at - self.updated_at, 0.0) / 3600
+        lvl, rate, p00, p01, p11 = self._propagate(dt)
+        
+        # Correct with the reading
+        innovation = float(level) - lvl
+        s = p00 + self.measurement_var
+        k0, k1 = p00 / s, p01 / s
+        
+        self.level = lvl + k0 * innovation
+        self.rate = rate + k1 * innovation
+        self.p00 = (1 - k0) * p00
+        self.p01 = (1 - k0) * p01
+        self.p11 = p11 - k1 * p01
+        self.updated_at = max(at, self.updated_at)
+        self.readings += 1
+    
+    def _propagate(self, dt: float):
+        """State and covariance `dt` hours after the last update."""
+        q = self.accel_var
+        level = self.level + dt * self.rate
+        p00 = self.p00 + 2 * dt * self.p01 + dt * dt * self.p11 + q * dt ** 4 / 4
+        p01 = self.p01 + dt * self.p11 + q * dt ** 3 / 2
+        p11 = self.p11 + q * dt * dt
+        return level, self.rate, p00, p01, p11
+    
+    def state(self, timestamp: Timestamp = None) -> Dict[str, Any]:
+        """Estimate at `timestamp` (default now), without changing the filter."""
+        dt = max(_epoch(timestamp) - self.updated_at, 0.0) / 3600
+        level, rate, p00, _, p11 = self._propagate(dt)
+        return {
+            'level': round(level, 3),
+            'rate_per_hour': round(rate, 4),
+            'level_std': round(math.sqrt(max(p00, 0.0)), 3),
+            'rate_std': round(math.sqrt(max(p11, 0.0)), 4),
+            'readings': self.readings,
+            'updated_at': datetime.utcfromtimestamp(self.updated_at).isoformat()
+        }
+    
+    def forecast(self, hours: List[float], timestamp: Timestamp = None) -> List[Dict[str, float]]:
+        """Extrapolated level (and its std) `hours` ahead of `timestamp`."""
+        base = max(_epoch(timestamp) - self.updated_at, 0.0) / 3600
+        points = []
+        for h in hours:
+            level, _, p00, _, _ = self._propagate(base + h)
+            points.append({
+                'hours': h,
+                'level': round(max(level, 0.0), 3),
+                'level_std': round(math.sqrt(max(p00, 0.0)), 3)
+            })
+        return points
+
+
+class GaugeRegistry:
+    """
+    River level filters keyed by gauge.
+    
+    Only real gauge readings should be observed (not modelled or mocked
+    levels). Readings without a gauge id are assigned to a virtual gauge
+    per GAUGE_CELL_DEGREES cell of their location. The least recently updated
+    gauges are dropped beyond max_gauges.
+    """
+    
+    def __init__(
+        self,
+        cell_degrees: float = 0.01,
+        max_gauges: int = 10000,
+        forecast_hours: float = 6,
+        measurement_std: float = 0.05,
+        accel_std: float = 0.1,
+        initial_rate_std: float = 0.5
+    ):
+        self.cell_degrees = cell_degrees
+        self.max_gauges = max_gauges
+        self.forecast_hours = forecast_hours
+        self.measurement_std = measurement_std
+        self.accel_std = accel_std
+        self.initial_rate_std = initial_rate_std
+        
+        self._filters: "OrderedDict[str, RiverLevelFilter]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def gauge_key(self, lat: float, lon: float) -> str:
+        """Virtual gauge id for a location."""
+        return f"cell:{math.floor(lat / self.cell_degrees)}:{math.floor(lon / self.cell_degrees)}"
+    
+    def observe(
+        self,
+        gauge: str,
+        level: float,
+        timestamp: Timestamp = None
+    ) -> Dict[str, Any]:
+        """
+        Record a reading for a gauge.
+        
+        Returns:
+            The gauge's updated state snapshot
+        """
+        with self._lock:
+            flt = self._filters.get(gauge)
+            if flt is None:
+                flt = RiverLevelFilter(self.measurement_std, self.accel_std, self.initial_rate_std)
+                self._filters[gauge] = flt
+                while len(self._filters) > self.max_gauges:
+                    self._filters.popitem(last=False)
+            flt.update(level, timestamp)
+            self._filters.move_to_end(gauge)
+            return self._snapshot(gauge, flt, timestamp)
+    
+    def observe_at(self, lat: float, lon: float, level: float, timestamp: Timestamp = None) -> Dict[str, Any]:
+        """Record a reading for the virtual gauge at a location."""
+        return self.observe(self.gauge_key(lat, lon), level, timestamp)
+    
+    def snapshot(self, gauge: str, timestamp: Timestamp = None) -> Optional[Dict[str, Any]]:
+        """Current state and short-horizon forecast, or None for an unknown gauge."""
+        with self._lock:
+            flt = self._filters.get(gauge)
+            if flt is None:
+                return None
+            return self._snapshot(gauge, flt, timestamp)
+    
+    def snapshot_at(
+        self,
+        lat: float,
+        lon: float,
+        gauges: Sequence[str] = (),
+        timestamp: Timestamp = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        snapshot() of the nearest tracked gauge for a location.
+        
+        Args:
+            gauges: Ids of gauges near the location, nearest first; the
+                first one tracked wins, else the virtual gauge at the location
+        """
+        for gauge in (*gauges, self.gauge_key(lat, lon)):
+            state = self.snapshot(gauge, timestamp)
+            if state is not None:
+                return state
+        return None
+    
+    def _snapshot(self, gauge: str, flt: RiverLevelFilter, timestamp: Timestamp) -> Dict[str, Any]:
+        hours = [h for h in (1, 3, 6, 12, 24) if h <= self.forecast_hours] or [self.forecast_hours]
+        return {
+            'gauge': gauge,
+            **flt.state(timestamp),
+            'forecast': flt.forecast(hours, timestamp)
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Tracked gauge count for monitoring."""
+        return {'gauges': len(self._filters), 'max_gauges': self.max_gauges}
+
+
+# Global gauge registry shared by the API and the prediction agent
+gauge_registry = GaugeRegistry(
+    cell_degrees=settings.GAUGE_CELL_DEGREES,
+    max_gauges=settings.GAUGE_MAX_TRACKED,
+    forecast_hours=settings.GAUGE_FORECAST_HOURS,
+    measurement_std=settings.GAUGE_MEASUREMENT_STD,
+    accel_std=settings.GAUGE_ACCEL_STD,
+    initial_rate_std=settings.GAUGE_INITIAL_RATE_STD
+)
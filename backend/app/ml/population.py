@@ -0,0 +1,250 @@
+"""Gridded population lookups backed by a memory-mapped summed-area table."""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.config import settings
+import json
+import math
+import os
+import threading
+import numpy as np
+import logging
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Kilometers per degree of latitude
+KM_PER_DEG_LAT = 110.574
+
+# Raster rows folded into the summed-area table per pass
+SAT_BUILD_CHUNK_ROWS = 1024
+
+
+def build_summed_area_table(raster: np.ndarray, path: str) -> None:
+    """
+    Write the summed-area table of `raster` to `path` (.npy).
+    
+    SAT[i, j] is the population of raster[:i, :j]; it has one more row and
+    column than the raster. Built in row chunks straight into a memory-mapped
+    file, so rasters larger than RAM work. Missing/negative cells count as 0.
+    """
+    rows, cols = raster.shape
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    sat = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=(rows + 1, cols + 1))
+    sat[0, :] = 0
+    sat[:, 0] = 0
+    
+    for start in range(0, rows, SAT_BUILD_CHUNK_ROWS):
+        stop = min(start + SAT_BUILD_CHUNK_ROWS, rows)
+        chunk = np.nan_to_num(np.asarray(raster[start:stop], dtype=np.float64), nan=0.0)
+        np.maximum(chunk, 0, out=chunk)
+        block = np.cumsum(np.cumsum(chunk, axis=1), axis=0)
+        sat[start + 1:stop + 1, 1:] = block + sat[start, 1:]
+    
+    sat.flush()
+    del sat
+    os.replace(tmp_path, path)
+
+
+class PopulationRaster:
+    """
+    People per cell on a regular lat/lon grid, north-up.
+    
+    The raster is a 2-D .npy file with a JSON sidecar (same name, .json)
+    giving its "north" and "west" edges and "cell_degrees" (or
+    "cell_degrees_lat" / "cell_degrees_lon"). Its summed-area table is
+    built once into a .sat.npy file next to it; every worker maps the same
+    file read-only, so the table is shared through the page cache instead
+    of being copied per process.
+    
+    Sums cover the cells whose centers fall inside the shape: a rectangle
+    is O(1), a circle or polygon one O(1) lookup per raster row it spans.
+    """
+    
+    def __init__(self, path: str, sat_path: str = ""):
+        self.path = path
+        self.sat_path = sat_path or f"{os.path.splitext(path)[0]}.sat.npy"
+        
+        with open(f"{os.path.splitext(path)[0]}.json") as f:
+            meta = json.load(f)
+        self.north = float(meta['north'])
+        self.west = float(meta['west'])
+        self.cell_lat = float(meta.get('cell_degrees_lat', meta.get('cell_degrees')))
+        self.cell_lon = float(meta.get('cell_degrees_lon', meta.get('cell_degrees')))
+        
+        self.raster = np.load(path, mmap_mode='r')
+        self.rows, self.cols = self.raster.shape
+        self.sat = self._load_sat()
+    
+    def _load_sat(self) -> np.ndarray:
+        """Map the summed-area table, building it first if missing or stale."""
+        lock_file = open(f"{self.sat_path}.lock", 'w')
+        try:
+            # One worker builds; the others wait and then map its file
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stale = (
+                not os.path.exists(self.sat_path) or
+                os.path.getmtime(self.sat_path) < os.path.getmtime(self.path)
+            )
+            if stale:
+                logger.info(f"Building population summed-area table {self.sat_path}")
+                build_summed_area_table(self.raster, self.sat_path)
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+        
+        sat = np.load(self.sat_path, mmap_mode='r')
+        if sat.shape != (self.rows + 1, self.cols + 1):
+            raise ValueError(f"Summed-area table {self.sat_path} does not match the raster")
+        return sat
+    
+    @property
+    def bounds(self) -> Tuple[float, float, float, float]:
+        """(south, west, north, east) edges of the raster."""
+        return (
+            self.north - self.rows * self.cell_lat,
+            self.west,
+            self.north,
+            self.west + self.cols * self.cell_lon
+        )
+    
+    def covers(self, lat: float, lon: float) -> bool:
+        south, west, north, east = self.bounds
+        return south <= lat <= north and west <= lon <= east
+    
+    def rect_sum(self, row0: int, row1: int, col0: int, col1: int) -> float:
+        """Population of rows [row0, row1) x columns [col0, col1), clipped to the raster."""
+        row0, row1 = max(row0, 0), min(row1, self.rows)
+        col0, col1 = max(col0, 0), min(col1, self.cols)
+        if row0 >= row1 or col0 >= col1:
+            return 0.0
+        s = self.sat
+        return float(s[row1, col1] - s[row0, col1] - s[row1, col0] + s[row0, col0])
+    
+    def _row_spans(self, rows: np.ndarray, col0: np.ndarray, col1: np.ndarray) -> float:
+        """Sum of row spans [col0, col1) for each row, one SAT lookup per row."""
+        keep = (rows >= 0) & (rows < self.rows)
+        rows = rows[keep]
+        col0 = np.clip(col0[keep], 0, self.cols)
+        col1 = np.clip(col1[keep], 0, self.cols)
+        keep = col1 > col0
+        rows, col0, col1 = rows[keep], col0[keep], col1[keep]
+        if not len(rows):
+            return 0.0
+        s = self.sat
+        return float(np.sum(s[rows + 1, col1] - s[rows, col1] - s[rows + 1, col0] + s[rows, col0]))
+    
+    def circle_sum(self, lat: float, lon: float, radius_km: float) -> float:
+        """Population within `radius_km` of a point."""
+        km_per_cell_lat = self.cell_lat * KM_PER_DEG_LAT
+        km_per_cell_lon = self.cell_lon * KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6)
+        
+        center_row = (self.north - lat) / self.cell_lat
+        center_col = (lon - self.west) / self.cell_lon
+        
+        # Rows whose centers are within the radius
+        reach = radius_km / km_per_cell_lat
+        rows = np.arange(math.ceil(center_row - reach - 0.5), math.floor(center_row + reach - 0.5) + 1)
+        dy_km = (rows + 0.5 - center_row) * km_per_cell_lat
+        half_width = np.sqrt(np.maximum(radius_km ** 2 - dy_km ** 2, 0)) / km_per_cell_lon
+        
+        # Columns whose centers are within each row's chord
+        col0 = np.ceil(center_col - half_width - 0.5).astype(np.int64)
+        col1 = np.floor(center_col + half_width - 0.5).astype(np.int64) + 1
+        total = self._row_spans(rows.astype(np.int64), col0, col1)
+        
+        if total == 0.0 and 0 <= center_row < self.rows and 0 <= center_col < self.cols:
+            # Circle smaller than a cell: share of the cell it sits in
+            cell = float(np.nan_to_num(self.raster[int(center_row), int(center_col)]))
+            share = math.pi * radius_km ** 2 / (km_per_cell_lat * km_per_cell_lon)
+            total = max(cell, 0.0) * min(share, 1.0)
+        return total
+    
+    def polygon_sum(self, points: Sequence[Tuple[float, float]]) -> float:
+        """Population inside a polygon of (lat, lon) vertices (scanline per row)."""
+        if len(points) < 3:
+            return 0.0
+        pts = np.asarray(points, dtype=np.float64)
+        y = (self.north - pts[:, 0]) / self.cell_lat
+        x = (pts[:, 1] - self.west) / self.cell_lon
+        y0, x0 = y, x
+        y1, x1 = np.roll(y, -1), np.roll(x, -1)
+        
+        rows, col0, col1 = [], [], []
+        for row in range(max(int(math.floor(y.min())), 0), min(int(math.ceil(y.max())), self.rows)):
+            yc = row + 0.5
+            crosses = (y0 <= yc) != (y1 <= yc)
+            if not crosses.any():
+                continue
+            xs = np.sort(
+                x0[crosses] + (yc - y0[crosses]) * (x1[crosses] - x0[crosses]) / (y1[crosses] - y0[crosses])
+            )
+            for start, stop in zip(xs[0::2], xs[1::2]):
+                rows.append(row)
+                col0.append(math.ceil(start - 0.5))
+                col1.append(math.floor(stop - 0.5) + 1)
+        
+        if not rows:
+            return 0.0
+        return self._row_spans(np.array(rows), np.array(col0), np.array(col1))
+
+
+class PopulationModel:
+    """
+    Affected-population lookups for the agents.
+    
+    Loads the configured raster in the background at startup; until it is
+    ready, or for locations it does not cover, lookups return None and
+    callers fall back to their density heuristics.
+    """
+    
+    def __init__(self, path: str = "", sat_path: str = ""):
+        self.path = path
+        self.sat_path = sat_path
+        self.raster: Optional[PopulationRaster] = None
+        self._lock = threading.Lock()
+    
+    def load(self) -> None:
+        """Map the raster (building its summed-area table if needed)."""
+        if not self.path:
+            return
+        try:
+            raster = PopulationRaster(self.path, self.sat_path)
+        except Exception as e:
+            logger.error(f"Population raster unavailable, using density estimates: {str(e)}")
+            return
+        with self._lock:
+            self.raster = raster
+        logger.info(f"Population raster loaded: {raster.rows}x{raster.cols} cells")
+    
+    def in_circle(self, lat: float, lon: float, radius_km: float) -> Optional[float]:
+        """Population within `radius_km` of a point, or None without coverage."""
+        raster = self.raster
+        if raster is None or not raster.covers(lat, lon):
+            return None
+        return raster.circle_sum(lat, lon, radius_km)
+    
+    def in_polygon(self, points: List[Tuple[float, float]]) -> Optional[float]:
+        """Population inside a polygon of (lat, lon) vertices, or None without coverage."""
+        raster = self.raster
+        if raster is None or not all(raster.covers(lat, lon) for lat, lon in points):
+            return None
+        return raster.polygon_sum(points)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Raster status for monitoring."""
+        raster = self.raster
+        return {
+            'loaded': raster is not None,
+            'path': self.path or None,
+            'cells': raster.rows * raster.cols if raster is not None else 0
+        }
+
+
+# Global population model
+population_model = PopulationModel(settings.POPULATION_RASTER_PATH, settings.POPULATION_SAT_PATH)
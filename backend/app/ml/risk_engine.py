@@ -0,0 +1,261 @@
+"""Vectorized flood risk scoring for many locations at once."""
+from typing import Any, Dict, List, Optional, Sequence
+from app.ml.risk_model import (
+    RiskModelServer, risk_model_server, BASIC_WEIGHTS, ENSEMBLE_WEIGHTS, NEUTRAL_HISTORICAL_SCORE
+)
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Risk level names, indexed by level code
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+# Lower score bound of medium, high and critical
+RISK_LEVEL_THRESHOLDS = (0.35, 0.65, 0.85)
+
+# ZyndAgentWrapper rule-based analysis
+FALLBACK_WEIGHTS = {'rainfall': 0.4, 'saturation': 0.3, 'river': 0.3}
+FALLBACK_CONFIDENCE = 0.75
+
+# Risk factor bit flags
+FACTOR_EXTREME_RAINFALL = 1 << 0
+FACTOR_HEAVY_RAINFALL = 1 << 1
+FACTOR_CRITICAL_SATURATION = 1 << 2
+FACTOR_HIGH_SATURATION = 1 << 3
+FACTOR_CRITICAL_RIVER = 1 << 4
+FACTOR_ELEVATED_RIVER = 1 << 5
+
+FACTOR_NAMES = {
+    FACTOR_EXTREME_RAINFALL: 'extreme_rainfall',
+    FACTOR_HEAVY_RAINFALL: 'heavy_rainfall',
+    FACTOR_CRITICAL_SATURATION: 'critical_soil_saturation',
+    FACTOR_HIGH_SATURATION: 'high_soil_saturation',
+    FACTOR_CRITICAL_RIVER: 'critical_river_level',
+    FACTOR_ELEVATED_RIVER: 'elevated_river_level'
+}
+
+
+def _column(values: Any, size: Optional[int] = None, fill: float = 0.0) -> np.ndarray:
+    """float64 column; None becomes a column of `fill`."""
+    if values is None:
+        return np.full(size or 0, fill, dtype=np.float64)
+    return np.asarray(values, dtype=np.float64)
+
+
+def risk_level_codes(scores: np.ndarray) -> np.ndarray:
+    """Map scores to level codes (indexes into RISK_LEVELS)."""
+    return np.searchsorted(RISK_LEVEL_THRESHOLDS, scores, side='right').astype(np.int8)
+
+
+def risk_level_names(codes: np.ndarray) -> np.ndarray:
+    """Map level codes to level names."""
+    return np.asarray(RISK_LEVELS)[codes]
+
+
+class RiskBatch:
+    """Columnar risk scores for a batch of locations."""
+    
+    def __init__(
+        self,
+        rainfall: np.ndarray,
+        saturation: np.ndarray,
+        river_level: np.ndarray,
+        basic: np.ndarray,
+        zynd: np.ndarray,
+        historical: np.ndarray,
+        score: np.ndarray,
+        level: np.ndarray,
+        factors: np.ndarray
+    ):
+        self.rainfall = rainfall
+        self.saturation = saturation
+        self.river_level = river_level
+        self.basic = basic
+        self.zynd = zynd
+        self.historical = historical
+        self.score = score
+        self.level = level
+        self.factors = factors
+    
+    def __len__(self) -> int:
+        return len(self.score)
+    
+    def level_names(self) -> np.ndarray:
+        """Risk level name per location."""
+        return risk_level_names(self.level)
+    
+    def factor_labels(self, index: int) -> List[str]:
+        """Risk factor descriptions for one location, as PredictionAgent lists them."""
+        flags = int(self.factors[index])
+        rainfall = float(self.rainfall[index])
+        saturation = float(self.saturation[index])
+        river_level = float(self.river_level[index])
+        
+        labels = []
+        if flags & FACTOR_EXTREME_RAINFALL:
+            labels.append(f"Extreme rainfall ({rainfall} mm/h)")
+        elif flags & FACTOR_HEAVY_RAINFALL:
+            labels.append(f"Heavy rainfall ({rainfall} mm/h)")
+        
+        if flags & FACTOR_CRITICAL_SATURATION:
+            labels.append(f"Critical soil saturation ({saturation * 100:.0f}%)")
+        elif flags & FACTOR_HIGH_SATURATION:
+            labels.append(f"High soil saturation ({saturation * 100:.0f}%)")
+        
+        if flags & FACTOR_CRITICAL_RIVER:
+            labels.append(f"Critical river level ({river_level}m)")
+        elif flags & FACTOR_ELEVATED_RIVER:
+            labels.append(f"Elevated river level ({river_level}m)")
+        
+        return labels or ["Normal conditions"]
+
+
+class RiskEngine:
+    """
+    Batch equivalent of the scalar risk scoring in PredictionAgent and
+    ZyndAgentWrapper.
+    
+    Inputs are columns (one entry per location); every step is a single
+    vectorized NumPy pass, and results match the scalar functions. The
+    final score comes from the served risk model (the weighted formula
+    unless a trained model is loaded).
+    """
+    
+    def __init__(self, model: Optional[RiskModelServer] = None):
+        self.model = model or risk_model_server
+    
+    def basic_scores(
+        self,
+        rainfall: np.ndarray,
+        saturation: np.ndarray,
+        river_level: np.ndarray
+    ) -> np.ndarray:
+        """PredictionAgent._basic_risk_score for every location."""
+        return (
+            np.minimum(rainfall / 100, 1.0) * BASIC_WEIGHTS['rainfall'] +
+            saturation * BASIC_WEIGHTS['saturation'] +
+            np.minimum(river_level / 10, 1.0) * BASIC_WEIGHTS['river']
+        )
+    
+    def fallback_analysis(
+        self,
+        rainfall: Any,
+        saturation: Any,
+        river_level: Any
+    ) -> Dict[str, np.ndarray]:
+        """
+        ZyndAgentWrapper._fallback_analysis for every location.
+        
+        Returns:
+            Columns: risk_score, level (codes), confidence and the three
+            factor impacts
+        """
+        rainfall = _column(rainfall)
+        saturation = _column(saturation)
+        river_level = _column(river_level)
+        
+        risk_score = (
+            (rainfall / 100) * FALLBACK_WEIGHTS['rainfall'] +
+            saturation * FALLBACK_WEIGHTS['saturation'] +
+            (river_level / 10) * FALLBACK_WEIGHTS['river']
+        )
+        return {
+            'risk_score': risk_score,
+            'level': risk_level_codes(risk_score),
+            'confidence': np.full(len(risk_score), FALLBACK_CONFIDENCE),
+            'rainfall_impact': rainfall / 100,
+            'saturation_impact': saturation,
+            'river_impact': river_level / 10
+        }
+    
+    def risk_factors(
+        self,
+        rainfall: np.ndarray,
+        saturation: np.ndarray,
+        river_level: np.ndarray
+    ) -> np.ndarray:
+        """Bit mask of FACTOR_* flags per location."""
+        factors = np.zeros(len(rainfall), dtype=np.uint8)
+        factors |= np.where(rainfall > 50, FACTOR_EXTREME_RAINFALL, 0).astype(np.uint8)
+        factors |= np.where((rainfall > 30) & (rainfall <= 50), FACTOR_HEAVY_RAINFALL, 0).astype(np.uint8)
+        factors |= np.where(saturation > 0.85, FACTOR_CRITICAL_SATURATION, 0).astype(np.uint8)
+        factors |= np.where(
+            (saturation > 0.70) & (saturation <= 0.85), FACTOR_HIGH_SATURATION, 0
+        ).astype(np.uint8)
+        factors |= np.where(river_level > 8, FACTOR_CRITICAL_RIVER, 0).astype(np.uint8)
+        factors |= np.where((river_level > 6) & (river_level <= 8), FACTOR_ELEVATED_RIVER, 0).astype(np.uint8)
+        return factors
+    
+    def score(
+        self,
+        rainfall: Any,
+        saturation: Any,
+        river_level: Any,
+        historical: Optional[Any] = None,
+        zynd_scores: Optional[Any] = None
+    ) -> RiskBatch:
+        """
+        Score every location.
+        
+        Args:
+            rainfall: mm/h per location
+            saturation: Soil saturation (0-1) per location
+            river_level: Meters per location
+            historical: Mean historical severity per location (NaN or None
+                = no history, scored neutral)
+            zynd_scores: ZYND risk score per location (NaN = ZYND gave no
+                score, so the basic score is used). None uses the rule-based
+                ZYND analysis, as the scalar path does when ZYND is offline.
+        
+        Returns:
+            RiskBatch with model scores, level codes and factor masks
+        """
+        rainfall = _column(rainfall)
+        saturation = _column(saturation)
+        river_level = _column(river_level)
+        size = len(rainfall)
+        
+        basic = self.basic_scores(rainfall, saturation, river_level)
+        
+        if zynd_scores is None:
+            zynd = self.fallback_analysis(rainfall, saturation, river_level)['risk_score']
+        else:
+            zynd = _column(zynd_scores)
+            zynd = np.where(np.isnan(zynd), basic, zynd)
+        
+        historical = _column(historical, size, np.nan)
+        historical = np.where(np.isnan(historical), NEUTRAL_HISTORICAL_SCORE, historical)
+        
+        score = self.model.predict(np.column_stack([rainfall, saturation, river_level, zynd, historical]))
+        
+        return RiskBatch(
+            rainfall=rainfall,
+            saturation=saturation,
+            river_level=river_level,
+            basic=basic,
+            zynd=zynd,
+            historical=historical,
+            score=score,
+            level=risk_level_codes(score),
+            factors=self.risk_factors(rainfall, saturation, river_level)
+        )
+    
+    def score_contexts(self, contexts: Sequence[Dict[str, Any]]) -> RiskBatch:
+        """Score PredictionAgent contexts (dicts) in one pass."""
+        def historical_mean(context: Dict[str, Any]) -> float:
+            history = context.get('historical_data') or []
+            if not history:
+                return np.nan
+            return float(np.mean([h.get('severity', 0.5) for h in history]))
+        
+        return self.score(
+            rainfall=[c.get('rainfall', 0) for c in contexts],
+            saturation=[c.get('soil_saturation', 0) for c in contexts],
+            river_level=[c.get('river_level', 0) for c in contexts],
+            historical=[historical_mean(c) for c in contexts]
+        )
+
+
+# Global risk engine
+risk_engine = RiskEngine()
@@ -0,0 +1,283 @@
+"""Risk model serving: a trained scikit-learn model with the weighted formula as fallback."""
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import settings
+import json
+import os
+import threading
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Model inputs, in column order
+MODEL_FEATURES = ('rainfall', 'soil_saturation', 'river_level', 'zynd_score', 'historical_score')
+
+# PredictionAgent basic weighted score
+BASIC_WEIGHTS = {'rainfall': 0.35, 'saturation': 0.30, 'river': 0.35}
+
+# Ensemble of basic, ZYND and historical scores
+ENSEMBLE_WEIGHTS = {'basic': 0.3, 'zynd': 0.5, 'historical': 0.2}
+
+# Neutral historical score when there is no history
+NEUTRAL_HISTORICAL_SCORE = 0.5
+
+# Files of a saved model version
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+
+# Flattened tree ensemble: one .npy per node array, memory-mapped at load
+TREE_DIR = "trees"
+TREE_ARRAYS = ('feature', 'threshold', 'children_left', 'children_right', 'value', 'roots')
+
+# Samples walked through the trees per pass (bounds the samples x trees node matrix)
+TREE_CHUNK_ROWS = 2048
+
+
+class WeightedRiskModel:
+    """The hand-tuned weighted formula, kept as the fallback model."""
+    
+    name = "weighted"
+    version = "builtin"
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Risk scores for a batch.
+        
+        Args:
+            features: (n, len(MODEL_FEATURES)) array
+        
+        Returns:
+            (n,) scores in [0, 1]
+        """
+        rainfall, saturation, river_level, zynd, historical = np.asarray(features, dtype=np.float64).T
+        basic = (
+            np.minimum(rainfall / 100, 1.0) * BASIC_WEIGHTS['rainfall'] +
+            saturation * BASIC_WEIGHTS['saturation'] +
+            np.minimum(river_level / 10, 1.0) * BASIC_WEIGHTS['river']
+        )
+        return np.clip(
+            basic * ENSEMBLE_WEIGHTS['basic'] +
+            zynd * ENSEMBLE_WEIGHTS['zynd'] +
+            historical * ENSEMBLE_WEIGHTS['historical'],
+            0.0, 1.0
+        )
+
+
+def save_tree_arrays(estimator: Any, directory: str) -> Optional[Dict[str, Any]]:
+    """
+    Write a fitted tree ensemble regressor as flat node arrays.
+    
+    Nodes of every tree are concatenated, children renumbered to global
+    indices (-1 at leaves) and each tree's root listed in `roots`, so
+    workers can memory-map the arrays instead of unpickling sklearn Trees.
+    
+    Args:
+        estimator: Fitted GradientBoostingRegressor or RandomForestRegressor
+        directory: Model version directory
+    
+    Returns:
+        The ensemble parameters to store under meta.json "trees", or None
+        for estimators that are not supported (served from the joblib file)
+    """
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    
+    if isinstance(estimator, GradientBoostingRegressor):
+        trees = [stage[0] for stage in estimator.estimators_]
+        # Regression losses use the identity link: init + learning_rate * sum(trees)
+        n_features = estimator.n_features_in_
+        baseline = 0.0 if estimator.init_ == 'zero' else float(
+            np.ravel(estimator.init_.predict(np.zeros((1, n_features))))[0]
+        )
+        scale = float(estimator.learning_rate)
+    elif isinstance(estimator, RandomForestRegressor):
+        trees = list(estimator.estimators_)
+        baseline = 0.0
+        scale = 1.0 / len(trees)
+    else:
+        return None
+    
+    arrays: Dict[str, List[np.ndarray]] = {name: [] for name in TREE_ARRAYS}
+    offset = 0
+    for tree in (t.tree_ for t in trees):
+        leaf = tree.children_left < 0
+        arrays['feature'].append(tree.feature.astype(np.int32))
+        arrays['threshold'].append(tree.threshold.astype(np.float64))
+        arrays['children_left'].append(np.where(leaf, -1, tree.children_left + offset).astype(np.int32))
+        arrays['children_right'].append(np.where(leaf, -1, tree.children_right + offset).astype(np.int32))
+        arrays['value'].append(tree.value.reshape(tree.node_count).astype(np.float64))
+        arrays['roots'].append(np.array([offset], dtype=np.int32))
+        offset += tree.node_count
+    
+    os.makedirs(os.path.join(directory, TREE_DIR), exist_ok=True)
+    for name, parts in arrays.items():
+        np.save(os.path.join(directory, TREE_DIR, f"{name}.npy"), np.concatenate(parts))
+    return {'trees': len(trees), 'nodes': offset, 'baseline': baseline, 'scale': scale}
+
+
+class TreeEnsemble:
+    """
+    A tree ensemble regressor evaluated from memory-mapped node arrays.
+    
+    Every worker maps the same read-only .npy files, so the model is
+    shared through the page cache rather than copied per process.
+    Predictions match sklearn's: inputs are compared as float32, and a
+    sample goes left when its feature is <= the node threshold.
+    """
+    
+    def __init__(self, directory: str, params: Dict[str, Any]):
+        for name in TREE_ARRAYS:
+            setattr(self, name, np.load(os.path.join(directory, TREE_DIR, f"{name}.npy"), mmap_mode='r'))
+        self.baseline = float(params['baseline'])
+        self.scale = float(params['scale'])
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        # sklearn trees split on float32 inputs
+        features = np.asarray(features, dtype=np.float32).astype(np.float64)
+        out = np.empty(len(features), dtype=np.float64)
+        
+        for start in range(0, len(features), TREE_CHUNK_ROWS):
+            chunk = features[start:start + TREE_CHUNK_ROWS]
+            rows = np.arange(len(chunk))[:, None]
+            # Walk every (sample, tree) pair down one level per pass
+            node = np.broadcast_to(self.roots, (len(chunk), len(self.roots))).copy()
+            while True:
+                left = self.children_left[node]
+                leaf = left < 0
+                if leaf.all():
+                    break
+                go_left = chunk[rows, self.feature[node]] <= self.threshold[node]
+                node = np.where(leaf, node, np.where(go_left, left, self.children_right[node]))
+            out[start:start + len(chunk)] = self.baseline + self.scale * self.value[node].sum(axis=1)
+        
+        return out
+
+
+class SklearnRiskModel:
+    """
+    A trained scikit-learn estimator saved by train_risk_model.py.
+    
+    Tree ensembles are served from their memory-mapped node arrays
+    (TreeEnsemble), shared by every worker; other estimators are
+    unpickled from the joblib file once per worker process.
+    """
+    
+    name = "sklearn"
+    
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if tuple(self.meta.get('features', ())) != MODEL_FEATURES:
+            raise ValueError(f"Model {directory} was trained on features {self.meta.get('features')}")
+        
+        self.version = self.meta.get('version', os.path.basename(directory))
+        if self.meta.get('trees'):
+            self.estimator: Any = TreeEnsemble(directory, self.meta['trees'])
+        else:
+            import joblib
+            self.estimator = joblib.load(os.path.join(directory, MODEL_FILE))
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        features = np.asarray(features, dtype=np.float64)
+        if hasattr(self.estimator, 'predict_proba'):
+            scores = self.estimator.predict_proba(features)[:, 1]
+        else:
+            scores = self.estimator.predict(features)
+        return np.clip(scores, 0.0, 1.0)
+
+
+def resolve_model_dir(path: str, version: str = "latest") -> Optional[str]:
+    """Directory of a model version under `path` ("latest" = last by name)."""
+    if not path or not os.path.isdir(path):
+        return None
+    if version != "latest":
+        directory = os.path.join(path, version)
+        return directory if os.path.isdir(directory) else None
+    versions = sorted(
+        name for name in os.listdir(path)
+        if os.path.isfile(os.path.join(path, name, META_FILE))
+    )
+    return os.path.join(path, versions[-1]) if versions else None
+
+
+class RiskModelServer:
+    """
+    Serves the active risk model in-process.
+    
+    The trained model is loaded once at startup; without one, or if it
+    fails at inference time, batches are scored by WeightedRiskModel.
+    """
+    
+    def __init__(self, path: str = "", version: str = "latest"):
+        self.path = path
+        self.version = version
+        self.fallback = WeightedRiskModel()
+        self.model: Optional[SklearnRiskModel] = None
+        self.loaded_at: Optional[str] = None
+        self._lock = threading.Lock()
+        
+        # Metrics
+        self.predictions = 0
+        self.fallbacks = 0
+        self.errors = 0
+    
+    def load(self) -> None:
+        """Load the configured model version (keeps the fallback if there is none)."""
+        directory = resolve_model_dir(self.path, self.version)
+        if directory is None:
+            if self.path:
+                logger.warning(f"No risk model version '{self.version}' under {self.path}; using weighted fallback")
+            return
+        try:
+            model = SklearnRiskModel(directory)
+        except Exception as e:
+            logger.error(f"Failed to load risk model from {directory}, using weighted fallback: {str(e)}")
+            return
+        with self._lock:
+            self.model = model
+            self.loaded_at = datetime.utcnow().isoformat()
+        logger.info(f"Risk model {model.version} loaded from {directory}")
+    
+    @property
+    def active(self) -> Any:
+        return self.model or self.fallback
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Score a batch with the active model.
+        
+        Args:
+            features: (n, len(MODEL_FEATURES)) array, columns as MODEL_FEATURES
+        
+        Returns:
+            (n,) risk scores in [0, 1]
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        self.predictions += len(features)
+        
+        model = self.model
+        if model is not None:
+            try:
+                return model.predict(features)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Risk model {model.version} failed, using weighted fallback: {str(e)}")
+        
+        self.fallbacks += len(features)
+        return self.fallback.predict(features)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Active model and usage counts for monitoring."""
+        active = self.active
+        return {
+            'model': active.name,
+            'version': active.version,
+            'loaded_at': self.loaded_at,
+            'predictions': self.predictions,
+            'fallback_predictions': self.fallbacks,
+            'errors': self.errors
+        }
+
+
+# Global model server (loaded at startup)
+risk_model_server = RiskModelServer(settings.RISK_MODEL_PATH, settings.RISK_MODEL_VERSION)
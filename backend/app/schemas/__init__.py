@@ -10,7 +10,9 @@ from app.schemas.incident import (
 from app.schemas.prediction import (
     PredictionCreate,
     PredictionResponse,
-    GeneratePredictionRequest
+    GeneratePredictionRequest,
+    GenerateBatchPredictionRequest,
+    RiskGridRequest
 )
 from app.schemas.alert import (
     AlertCreate,
@@ -27,6 +29,8 @@ __all__ = [
     "PredictionCreate",
     "PredictionResponse",
     "GeneratePredictionRequest",
+    "GenerateBatchPredictionRequest",
+    "RiskGridRequest",
     "AlertCreate",
     "AlertResponse",
 ]
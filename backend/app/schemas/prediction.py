@@ -47,3 +47,20 @@ class GeneratePredictionRequest(BaseModel):
     region: str = Field(..., min_length=3)
     latitude: float = Field(..., ge=-90, le=90)
     longitude: float = Field(..., ge=-180, le=180)
+    # Density class for the population estimate where no raster covers the location
+    area_type: Optional[str] = Field(None, pattern="^(urban|suburban|rural)$")
+
+
+class GenerateBatchPredictionRequest(BaseModel):
+    """Request to generate predictions for many regions in one sweep."""
+    regions: List[GeneratePredictionRequest] = Field(..., min_length=1, max_length=100)
+
+
+class RiskGridRequest(BaseModel):
+    """Request for a deterministic risk surface over a bounding box."""
+    min_lat: float = Field(..., ge=-90, le=90)
+    min_lon: float = Field(..., ge=-180, le=180)
+    max_lat: float = Field(..., ge=-90, le=90)
+    max_lon: float = Field(..., ge=-180, le=180)
+    cell_size_km: float = Field(1.0, gt=0, le=50)
+    include_forecast: bool = False  # add each cell's forecast peak water level
@@ -0,0 +1,39 @@
+"""Background services (job queue, data ingestion, sensor history, weather provider)."""
+from app.services.jobs import (
+    JobQueue,
+    JobStore,
+    SQLiteJobStore,
+    RedisJobStore,
+    job_queue,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JOB_FAILED
+)
+from app.services.timeseries import TimeSeriesStore, timeseries_store, RESOLUTIONS
+from app.services.sensors import RingBuffer, Sensor, SensorStore, sensor_store, SENSOR_KINDS
+from app.services.weather import WeatherProvider, weather_provider, geohash_encode, geohash_center
+
+__all__ = [
+    "JobQueue",
+    "JobStore",
+    "SQLiteJobStore",
+    "RedisJobStore",
+    "job_queue",
+    "JOB_QUEUED",
+    "JOB_RUNNING",
+    "JOB_SUCCEEDED",
+    "JOB_FAILED",
+    "TimeSeriesStore",
+    "timeseries_store",
+    "RESOLUTIONS",
+    "RingBuffer",
+    "Sensor",
+    "SensorStore",
+    "sensor_store",
+    "SENSOR_KINDS",
+    "WeatherProvider",
+    "weather_provider",
+    "geohash_encode",
+    "geohash_center",
+]
@@ -0,0 +1,73 @@
+"""
+Local fake weather provider for development and tests.
+
+Serves an OpenWeatherMap-style current weather endpoint with deterministic
+readings per location, optional latency and failure injection, and a
+request counter, so the provider client's pooling, caching and coalescing
+can be exercised without an API key or network access:
+
+    python -m app.services.fake_weather --port 8081 --latency-ms 50
+
+then set WEATHER_API_URL=http://127.0.0.1:8081/data/2.5/weather and any
+OPENWEATHER_API_KEY.
+"""
+from fastapi import FastAPI, HTTPException
+from typing import Any, Dict
+import argparse
+import asyncio
+import hashlib
+import random
+
+
+def fake_conditions(lat: float, lon: float) -> Dict[str, Any]:
+    """Deterministic current weather payload for a location."""
+    seed = hashlib.sha256(f"{lat:.5f},{lon:.5f}".encode()).digest()
+    rng = random.Random(seed)
+    return {
+        'coord': {'lat': lat, 'lon': lon},
+        'weather': [{'main': 'Rain', 'description': 'moderate rain'}],
+        'main': {'temp': round(rng.uniform(22, 32), 1), 'humidity': rng.randint(60, 100)},
+        'rain': {'1h': round(rng.uniform(0, 90), 1)},
+        'soil_saturation': round(rng.uniform(0.3, 0.98), 2),
+        'river_level': round(rng.uniform(2.0, 10.0), 2)
+    }
+
+
+def create_fake_weather_app(latency_ms: float = 0.0, failure_rate: float = 0.0) -> FastAPI:
+    """
+    Build the fake provider app.
+    
+    Args:
+        latency_ms: Delay added to every response
+        failure_rate: Share of requests answered with HTTP 503
+    """
+    app = FastAPI(title="Fake Weather Provider")
+    app.state.requests = 0
+    
+    @app.get("/data/2.5/weather")
+    async def current_weather(lat: float, lon: float, appid: str = "", units: str = "metric"):
+        app.state.requests += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if failure_rate and random.random() < failure_rate:
+            raise HTTPException(status_code=503, detail="Provider unavailable")
+        return fake_conditions(lat, lon)
+    
+    @app.get("/stats")
+    async def stats():
+        return {'requests': app.state.requests}
+    
+    return app
+
+
+if __name__ == '__main__':
+    import uvicorn
+    
+    parser = argparse.ArgumentParser(description="Fake weather provider")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    
+    uvicorn.run(create_fake_weather_app(args.latency_ms, args.failure_rate), host=args.host, port=args.port)
@@ -0,0 +1,583 @@
+"""Durable background job queue with retries, backed by SQLite or Redis."""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def _new_job(kind: str, payload: Dict[str, Any], max_attempts: int) -> Dict[str, Any]:
+    now = time.time()
+    return {
+        'id': uuid.uuid4().hex,
+        'kind': kind,
+        'payload': payload,
+        'status': JOB_QUEUED,
+        'attempts': 0,
+        'max_attempts': max_attempts,
+        'run_at': now,
+        'lease_until': 0.0,
+        'last_error': None,
+        'result': None,
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def _lease_exhausted(job: Dict[str, Any]) -> bool:
+    """A running job whose lease expired on its last allowed attempt (its worker died)."""
+    return job['status'] == JOB_RUNNING and job['attempts'] >= job['max_attempts']
+
+
+def _fail_expired(job: Dict[str, Any], now: float) -> None:
+    job.update(
+        status=JOB_FAILED,
+        lease_until=0.0,
+        last_error=f"Worker lost on attempt {job['attempts']} (lease expired)",
+        updated_at=now
+    )
+    logger.error(f"Job {job['id']} ({job['kind']}) failed: lease expired after {job['attempts']} attempts")
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job record as returned by the status endpoints."""
+    def iso(timestamp: Optional[float]) -> Optional[str]:
+        return datetime.utcfromtimestamp(timestamp).isoformat() if timestamp else None
+    
+    return {
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'attempts': job['attempts'],
+        'max_attempts': job['max_attempts'],
+        'next_attempt_at': iso(job['run_at']) if job['status'] == JOB_QUEUED else None,
+        'last_error': job['last_error'],
+        'result': job['result'],
+        'payload': job['payload'],
+        'created_at': iso(job['created_at']),
+        'updated_at': iso(job['updated_at'])
+    }
+
+
+class JobStore(ABC):
+    """Persistent storage for jobs."""
+    
+    name = "store"
+    
+    @abstractmethod
+    async def add(self, job: Dict[str, Any]) -> None:
+        """Persist a new queued job."""
+    
+    @abstractmethod
+    async def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the next due job and lease it to the caller.
+        
+        Queued jobs whose run_at has passed are due, as are running jobs
+        whose lease expired (their worker died). An expired job that has
+        used all its attempts is marked failed instead, so a job that
+        kills its worker cannot loop forever.
+        """
+    
+    @abstractmethod
+    async def update(self, job: Dict[str, Any]) -> None:
+        """Save a job's new state."""
+    
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job by ID."""
+    
+    @abstractmethod
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent jobs, optionally filtered by status."""
+    
+    @abstractmethod
+    async def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+    
+    async def close(self) -> None:
+        """Release connections."""
+
+
+class SQLiteJobStore(JobStore):
+    """Local on-disk job store; safe to share between worker processes."""
+    
+    name = "sqlite"
+    
+    COLUMNS = (
+        'id', 'kind', 'payload', 'status', 'attempts', 'max_attempts', 'run_at',
+        'lease_until', 'last_error', 'result', 'created_at', 'updated_at'
+    )
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Open the database on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                self.path,
+                check_same_thread=False,
+                isolation_level=None,
+                timeout=10
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL, max_attempts INTEGER NOT NULL, "
+                "run_at REAL NOT NULL, lease_until REAL NOT NULL, last_error TEXT, result TEXT, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_at)"
+            )
+            logger.info(f"SQLite job store opened: {self.path}")
+        return self._conn
+    
+    def _row_to_job(self, row: tuple) -> Dict[str, Any]:
+        job = dict(zip(self.COLUMNS, row))
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+    
+    def _values(self, job: Dict[str, Any]) -> tuple:
+        return tuple(
+            json.dumps(job[column], default=str) if column in ('payload', 'result') and job[column] is not None
+            else job[column]
+            for column in self.COLUMNS
+        )
+    
+    async def add(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._add, job)
+    
+    def _add(self, job: Dict[str, Any]) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock:
+            self.conn.execute(
+                f"INSERT INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                self._values(job)
+            )
+    
+    async def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._claim, lease_seconds)
+    
+    def _claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two processes
+            # cannot claim the same job
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self.conn.execute(
+                        f"SELECT {', '.join(self.COLUMNS)} FROM jobs "
+                        "WHERE (status = ? AND run_at <= ?) OR (status = ? AND lease_until < ?) "
+                        "ORDER BY run_at LIMIT 1",
+                        (JOB_QUEUED, now, JOB_RUNNING, now)
+                    ).fetchone()
+                    if row is None:
+                        self.conn.execute("COMMIT")
+                        return None
+                    
+                    job = self._row_to_job(row)
+                    if not _lease_exhausted(job):
+                        break
+                    _fail_expired(job, now)
+                    self.conn.execute(
+                        "UPDATE jobs SET status = ?, lease_until = ?, last_error = ?, updated_at = ? "
+                        "WHERE id = ?",
+                        (job['status'], job['lease_until'], job['last_error'], job['updated_at'], job['id'])
+                    )
+                
+                job.update(
+                    status=JOB_RUNNING,
+                    attempts=job['attempts'] + 1,
+                    lease_until=now + lease_seconds,
+                    updated_at=now
+                )
+                self.conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (job['status'], job['attempts'], job['lease_until'], job['updated_at'], job['id'])
+                )
+                self.conn.execute("COMMIT")
+                return job
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+    
+    async def update(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._update, job)
+    
+    def _update(self, job: Dict[str, Any]) -> None:
+        columns = self.COLUMNS[1:]
+        values = self._values(job)
+        with self._lock:
+            self.conn.execute(
+                f"UPDATE jobs SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?",
+                values[1:] + (job['id'],)
+            )
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+    
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+    
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._list, status, limit)
+    
+    def _list(self, status: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(query, params + (limit,)).fetchall()
+        return [self._row_to_job(row) for row in rows]
+    
+    async def counts(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self._counts)
+    
+    def _counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+    
+    async def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisJobStore(JobStore):
+    """
+    Job store on Redis, for deployments with several hosts.
+    
+    Jobs are hashes of JSON fields; a sorted set scored by the next due time
+    holds queued and leased jobs, and a second one indexes jobs by creation.
+    """
+    
+    name = "redis"
+    
+    # Pop the first due job and lease it, atomically
+    CLAIM_SCRIPT = """
+    local ids = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+    if #ids == 0 then return nil end
+    redis.call('ZADD', KEYS[1], ARGV[2], ids[1])
+    return ids[1]
+    """
+    
+    def __init__(self, url: str, prefix: str = "zynd:jobs"):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis package not installed")
+        self.client = aioredis.from_url(url)
+        self.prefix = prefix
+        self.due_key = f"{prefix}:due"
+        self.index_key = f"{prefix}:index"
+        self._claim_script = self.client.register_script(self.CLAIM_SCRIPT)
+    
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+    
+    async def add(self, job: Dict[str, Any]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._job_key(job['id']), json.dumps(job, default=str))
+            pipe.zadd(self.due_key, {job['id']: job['run_at']})
+            pipe.zadd(self.index_key, {job['id']: job['created_at']})
+            await pipe.execute()
+    
+    async def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        while True:
+            now = time.time()
+            job_id = await self._claim_script(keys=[self.due_key], args=[now, now + lease_seconds])
+            if job_id is None:
+                return None
+            
+            job = await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+            if job is None:
+                return None
+            if not _lease_exhausted(job):
+                break
+            # The script leased it to us alone, so no other worker races this
+            _fail_expired(job, now)
+            await self.update(job)
+        
+        job.update(
+            status=JOB_RUNNING,
+            attempts=job['attempts'] + 1,
+            lease_until=now + lease_seconds,
+            updated_at=now
+        )
+        await self.client.set(self._job_key(job['id']), json.dumps(job, default=str))
+        return job
+    
+    async def update(self, job: Dict[str, Any]) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self._job_key(job['id']), json.dumps(job, default=str))
+            if job['status'] == JOB_QUEUED:
+                pipe.zadd(self.due_key, {job['id']: job['run_at']})
+            elif job['status'] == JOB_RUNNING:
+                pipe.zadd(self.due_key, {job['id']: job['lease_until']})
+            else:
+                pipe.zrem(self.due_key, job['id'])
+            await pipe.execute()
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(self._job_key(job_id))
+        return json.loads(raw) if raw else None
+    
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        # Filtering happens client-side, so scan a bounded window of recent jobs
+        ids = await self.client.zrevrange(self.index_key, 0, limit * 10 if status else limit - 1)
+        jobs = []
+        for job_id in ids:
+            job = await self.get(job_id.decode() if isinstance(job_id, bytes) else job_id)
+            if job and (not status or job['status'] == status):
+                jobs.append(job)
+                if len(jobs) >= limit:
+                    break
+        return jobs
+    
+    async def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for job in await self.list(limit=1000):
+            counts[job['status']] = counts.get(job['status'], 0) + 1
+        return counts
+    
+    async def close(self) -> None:
+        await self.client.close()
+
+
+class JobQueue:
+    """
+    Run registered job handlers on a pool of asyncio workers.
+    
+    Jobs are persisted before enqueue() returns, so they survive restarts.
+    Failed attempts are retried with exponential backoff and jitter until
+    max_attempts is reached; a job whose worker died is picked up again
+    once its lease expires.
+    """
+    
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        max_attempts: int = 5,
+        retry_base_seconds: float = 2.0,
+        retry_max_seconds: float = 300.0,
+        timeout_seconds: float = 120.0,
+        poll_seconds: float = 1.0
+    ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.timeout_seconds = timeout_seconds
+        self.poll_seconds = poll_seconds
+        
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        # Metrics
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+    
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Register the coroutine function that runs jobs of `kind`."""
+        self._handlers[kind] = handler
+    
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        max_attempts: Optional[int] = None
+    ) -> str:
+        """
+        Persist a job and wake a worker.
+        
+        Args:
+            kind: Registered handler name
+            payload: JSON-serializable handler argument
+            max_attempts: Override of the queue's retry limit
+        
+        Returns:
+            Job ID
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        
+        job = _new_job(kind, payload, max_attempts or self.max_attempts)
+        await self.store.add(job)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        
+        logger.info(f"Job {job['id']} queued ({kind})")
+        return job['id']
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status record, or None if unknown."""
+        job = await self.store.get(job_id)
+        return _public(job) if job else None
+    
+    async def list(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent job status records."""
+        return [_public(job) for job in await self.store.list(status, limit)]
+    
+    def start(self) -> None:
+        """Start the worker pool (call from a running event loop)."""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Job queue started: {self.workers} workers on {self.store.name}")
+    
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are re-run after their lease expires."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.store.close()
+    
+    async def _worker(self, number: int) -> None:
+        while True:
+            try:
+                # The lease outlives the handler timeout, so a live job is never re-claimed
+                job = await self.store.claim(self.timeout_seconds + 30)
+            except Exception as e:
+                logger.error(f"Job worker {number} failed to claim: {str(e)}")
+                job = None
+            
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The job stays leased and is re-claimed once the lease expires
+                logger.error(f"Job worker {number} failed to run job {job['id']}: {str(e)}")
+    
+    async def _run(self, job: Dict[str, Any]) -> None:
+        handler = self._handlers.get(job['kind'])
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+            result = await asyncio.wait_for(handler(job['payload']), self.timeout_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job['last_error'] = str(e) or type(e).__name__
+            job['updated_at'] = time.time()
+            
+            if job['attempts'] < job['max_attempts']:
+                delay = min(
+                    self.retry_max_seconds,
+                    self.retry_base_seconds * 2 ** (job['attempts'] - 1)
+                ) * random.uniform(0.8, 1.2)
+                job['status'] = JOB_QUEUED
+                job['run_at'] = time.time() + delay
+                self.retried += 1
+                logger.warning(
+                    f"Job {job['id']} ({job['kind']}) attempt {job['attempts']} failed, "
+                    f"retrying in {delay:.1f}s: {job['last_error']}"
+                )
+            else:
+                job['status'] = JOB_FAILED
+                self.failed += 1
+                logger.error(
+                    f"Job {job['id']} ({job['kind']}) failed after {job['attempts']} attempts: "
+                    f"{job['last_error']}"
+                )
+            
+            await self.store.update(job)
+            return
+        
+        job.update(status=JOB_SUCCEEDED, result=result, updated_at=time.time())
+        await self.store.update(job)
+        self.succeeded += 1
+        logger.info(f"Job {job['id']} ({job['kind']}) succeeded")
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Worker and outcome counters plus per-status job counts."""
+        return {
+            'backend': self.store.name,
+            'workers': len(self._tasks),
+            'succeeded': self.succeeded,
+            'retried': self.retried,
+            'failed': self.failed,
+            'jobs': await self.store.counts()
+        }
+
+
+def build_job_queue() -> JobQueue:
+    """Build the job queue from settings (Redis if configured and installed)."""
+    store: Optional[JobStore] = None
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        try:
+            store = RedisJobStore(settings.REDIS_URL)
+        except Exception as e:
+            logger.warning(f"Redis job store unavailable ({str(e)}), using SQLite")
+    if store is None:
+        store = SQLiteJobStore(settings.JOB_QUEUE_SQLITE_PATH)
+    
+    return JobQueue(
+        store,
+        workers=settings.JOB_WORKERS,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        retry_base_seconds=settings.JOB_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.JOB_RETRY_MAX_SECONDS,
+        timeout_seconds=settings.JOB_TIMEOUT_SECONDS,
+        poll_seconds=settings.JOB_POLL_SECONDS
+    )
+
+
+# Global job queue (workers are started with the application)
+job_queue = build_job_queue()
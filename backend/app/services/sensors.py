@@ -0,0 +1,586 @@
+"""Sensor reading ingestion: in-memory ring buffers with bulk database flushes."""
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from app.config import settings
+from app.database import get_service_client
+from app.ml.kalman import gauge_registry
+from app.services.timeseries import TimeSeriesStore, timeseries_store
+import asyncio
+import csv
+import io
+import json
+import math
+import threading
+import time
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Accepted sensor kinds (match the prediction context keys)
+SENSOR_KINDS = ('rainfall', 'soil_saturation', 'river_level')
+
+# Verification sensor_data key per kind
+SENSOR_DATA_KEYS = {
+    'rainfall': 'rainfall_sensors',
+    'soil_saturation': 'soil_sensors',
+    'river_level': 'river_sensors'
+}
+
+# Kilometers per degree of latitude
+KM_PER_DEG_LAT = 110.574
+
+# Rejected rows reported back per ingest call
+MAX_REPORTED_ERRORS = 20
+
+# Readings buffered per acquisition of the store lock
+INGEST_CHUNK_ROWS = 256
+
+
+def _parse_timestamp(value: Any) -> float:
+    """Epoch seconds from a number, an ISO 8601 string (naive = UTC) or None (now)."""
+    if value is None or value == '':
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        return (parsed - datetime(1970, 1, 1)).total_seconds()
+    return parsed.timestamp()
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return None if value is None or value == '' else float(value)
+
+
+def _report(errors: List[Dict[str, Any]], row: int, error: Exception) -> None:
+    """Keep the first MAX_REPORTED_ERRORS rejections."""
+    if len(errors) < MAX_REPORTED_ERRORS:
+        errors.append({'row': row, 'error': str(error)})
+
+
+def parse_ndjson(text: str) -> Iterator[str]:
+    """Reading lines of newline-delimited JSON (decoded per row by ingest)."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            yield line
+
+
+def parse_csv(text: str) -> Iterator[Dict[str, Any]]:
+    """Readings from CSV with a header row (sensor_id, kind, value, timestamp, latitude, longitude)."""
+    yield from csv.DictReader(io.StringIO(text))
+
+
+class RingBuffer:
+    """
+    The most recent `capacity` readings of one sensor.
+    
+    Values and timestamps live in preallocated float64 arrays written in a
+    circle; a running sum makes latest() and mean() O(1). The sum is
+    recomputed once per lap so floating-point drift cannot accumulate.
+    """
+    
+    __slots__ = ('capacity', 'values', 'times', 'head', 'count', 'total')
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.values = np.zeros(self.capacity, dtype=np.float64)
+        self.times = np.zeros(self.capacity, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+    
+    def append(self, value: float, timestamp: float) -> None:
+        i = self.head
+        if self.count == self.capacity:
+            self.total -= self.values[i]
+        else:
+            self.count += 1
+        self.values[i] = value
+        self.times[i] = timestamp
+        self.total += value
+        
+        self.head = (i + 1) % self.capacity
+        if self.head == 0:
+            self.total = float(self.values[:self.count].sum())
+    
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """(timestamp, value) of the last reading, or None if empty."""
+        if not self.count:
+            return None
+        i = self.head - 1
+        return float(self.times[i]), float(self.values[i])
+    
+    def mean(self) -> Optional[float]:
+        """Mean of the buffered window, or None if empty."""
+        return self.total / self.count if self.count else None
+    
+    def window(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values) of the buffered readings, oldest first."""
+        if self.count < self.capacity:
+            return self.times[:self.count].copy(), self.values[:self.count].copy()
+        order = np.r_[self.head:self.capacity, 0:self.head]
+        return self.times[order], self.values[order]
+
+
+class Sensor:
+    """One physical sensor and its recent readings."""
+    
+    __slots__ = ('sensor_id', 'kind', 'latitude', 'longitude', 'buffer')
+    
+    def __init__(self, sensor_id: str, kind: str, latitude: float, longitude: float, capacity: int):
+        self.sensor_id = sensor_id
+        self.kind = kind
+        self.latitude = latitude
+        self.longitude = longitude
+        self.buffer = RingBuffer(capacity)
+    
+    def summary(self) -> Dict[str, Any]:
+        latest = self.buffer.latest()
+        return {
+            'sensor_id': self.sensor_id,
+            'kind': self.kind,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'latest': latest[1] if latest else None,
+            'latest_at': datetime.utcfromtimestamp(latest[0]).isoformat() if latest else None,
+            'window_mean': self.buffer.mean(),
+            'window_readings': self.buffer.count
+        }
+
+
+class SensorStore:
+    """
+    Live sensor readings held in memory for the agents.
+    
+    Each sensor keeps a fixed-size ring buffer, and sensors are indexed by
+    a coarse lat/lon cell so "sensors near a point" only visits the cells
+    around it. Ingested rows are also queued and written to the database
+    in bulk by a background flush task (and to the local history store,
+    if any); river readings advance the gauge's Kalman filter as they
+    arrive.
+    """
+    
+    def __init__(
+        self,
+        buffer_size: int = 720,
+        max_sensors: int = 50000,
+        cell_degrees: float = 0.05,
+        radius_km: float = 10.0,
+        max_age_seconds: float = 3600,
+        flush_interval_seconds: float = 30.0,
+        flush_batch_size: int = 1000,
+        max_pending: int = 200000,
+        table: str = "sensor_readings",
+        history: Optional[TimeSeriesStore] = None
+    ):
+        self.buffer_size = buffer_size
+        self.max_sensors = max_sensors
+        self.cell_degrees = cell_degrees
+        self.radius_km = radius_km
+        self.max_age_seconds = max_age_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_batch_size = flush_batch_size
+        self.max_pending = max_pending
+        self.table = table
+        self.history = history
+        
+        self._sensors: Dict[str, Sensor] = {}
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        
+        # Metrics
+        self.ingested = 0
+        self.rejected = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_errors = 0
+    
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+    
+    def _register(
+        self,
+        sensor_id: str,
+        kind: str,
+        lat: Optional[float],
+        lon: Optional[float]
+    ) -> Sensor:
+        """Existing sensor (moved if its location changed) or a new one."""
+        sensor = self._sensors.get(sensor_id)
+        if sensor is not None:
+            if sensor.kind != kind:
+                raise ValueError(f"sensor {sensor_id} reports {sensor.kind}, not {kind}")
+            if lat is not None and lon is not None and (lat, lon) != (sensor.latitude, sensor.longitude):
+                self._cells[self._cell(sensor.latitude, sensor.longitude)].discard(sensor_id)
+                sensor.latitude, sensor.longitude = lat, lon
+                self._cells.setdefault(self._cell(lat, lon), set()).add(sensor_id)
+            return sensor
+        
+        if lat is None or lon is None:
+            raise ValueError(f"unknown sensor {sensor_id} needs latitude and longitude")
+        if len(self._sensors) >= self.max_sensors:
+            raise ValueError(f"sensor limit ({self.max_sensors}) reached")
+        
+        sensor = Sensor(sensor_id, kind, lat, lon, self.buffer_size)
+        self._sensors[sensor_id] = sensor
+        self._cells.setdefault(self._cell(lat, lon), set()).add(sensor_id)
+        return sensor
+    
+    def _parse(self, reading: Any) -> Tuple[str, str, float, float, Optional[float], Optional[float]]:
+        """Decode and validate one reading (no lock needed)."""
+        if isinstance(reading, str):
+            reading = json.loads(reading)
+        if not isinstance(reading, dict):
+            raise ValueError("reading must be an object")
+        sensor_id = str(reading.get('sensor_id') or '').strip()
+        kind = str(reading.get('kind') or '').strip()
+        if not sensor_id:
+            raise ValueError("missing sensor_id")
+        if kind not in SENSOR_KINDS:
+            raise ValueError(f"unknown kind '{kind}'")
+        
+        value = float(reading['value'])
+        if not math.isfinite(value) or value < 0 or (kind == 'soil_saturation' and value > 1):
+            raise ValueError(f"value {value} out of range for {kind}")
+        timestamp = _parse_timestamp(reading.get('timestamp'))
+        
+        lat = _optional_float(reading.get('latitude'))
+        lon = _optional_float(reading.get('longitude'))
+        if lat is not None and not (-90 <= lat <= 90 and -180 <= (lon or 0) <= 180):
+            raise ValueError("location out of range")
+        
+        return sensor_id, kind, value, timestamp, lat, lon
+    
+    def _record(
+        self,
+        sensor_id: str,
+        kind: str,
+        value: float,
+        timestamp: float,
+        lat: Optional[float],
+        lon: Optional[float]
+    ) -> None:
+        """Buffer one parsed reading (caller holds the lock)."""
+        sensor = self._register(sensor_id, kind, lat, lon)
+        sensor.buffer.append(value, timestamp)
+        
+        if len(self._pending) >= self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        self._pending.append({
+            'sensor_id': sensor_id,
+            'kind': kind,
+            'value': value,
+            'latitude': sensor.latitude,
+            'longitude': sensor.longitude,
+            'recorded_at': datetime.utcfromtimestamp(timestamp).isoformat()
+        })
+    
+    def _record_chunk(self, chunk: List[Tuple[int, tuple]], errors: List[Dict[str, Any]]) -> int:
+        """
+        Buffer a chunk of parsed readings, holding the lock only for the
+        chunk; history and gauge updates happen after it is released.
+        
+        Returns:
+            Readings accepted (rejections are reported in `errors`)
+        """
+        recorded = []
+        with self._lock:
+            for row, parsed in chunk:
+                try:
+                    self._record(*parsed)
+                    recorded.append(parsed)
+                except ValueError as e:
+                    _report(errors, row, e)
+        
+        for sensor_id, kind, value, timestamp, _, _ in recorded:
+            if self.history is not None:
+                self.history.append(kind, sensor_id, timestamp, value)
+            if kind == 'river_level':
+                gauge_registry.observe(sensor_id, value, timestamp)
+        return len(recorded)
+    
+    def ingest(self, readings: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Buffer a batch of readings.
+        
+        Each reading (a dict, or an NDJSON line) has sensor_id, kind, value, an optional timestamp
+        (epoch seconds or ISO 8601; default now) and latitude/longitude
+        (required the first time a sensor reports). Invalid rows are
+        rejected individually. Rows are parsed outside the store lock and
+        buffered in chunks of INGEST_CHUNK_ROWS, so lookups from the event
+        loop are never blocked for a whole batch.
+        
+        Returns:
+            Accepted and rejected counts, with the first few errors
+        """
+        accepted = rows = 0
+        errors: List[Dict[str, Any]] = []
+        chunk: List[Tuple[int, tuple]] = []
+        for rows, reading in enumerate(readings, 1):
+            try:
+                chunk.append((rows, self._parse(reading)))
+            except (KeyError, TypeError, ValueError) as e:
+                _report(errors, rows, e)
+            if len(chunk) >= INGEST_CHUNK_ROWS:
+                accepted += self._record_chunk(chunk, errors)
+                chunk = []
+        if chunk:
+            accepted += self._record_chunk(chunk, errors)
+        
+        rejected = rows - accepted
+        with self._lock:
+            self.ingested += accepted
+            self.rejected += rejected
+        
+        errors.sort(key=lambda error: error['row'])
+        return {'accepted': accepted, 'rejected': rejected, 'errors': errors}
+    
+    def ingest_text(self, text: str, fmt: str = "ndjson") -> Dict[str, Any]:
+        """ingest() an NDJSON or CSV request body."""
+        return self.ingest(parse_csv(text) if fmt == "csv" else parse_ndjson(text))
+    
+    def get(self, sensor_id: str) -> Optional[Sensor]:
+        return self._sensors.get(sensor_id)
+    
+    def nearby(
+        self,
+        kind: str,
+        lat: float,
+        lon: float,
+        radius_km: Optional[float] = None,
+        max_age_seconds: Optional[float] = None
+    ) -> List[Sensor]:
+        """Sensors of `kind` within `radius_km` whose last reading is fresh, nearest first."""
+        radius_km = self.radius_km if radius_km is None else radius_km
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        
+        km_per_deg_lon = KM_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6)
+        reach_lat = math.ceil(radius_km / (KM_PER_DEG_LAT * self.cell_degrees))
+        reach_lon = math.ceil(radius_km / (km_per_deg_lon * self.cell_degrees))
+        row, col = self._cell(lat, lon)
+        
+        found = []
+        with self._lock:
+            for r in range(row - reach_lat, row + reach_lat + 1):
+                for c in range(col - reach_lon, col + reach_lon + 1):
+                    for sensor_id in self._cells.get((r, c), ()):
+                        sensor = self._sensors[sensor_id]
+                        if sensor.kind != kind:
+                            continue
+                        latest = sensor.buffer.latest()
+                        if latest is None or latest[0] < cutoff:
+                            continue
+                        dy = (sensor.latitude - lat) * KM_PER_DEG_LAT
+                        dx = (sensor.longitude - lon) * km_per_deg_lon
+                        distance = math.hypot(dx, dy)
+                        if distance <= radius_km:
+                            found.append((distance, sensor))
+        
+        found.sort(key=lambda item: item[0])
+        return [sensor for _, sensor in found]
+    
+    def latest_in_box(
+        self,
+        kind: str,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        max_age_seconds: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Latest fresh reading of every sensor of `kind` inside a bounding box.
+        
+        Returns:
+            (latitudes, longitudes, values, timestamps), one entry per sensor
+        """
+        max_age = self.max_age_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        row0, col0 = self._cell(min_lat, min_lon)
+        row1, col1 = self._cell(max_lat, max_lon)
+        
+        found = []
+        with self._lock:
+            # Visit the box's cells, or every sensor when that is fewer lookups
+            if (row1 - row0 + 1) * (col1 - col0 + 1) <= len(self._sensors):
+                sensor_ids = (
+                    sensor_id
+                    for r in range(row0, row1 + 1)
+                    for c in range(col0, col1 + 1)
+                    for sensor_id in self._cells.get((r, c), ())
+                )
+            else:
+                sensor_ids = iter(self._sensors)
+            for sensor_id in sensor_ids:
+                sensor = self._sensors[sensor_id]
+                if sensor.kind != kind:
+                    continue
+                if not (min_lat <= sensor.latitude <= max_lat and min_lon <= sensor.longitude <= max_lon):
+                    continue
+                latest = sensor.buffer.latest()
+                if latest is None or latest[0] < cutoff:
+                    continue
+                found.append((sensor.latitude, sensor.longitude, latest[1], latest[0]))
+        
+        if not found:
+            return np.empty(0), np.empty(0), np.empty(0), np.empty(0)
+        lat, lon, values, timestamps = np.array(found, dtype=np.float64).T
+        return lat, lon, values, timestamps
+    
+    def readings_near(self, kind: str, lat: float, lon: float) -> List[float]:
+        """Latest reading of each fresh nearby sensor of `kind`."""
+        return [sensor.buffer.latest()[1] for sensor in self.nearby(kind, lat, lon)]
+    
+    def value_near(self, kind: str, lat: float, lon: float) -> Optional[float]:
+        """Mean of the latest nearby readings of `kind`, or None if no sensor reports."""
+        readings = self.readings_near(kind, lat, lon)
+        return sum(readings) / len(readings) if readings else None
+    
+    def sensor_data(self, lat: float, lon: float) -> Dict[str, List[float]]:
+        """VerificationAgent sensor_data for a location ({} when no sensors report)."""
+        data = {
+            SENSOR_DATA_KEYS[kind]: self.readings_near(kind, lat, lon)
+            for kind in SENSOR_KINDS
+        }
+        return data if any(data.values()) else {}
+    
+    def history_near(self, lat: float, lon: float, hours: float = 24) -> Optional[Dict[str, Any]]:
+        """
+        Summary of the last `hours` of readings from sensors near a location.
+        
+        Returns:
+            Per kind: sensors, hours with data, mean/min/max, plus the
+            accumulated rainfall (mm) and river level change (m); None
+            without history
+        """
+        if self.history is None or not self.history.enabled:
+            return None
+        
+        end = time.time()
+        start = end - hours * 3600
+        summary = {}
+        for kind in SENSOR_KINDS:
+            sensor_ids = [s.sensor_id for s in self.nearby(kind, lat, lon, max_age_seconds=hours * 3600)]
+            if not sensor_ids:
+                continue
+            series = self.history.rollup(kind, start, end, '1h', sensor_ids)
+            means = series['mean']
+            if not means:
+                continue
+            
+            stats = {
+                'sensors': len(sensor_ids),
+                'hours_observed': len(means),
+                'mean': round(sum(means) / len(means), 3),
+                'min': min(series['min']),
+                'max': max(series['max'])
+            }
+            if kind == 'rainfall':
+                # Hourly mean intensity (mm/h) over each observed hour
+                stats['total_mm'] = round(sum(means), 1)
+            elif kind == 'river_level':
+                stats['change'] = round(means[-1] - means[0], 3)
+            summary[kind] = stats
+        
+        return {'hours': hours, **summary} if summary else None
+    
+    def summaries(self, kind: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Latest state of up to `limit` sensors."""
+        with self._lock:
+            sensors = [s for s in self._sensors.values() if kind is None or s.kind == kind][:limit]
+            return [sensor.summary() for sensor in sensors]
+    
+    async def flush(self) -> int:
+        """
+        Write buffered history to disk and queued readings to the database
+        in batches.
+        
+        Returns:
+            Rows written to the database; rows of a failed batch are re-queued
+        """
+        if self.history is not None:
+            try:
+                await asyncio.to_thread(self.history.flush)
+            except Exception as e:
+                logger.error(f"Sensor history flush failed: {str(e)}")
+        
+        written = 0
+        while True:
+            with self._lock:
+                batch = [
+                    self._pending.popleft()
+                    for _ in range(min(self.flush_batch_size, len(self._pending)))
+                ]
+            if not batch:
+                return written
+            
+            try:
+                await asyncio.to_thread(self._insert, batch)
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Sensor flush of {len(batch)} readings failed: {str(e)}")
+                with self._lock:
+                    self._pending.extendleft(reversed(batch))
+                return written
+            
+            written += len(batch)
+            self.flushed += len(batch)
+    
+    def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        get_service_client().table(self.table).insert(batch).execute()
+    
+    def start(self) -> None:
+        """Start the periodic flush task (call from a running event loop)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="sensor-flush")
+    
+    async def stop(self) -> None:
+        """Stop the flush task and write what is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+    
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.flush()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Ingestion and flush counters for monitoring."""
+        return {
+            'sensors': len(self._sensors),
+            'ingested': self.ingested,
+            'rejected': self.rejected,
+            'pending': len(self._pending),
+            'flushed': self.flushed,
+            'dropped': self.dropped,
+            'flush_errors': self.flush_errors
+        }
+
+
+# Global sensor store shared by the API and the agents
+sensor_store = SensorStore(
+    buffer_size=settings.SENSOR_BUFFER_SIZE,
+    max_sensors=settings.SENSOR_MAX_SENSORS,
+    cell_degrees=settings.SENSOR_CELL_DEGREES,
+    radius_km=settings.SENSOR_RADIUS_KM,
+    max_age_seconds=settings.SENSOR_MAX_AGE_SECONDS,
+    flush_interval_seconds=settings.SENSOR_FLUSH_INTERVAL_SECONDS,
+    flush_batch_size=settings.SENSOR_FLUSH_BATCH_SIZE,
+    max_pending=settings.SENSOR_MAX_PENDING,
+    history=timeseries_store
+)
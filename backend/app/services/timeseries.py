@@ -0,0 +1,390 @@
+"""Local columnar time-series store for sensor history, with incremental rollups."""
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, unquote
+from app.config import settings
+import math
+import os
+import threading
+import numpy as np
+import logging
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions (name -> bin seconds)
+RESOLUTIONS = {'1m': 60, '15m': 900, '1h': 3600}
+
+DAY_SECONDS = 86400
+
+# Rollup columns
+COUNT, SUM, MIN, MAX = range(4)
+
+# One rollup file per partition: row 0 holds (in COUNT) the raw rows the
+# rollups cover, followed by the bins of each resolution in turn
+ROLLUP_FILE = "rollup.npy"
+ROLLUP_BINS = {name: DAY_SECONDS // seconds for name, seconds in RESOLUTIONS.items()}
+ROLLUP_OFFSETS = dict(zip(ROLLUP_BINS, accumulate(ROLLUP_BINS.values(), initial=1)))
+ROLLUP_ROWS = 1 + sum(ROLLUP_BINS.values())
+
+# Partition holding the rollups of every sensor of a kind ('@' never
+# survives quoting, so it cannot clash with a sensor id)
+ALL_SENSORS = "@all"
+
+# Raw column files (append-only, little-endian)
+TIMESTAMP_FILE, TIMESTAMP_DTYPE = "ts.f8", np.dtype('<f8')
+VALUE_FILE, VALUE_DTYPE = "value.f4", np.dtype('<f4')
+
+
+def _safe_name(name: str) -> str:
+    """Directory name for a sensor id or kind (no separators or dot names)."""
+    return quote(str(name), safe='-_').replace('.', '%2E')
+
+
+def _day_name(day: int) -> str:
+    return (datetime(1970, 1, 1) + timedelta(days=int(day))).strftime('%Y-%m-%d')
+
+
+def _empty_rollup(bins: int) -> np.ndarray:
+    rollup = np.zeros((bins, 4), dtype=np.float64)
+    rollup[:, MIN] = np.inf
+    rollup[:, MAX] = -np.inf
+    return rollup
+
+
+def _covered_rows(rollup: np.ndarray) -> int:
+    return int(rollup[0, COUNT])
+
+
+class TimeSeriesStore:
+    """
+    Sensor readings on local disk, partitioned by kind, UTC day and sensor:
+    
+        <root>/<kind>/<YYYY-MM-DD>/<sensor>/ts.f8, value.f4, rollup.npy
+    
+    Raw readings are appended to two column files. Each partition also has
+    a fixed-size rollup array (count, sum, min, max per 1-minute, 15-minute
+    and hourly bin) updated in place as batches are written, and a per-kind
+    ALL_SENSORS partition rolls up every sensor. Queries memory-map only the
+    partitions of the days they cover.
+    
+    The rollup header records how many raw rows it covers; raw rows past
+    that count (an interrupted write) are ignored by readers and dropped by
+    the next write, so a partition's columns and rollups always agree.
+    
+    Readings are buffered by append() and written by flush(); rows that
+    fail to write are buffered again for the next flush. Partitions are
+    locked while written, so several workers can share one root.
+    """
+    
+    def __init__(self, root: str, max_buffered: int = 200000):
+        self.root = root
+        self.max_buffered = max_buffered
+        self._buffer: Deque[Tuple[str, str, float, float]] = deque()
+        # Rows written to their sensor partition but not yet to ALL_SENSORS
+        self._kind_buffer: Deque[Tuple[str, float, float]] = deque()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        
+        # Metrics
+        self.written = 0
+        self.write_errors = 0
+        self.dropped = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+    
+    def append(self, kind: str, sensor_id: str, timestamp: float, value: float) -> None:
+        """Buffer one reading for the next flush()."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append((kind, sensor_id, timestamp, value))
+    
+    def _partition(self, kind: str, day: int, sensor_id: str) -> str:
+        return os.path.join(self.root, _safe_name(kind), _day_name(day), sensor_id)
+    
+    def _requeue(self, rows: List[tuple], kind_rows: List[tuple]) -> None:
+        """Put failed rows back at the front of the buffers (oldest dropped beyond max_buffered)."""
+        with self._lock:
+            for buffer, failed in ((self._buffer, rows), (self._kind_buffer, kind_rows)):
+                buffer.extendleft(reversed(failed))
+                while len(buffer) > self.max_buffered:
+                    buffer.popleft()
+                    self.dropped += 1
+    
+    def flush(self) -> int:
+        """
+        Write buffered readings (one append and rollup update per partition).
+        
+        A failed partition does not stop the others: its rows are buffered
+        again, and the kind-wide rollups take only the rows that were
+        written (a failed kind-wide update is retried on its own).
+        
+        Returns:
+            Readings written
+        """
+        with self._lock:
+            batch, self._buffer = list(self._buffer), deque()
+            kind_batch, self._kind_buffer = list(self._kind_buffer), deque()
+        if not batch and not kind_batch:
+            return 0
+        
+        kinds = np.array([row[0] for row in batch] + [row[0] for row in kind_batch])
+        sensors = np.array([_safe_name(row[1]) for row in batch] + [''] * len(kind_batch))
+        timestamps = np.array([row[2] for row in batch] + [row[1] for row in kind_batch], dtype=np.float64)
+        values = np.array([row[3] for row in batch] + [row[2] for row in kind_batch], dtype=np.float64)
+        days = np.floor(timestamps / DAY_SECONDS).astype(np.int64)
+        
+        # Kind-wide retries are already in their sensor partitions
+        written = np.zeros(len(kinds), dtype=bool)
+        written[len(batch):] = True
+        failed_kind = np.zeros(len(kinds), dtype=bool)
+        
+        with self._write_lock:
+            for kind in np.unique(kinds):
+                in_kind = kinds == kind
+                for day in np.unique(days[in_kind]):
+                    in_day = in_kind & (days == day)
+                    for sensor in np.unique(sensors[in_day & ~written]):
+                        rows = in_day & (sensors == sensor)
+                        try:
+                            self._write(self._partition(kind, day, sensor), day, timestamps[rows], values[rows])
+                            written |= rows
+                        except Exception as e:
+                            self.write_errors += 1
+                            logger.error(f"Time-series write failed for {kind} {_day_name(day)} {sensor}: {str(e)}")
+                    
+                    # Kind-wide rollups only (no raw columns)
+                    rows = in_day & written
+                    if not rows.any():
+                        continue
+                    try:
+                        self._write(self._partition(kind, day, ALL_SENSORS), day, timestamps[rows], values[rows], raw=False)
+                    except Exception as e:
+                        self.write_errors += 1
+                        failed_kind |= rows
+                        logger.error(f"Time-series rollup failed for {kind} {_day_name(day)}: {str(e)}")
+        
+        raw_written = written[:len(batch)]
+        self._requeue(
+            [row for row, ok in zip(batch, raw_written) if not ok],
+            [(str(kinds[i]), timestamps[i], values[i]) for i in np.nonzero(failed_kind)[0]]
+        )
+        count = int(raw_written.sum())
+        self.written += count
+        return count
+    
+    def _write(
+        self,
+        directory: str,
+        day: int,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+        raw: bool = True
+    ) -> None:
+        """Append to a partition: raw columns, then rollups; raw rows are rolled back on failure."""
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, ".lock"), 'w')
+        try:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            
+            path = os.path.join(directory, ROLLUP_FILE)
+            if not os.path.exists(path):
+                # Readers never see a half-initialized rollup
+                tmp_path = f"{path}.tmp-{os.getpid()}.npy"
+                np.save(tmp_path, _empty_rollup(ROLLUP_ROWS))
+                os.replace(tmp_path, path)
+            rollup = np.load(path, mmap_mode='r+')
+            covered = _covered_rows(rollup)
+            
+            if raw:
+                self._append_columns(directory, covered, timestamps, values)
+            try:
+                updates = self._rollup_updates(rollup, timestamps - day * DAY_SECONDS, values)
+            except Exception:
+                if raw:
+                    self._truncate_columns(directory, covered)
+                raise
+            
+            # Plain assignments of precomputed bins; the header goes last
+            for index, bins in updates:
+                rollup[index] = bins
+            rollup[0, COUNT] = covered + len(timestamps)
+            rollup.flush()
+            del rollup
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+    
+    def _append_columns(self, directory: str, rows: int, timestamps: np.ndarray, values: np.ndarray) -> None:
+        # Drop rows past the committed count so both columns stay row-aligned
+        self._truncate_columns(directory, rows)
+        try:
+            with open(os.path.join(directory, TIMESTAMP_FILE), 'ab') as f:
+                f.write(timestamps.astype(TIMESTAMP_DTYPE).tobytes())
+            with open(os.path.join(directory, VALUE_FILE), 'ab') as f:
+                f.write(values.astype(VALUE_DTYPE).tobytes())
+        except Exception:
+            self._truncate_columns(directory, rows)
+            raise
+    
+    def _truncate_columns(self, directory: str, rows: int) -> None:
+        for name, dtype in ((TIMESTAMP_FILE, TIMESTAMP_DTYPE), (VALUE_FILE, VALUE_DTYPE)):
+            path = os.path.join(directory, name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * dtype.itemsize:
+                os.truncate(path, rows * dtype.itemsize)
+    
+    def _rollup_updates(
+        self,
+        rollup: np.ndarray,
+        offsets: np.ndarray,
+        values: np.ndarray
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """(rollup rows, their new contents) for a batch, computed without touching the file."""
+        updates = []
+        for name, seconds in RESOLUTIONS.items():
+            index = np.clip((offsets // seconds).astype(np.int64), 0, ROLLUP_BINS[name] - 1)
+            touched, position = np.unique(index, return_inverse=True)
+            rows = ROLLUP_OFFSETS[name] + touched
+            
+            part = np.array(rollup[rows])
+            np.add.at(part[:, COUNT], position, 1)
+            np.add.at(part[:, SUM], position, values)
+            np.minimum.at(part[:, MIN], position, values)
+            np.maximum.at(part[:, MAX], position, values)
+            updates.append((rows, part))
+        return updates
+    
+    def _row_count(self, directory: str) -> int:
+        sizes = []
+        for name, dtype in ((TIMESTAMP_FILE, TIMESTAMP_DTYPE), (VALUE_FILE, VALUE_DTYPE)):
+            path = os.path.join(directory, name)
+            sizes.append(os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+    
+    def _days(self, start: float, end: float) -> range:
+        return range(math.floor(start / DAY_SECONDS), math.floor((end - 1e-9) / DAY_SECONDS) + 1)
+    
+    def sensor_kind(self, sensor_id: str) -> Optional[str]:
+        """Kind a sensor has history under, from the partition layout (None if none)."""
+        if not self.enabled or not os.path.isdir(self.root):
+            return None
+        sensor = _safe_name(sensor_id)
+        for kind in sorted(os.listdir(self.root)):
+            kind_dir = os.path.join(self.root, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for day in sorted(os.listdir(kind_dir), reverse=True):
+                if os.path.isdir(os.path.join(kind_dir, day, sensor)):
+                    return unquote(kind)
+        return None
+    
+    def raw(self, kind: str, sensor_id: str, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Raw readings of one sensor in [start, end), epoch seconds.
+        
+        Returns:
+            (timestamps, values), oldest first
+        """
+        ts_parts, value_parts = [], []
+        for day in self._days(start, end):
+            directory = self._partition(kind, day, _safe_name(sensor_id))
+            rollup_path = os.path.join(directory, ROLLUP_FILE)
+            if not os.path.exists(rollup_path):
+                continue
+            # Only rows the rollups cover are committed
+            rows = min(self._row_count(directory), _covered_rows(np.load(rollup_path, mmap_mode='r')))
+            if not rows:
+                continue
+            ts = np.memmap(os.path.join(directory, TIMESTAMP_FILE), dtype=TIMESTAMP_DTYPE, mode='r', shape=(rows,))
+            values = np.memmap(os.path.join(directory, VALUE_FILE), dtype=VALUE_DTYPE, mode='r', shape=(rows,))
+            keep = (ts >= start) & (ts < end)
+            ts_parts.append(np.asarray(ts[keep], dtype=np.float64))
+            value_parts.append(np.asarray(values[keep], dtype=np.float64))
+        
+        if not ts_parts:
+            return np.empty(0), np.empty(0)
+        ts, values = np.concatenate(ts_parts), np.concatenate(value_parts)
+        order = np.argsort(ts, kind='stable')
+        return ts[order], values[order]
+    
+    def rollup(
+        self,
+        kind: str,
+        start: float,
+        end: float,
+        resolution: str = '1h',
+        sensor_ids: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Binned statistics in [start, end) for some sensors, or all of a kind.
+        
+        Bins partly outside the range are included whole.
+        
+        Returns:
+            Lists of bin start timestamps, count, mean, min and max (empty
+            bins omitted)
+        """
+        seconds = RESOLUTIONS[resolution]
+        first_bin = math.floor(start / seconds)
+        last_bin = math.ceil(end / seconds)
+        merged = _empty_rollup(max(last_bin - first_bin, 0))
+        partitions = [ALL_SENSORS] if sensor_ids is None else [_safe_name(s) for s in sensor_ids]
+        
+        for day in self._days(start, end):
+            day_first = day * (DAY_SECONDS // seconds)
+            lo = max(first_bin, day_first)
+            hi = min(last_bin, day_first + DAY_SECONDS // seconds)
+            if lo >= hi:
+                continue
+            for sensor in partitions:
+                path = os.path.join(self._partition(kind, day, sensor), ROLLUP_FILE)
+                if not os.path.exists(path):
+                    continue
+                offset = ROLLUP_OFFSETS[resolution] - day_first
+                part = np.load(path, mmap_mode='r')[offset + lo:offset + hi]
+                out = merged[lo - first_bin:hi - first_bin]
+                out[:, COUNT] += part[:, COUNT]
+                out[:, SUM] += part[:, SUM]
+                np.minimum(out[:, MIN], part[:, MIN], out=out[:, MIN])
+                np.maximum(out[:, MAX], part[:, MAX], out=out[:, MAX])
+        
+        filled = np.nonzero(merged[:, COUNT])[0]
+        bins = merged[filled]
+        return {
+            'resolution': resolution,
+            'timestamps': ((first_bin + filled) * seconds).astype(np.float64).tolist(),
+            'count': bins[:, COUNT].astype(np.int64).tolist(),
+            'mean': np.round(bins[:, SUM] / bins[:, COUNT], 4).tolist(),
+            'min': np.round(bins[:, MIN], 4).tolist(),
+            'max': np.round(bins[:, MAX], 4).tolist()
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """Write counters for monitoring."""
+        return {
+            'enabled': self.enabled,
+            'root': self.root or None,
+            'buffered': len(self._buffer),
+            'written': self.written,
+            'write_errors': self.write_errors,
+            'dropped': self.dropped
+        }
+
+
+# Global sensor history store
+timeseries_store = TimeSeriesStore(settings.TIMESERIES_PATH, max_buffered=settings.SENSOR_MAX_PENDING)
@@ -0,0 +1,236 @@
+"""Weather provider client: pooled async HTTP with per-cell caching and coalescing."""
+from typing import Any, Dict, Optional, Tuple
+from app.config import settings
+from app.core.cache import MemoryCache
+from app.core.singleflight import SingleFlight
+from app.core.circuit_breaker import CircuitBreaker, weather_breaker, call_timeout
+import asyncio
+import time
+import httpx
+import logging
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 5) -> str:
+    """Geohash of a point (precision 5 is a ~4.9 x 4.9 km cell)."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_center(geohash: str) -> Tuple[float, float]:
+    """(lat, lon) center of a geohash cell."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (bits >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def parse_conditions(payload: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """
+    Prediction inputs from an OpenWeatherMap-style current weather payload.
+    
+    Rainfall is rain.1h (or rain.3h / 3) in mm/h, 0 when the payload has no
+    rain block. soil_saturation and river_level are read from top-level
+    fields when a provider supplies them, else None.
+    """
+    rain = payload.get('rain') or {}
+    if '1h' in rain:
+        rainfall = float(rain['1h'])
+    elif '3h' in rain:
+        rainfall = float(rain['3h']) / 3
+    else:
+        rainfall = 0.0
+    
+    def optional(key: str) -> Optional[float]:
+        value = payload.get(key)
+        return None if value is None else float(value)
+    
+    return {
+        'rainfall': rainfall,
+        'soil_saturation': optional('soil_saturation'),
+        'river_level': optional('river_level')
+    }
+
+
+class WeatherProvider:
+    """
+    Current conditions from an OpenWeatherMap-compatible endpoint.
+    
+    All requests share one pooled httpx.AsyncClient (HTTP/2 when the h2
+    package is installed), so connections and TLS sessions are reused.
+    Locations are snapped to a geohash cell and cached per cell for the
+    provider's refresh interval; concurrent lookups for the same cell
+    share one upstream call. Failures return None so callers can fall back.
+    """
+    
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        precision: int = 5,
+        refresh_seconds: float = 600,
+        timeout_seconds: float = 5.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        http2: bool = True,
+        cache_entries: int = 50000,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.precision = precision
+        self.refresh_seconds = refresh_seconds
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.breaker = breaker or weather_breaker
+        
+        self.cache = MemoryCache(max_entries=cache_entries, ttl_seconds=refresh_seconds)
+        self.flight = SingleFlight("weather")
+        self._client: Optional[httpx.AsyncClient] = None
+        
+        # Metrics
+        self.hits = 0
+        self.upstream_calls = 0
+        self.errors = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.base_url and self.api_key)
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive
+                )
+            )
+        return self._client
+    
+    def cell_key(self, lat: float, lon: float) -> str:
+        """Cache key: geohash cell and the current refresh interval."""
+        interval = int(time.time() // self.refresh_seconds)
+        return f"{geohash_encode(lat, lon, self.precision)}:{interval}"
+    
+    async def conditions(self, lat: float, lon: float) -> Optional[Dict[str, Optional[float]]]:
+        """
+        Current conditions for the geohash cell containing a location.
+        
+        Returns:
+            rainfall / soil_saturation / river_level (None where the
+            provider has no value), or None if the provider is disabled
+            or unavailable
+        """
+        if not self.enabled:
+            return None
+        
+        key = self.cell_key(lat, lon)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        
+        try:
+            result, _ = await self.flight.do(key, lambda: self._fetch_cell(key))
+            return result
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Weather provider unavailable for {key}: {str(e)}")
+            return None
+    
+    async def _fetch_cell(self, key: str) -> Dict[str, Optional[float]]:
+        timeout = call_timeout(self.timeout_seconds)
+        lat, lon = geohash_center(key.split(':', 1)[0])
+        
+        async with self.breaker.guard():
+            self.upstream_calls += 1
+            response = await asyncio.wait_for(
+                self._get_client().get(self.base_url, params={
+                    'lat': round(lat, 5),
+                    'lon': round(lon, 5),
+                    'appid': self.api_key,
+                    'units': 'metric'
+                }),
+                timeout
+            )
+            response.raise_for_status()
+            conditions = parse_conditions(response.json())
+        
+        self.cache.set(key, conditions)
+        return conditions
+    
+    async def reading(self, kind: str, lat: float, lon: float) -> Optional[float]:
+        """One input (rainfall, soil_saturation or river_level) at a location, if provided."""
+        conditions = await self.conditions(lat, lon)
+        return conditions.get(kind) if conditions else None
+    
+    async def close(self) -> None:
+        """Close the shared HTTP client (pooled connections)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache, coalescing and upstream counters for monitoring."""
+        return {
+            'enabled': self.enabled,
+            'http2': self.http2,
+            'cached_cells': len(self.cache),
+            'cache_hits': self.hits,
+            'coalesced': self.flight.coalesced,
+            'upstream_calls': self.upstream_calls,
+            'errors': self.errors
+        }
+
+
+# Global weather provider (enabled when OPENWEATHER_API_KEY is set)
+weather_provider = WeatherProvider(
+    base_url=settings.WEATHER_API_URL,
+    api_key=settings.OPENWEATHER_API_KEY,
+    precision=settings.WEATHER_GEOHASH_PRECISION,
+    refresh_seconds=settings.WEATHER_REFRESH_SECONDS,
+    timeout_seconds=settings.WEATHER_TIMEOUT_SECONDS,
+    max_connections=settings.WEATHER_MAX_CONNECTIONS,
+    max_keepalive=settings.WEATHER_MAX_KEEPALIVE,
+    http2=settings.WEATHER_HTTP2,
+    cache_entries=settings.WEATHER_CACHE_MAX_ENTRIES
+)
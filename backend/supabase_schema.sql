@@ -199,6 +199,27 @@ CREATE TRIGGER trigger_update_resource_location
     FOR EACH ROW
     EXECUTE FUNCTION update_resource_location();
 
+-- ============================================
+-- SENSOR READINGS TABLE (bulk-flushed by the ingestion service)
+-- ============================================
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    id BIGSERIAL PRIMARY KEY,
+    sensor_id VARCHAR(100) NOT NULL,
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('rainfall', 'soil_saturation', 'river_level')),
+    value DOUBLE PRECISION NOT NULL,
+    
+    -- Location
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    
+    -- Timestamps
+    recorded_at TIMESTAMPTZ NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX idx_sensor_readings_sensor_time ON sensor_readings(sensor_id, recorded_at DESC);
+CREATE INDEX idx_sensor_readings_kind_time ON sensor_readings(kind, recorded_at DESC);
+
 -- ============================================
 -- ROW LEVEL SECURITY (RLS) POLICIES
 -- ============================================
@@ -208,6 +229,7 @@ ALTER TABLE incidents ENABLE ROW LEVEL SECURITY;
 ALTER TABLE flood_predictions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public_alerts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE resources ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sensor_readings ENABLE ROW LEVEL SECURITY;
 
 -- Public read access to alerts (no auth required)
 CREATE POLICY "Public alerts are viewable by everyone"
@@ -250,6 +272,12 @@ TO service_role
 USING (true)
 WITH CHECK (true);
 
+CREATE POLICY "Service role has full access to sensor readings"
+ON sensor_readings
+TO service_role
+USING (true)
+WITH CHECK (true);
+
 -- ============================================
 -- SAMPLE DATA FOR TESTING (Optional - will be replaced by realistic_mock_data.sql)
 -- ============================================
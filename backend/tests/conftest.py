@@ -0,0 +1,13 @@
+"""
+Shared test setup.
+
+Settings are read from the environment when app modules are imported, so
+placeholder credentials are set first; no test talks to Supabase, Gemini
+or the P3AI network.
+"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+os.environ.setdefault("GEMINI_API_KEY", "test-gemini-key")
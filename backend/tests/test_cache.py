@@ -0,0 +1,88 @@
+"""LLM cache keys and tiered lookups."""
+import pytest
+
+from app.core.cache import LLMCache, MemoryCache, SQLiteCache
+
+
+@pytest.fixture
+def tiers(tmp_path):
+    memory = MemoryCache(max_entries=10, ttl_seconds=60)
+    sqlite = SQLiteCache(str(tmp_path / "llm.sqlite"), ttl_seconds=60)
+    yield memory, sqlite
+    sqlite.close()
+
+
+def test_key_covers_every_request_parameter():
+    key = LLMCache.make_key("gemini", 0.3, "prompt", 1024)
+    
+    assert key == LLMCache.make_key("gemini", 0.3, "prompt", 1024)
+    assert key != LLMCache.make_key("gemini", 0.3, "prompt", 256)
+    assert key != LLMCache.make_key("gemini", 0.3, "prompt")
+    assert key != LLMCache.make_key("gemini", 0.7, "prompt", 1024)
+    assert key != LLMCache.make_key("other", 0.3, "prompt", 1024)
+    assert key != LLMCache.make_key("gemini", 0.3, "prompt!", 1024)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_expired_entries_are_misses(tiers):
+    memory, sqlite = tiers
+    memory.set("k", "v", ttl_seconds=-1)
+    sqlite.set("k", "v", ttl_seconds=-1)
+    
+    assert memory.get("k") is None
+    assert sqlite.get("k") is None
+
+
+def test_slower_tier_hits_are_promoted(tiers):
+    memory, sqlite = tiers
+    cache = LLMCache([memory, sqlite])
+    sqlite.set("k", {'text': "cached"})
+    
+    assert cache.get("k") == {'text': "cached"}
+    assert memory.get("k") == {'text': "cached"}
+    assert cache.stats()['tier_hits'] == {'memory': 0, 'sqlite': 1}
+
+
+@pytest.mark.asyncio
+async def test_async_lookups_use_every_tier(tiers):
+    memory, sqlite = tiers
+    cache = LLMCache([memory, sqlite])
+    
+    assert await cache.aget("k") is None
+    await cache.aset("k", "response")
+    memory.clear()
+    
+    assert await cache.aget("k") == "response"
+    assert memory.get("k") == "response"
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+class BrokenTier(MemoryCache):
+    """A tier whose writes fail (disk full, locked database)."""
+    
+    name = "broken"
+    
+    def set(self, key, value, ttl_seconds=None):
+        raise OSError("disk full")
+
+
+@pytest.mark.asyncio
+async def test_failed_promotion_still_returns_the_hit(tiers):
+    _, sqlite = tiers
+    cache = LLMCache([BrokenTier(), sqlite])
+    sqlite.set("k", "response")
+    
+    assert cache.get("k") == "response"
+    assert await cache.aget("k") == "response"
+    assert cache.stats()['hits'] == 2
@@ -0,0 +1,182 @@
+"""Circuit breaker state transitions and request latency budgets."""
+import asyncio
+import pytest
+
+from app.core.circuit_breaker import (
+    CircuitBreaker, CircuitOpenError, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN,
+    call_timeout, latency_budget, remaining_budget, within_budget
+)
+
+
+def make_breaker(**options) -> CircuitBreaker:
+    defaults = dict(window_size=4, min_calls=4, failure_rate_threshold=0.5, open_seconds=60)
+    return CircuitBreaker("test", **{**defaults, **options})
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        breaker.record(False, 0.01)
+
+
+async def fail():
+    raise RuntimeError("upstream error")
+
+
+async def succeed():
+    return "ok"
+
+
+def test_opens_at_the_failure_rate_threshold():
+    breaker = make_breaker()
+    breaker.record(True, 0.01)
+    breaker.record(False, 0.01)
+    breaker.record(True, 0.01)
+    assert breaker.state == STATE_CLOSED
+    
+    breaker.record(False, 0.01)
+    assert breaker.state == STATE_OPEN
+    assert breaker.times_opened == 1
+
+
+def test_needs_min_calls_before_opening():
+    breaker = make_breaker()
+    for _ in range(3):
+        breaker.record(False, 0.01)
+    
+    assert breaker.state == STATE_CLOSED
+
+
+def test_slow_calls_open_the_breaker():
+    breaker = make_breaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.75)
+    for _ in range(3):
+        breaker.record(True, 2.0)
+    breaker.record(True, 0.1)
+    
+    assert breaker.state == STATE_OPEN
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_rejects_calls():
+    breaker = make_breaker()
+    trip(breaker)
+    
+    with pytest.raises(CircuitOpenError):
+        await breaker.call(succeed)
+    with pytest.raises(CircuitOpenError):
+        breaker.reject_if_open()
+    assert breaker.rejected == 2
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_on_success():
+    breaker = make_breaker(open_seconds=0.01)
+    trip(breaker)
+    await asyncio.sleep(0.02)
+    
+    assert breaker.allow_request()
+    assert breaker.state == STATE_HALF_OPEN
+    # One probe at a time
+    assert not breaker.allow_request()
+    
+    breaker.record(True, 0.01)
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['window_calls'] == 0
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_failure_reopens():
+    breaker = make_breaker(open_seconds=0.01)
+    trip(breaker)
+    await asyncio.sleep(0.02)
+    
+    with pytest.raises(RuntimeError):
+        await breaker.call(fail)
+    
+    assert breaker.state == STATE_OPEN
+    assert breaker.times_opened == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_count_as_failures():
+    breaker = make_breaker(min_calls=1, window_size=1)
+    
+    with pytest.raises(asyncio.TimeoutError):
+        await breaker.call(lambda: asyncio.sleep(1), timeout=0.01)
+    
+    assert breaker.state == STATE_OPEN
+
+
+@pytest.mark.asyncio
+async def test_caller_cancellation_records_no_outcome():
+    breaker = make_breaker(min_calls=1, window_size=1)
+    
+    task = asyncio.create_task(breaker.call(lambda: asyncio.sleep(1)))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['window_calls'] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_the_next_request_probe():
+    breaker = make_breaker(open_seconds=0.01)
+    trip(breaker)
+    await asyncio.sleep(0.02)
+    
+    task = asyncio.create_task(breaker.call(lambda: asyncio.sleep(1)))
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    
+    assert breaker.state == STATE_HALF_OPEN
+    assert await breaker.call(succeed) == "ok"
+    assert breaker.state == STATE_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_counts_as_success():
+    breaker = make_breaker(min_calls=1, window_size=1)
+    
+    async def stream():
+        async with breaker.guard():
+            for chunk in ("a", "b", "c"):
+                yield chunk
+    
+    chunks = stream()
+    assert await chunks.__anext__() == "a"
+    await chunks.aclose()
+    
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats()['failure_rate'] == 0.0
+
+
+def test_nested_budgets_only_shorten_the_deadline():
+    assert remaining_budget() is None
+    assert call_timeout(5) == 5
+    
+    with latency_budget(1.0):
+        with latency_budget(10.0):
+            assert remaining_budget() <= 1.0
+        assert call_timeout(0.5) == 0.5
+        assert call_timeout(30) <= 1.0
+    
+    assert remaining_budget() is None
+
+
+def test_spent_budget_raises_timeout():
+    with latency_budget(0):
+        with pytest.raises(asyncio.TimeoutError):
+            call_timeout()
+
+
+@pytest.mark.asyncio
+async def test_within_budget_bounds_the_await():
+    with latency_budget(0.01):
+        with pytest.raises(asyncio.TimeoutError):
+            await within_budget(asyncio.sleep(1))
+    
+    assert await within_budget(succeed()) == "ok"
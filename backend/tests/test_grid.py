@@ -0,0 +1,101 @@
+"""Risk grid inputs: live sensors first, weather providers for the rest."""
+import pytest
+
+from app.api import predictions
+from app.schemas.prediction import RiskGridRequest
+from app.services.sensors import SensorStore
+
+BOX = {'min_lat': 19.00, 'min_lon': 72.80, 'max_lat': 19.10, 'max_lon': 72.90, 'cell_size_km': 2.0}
+
+
+@pytest.fixture
+def sensors(monkeypatch):
+    store = SensorStore()
+    monkeypatch.setattr(predictions, 'sensor_store', store)
+    predictions.grid_cache.clear()
+    yield store
+    predictions.grid_cache.clear()
+
+
+@pytest.fixture
+def provider_calls(monkeypatch):
+    calls = []
+    
+    def fetcher(kind, value):
+        async def fetch(lat, lon):
+            calls.append(kind)
+            return value
+        return fetch
+    
+    monkeypatch.setattr(predictions, '_fetch_rainfall_data', fetcher('rainfall', 20.0))
+    monkeypatch.setattr(predictions, '_fetch_soil_saturation', fetcher('soil_saturation', 0.5))
+    monkeypatch.setattr(predictions, '_fetch_river_level', fetcher('river_level', 4.0))
+    return calls
+
+
+def reading(sensor_id, kind, value, lat, lon):
+    return {'sensor_id': sensor_id, 'kind': kind, 'value': value, 'latitude': lat, 'longitude': lon}
+
+
+def ingest_all_kinds(store: SensorStore) -> None:
+    store.ingest([
+        reading("r1", "rainfall", 80.0, 19.02, 72.82),
+        reading("r2", "rainfall", 10.0, 19.08, 72.88),
+        reading("s1", "soil_saturation", 0.9, 19.05, 72.85),
+        reading("g1", "river_level", 9.0, 19.03, 72.86),
+        # Outside the padded box
+        reading("r3", "rainfall", 150.0, 28.61, 77.20)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_grid_is_interpolated_from_sensors(sensors, provider_calls):
+    ingest_all_kinds(sensors)
+    
+    grid = await predictions.get_risk_grid(RiskGridRequest(**BOX))
+    
+    assert provider_calls == []
+    assert grid['input_source'] == {'rainfall': 'sensors', 'soil_saturation': 'sensors', 'river_level': 'sensors'}
+    assert grid['input_points'] == {'rainfall': 2, 'soil_saturation': 1, 'river_level': 1}
+    assert grid['input_version'] == "sensors-5"
+    # Wet, saturated and high river everywhere: nothing is low risk
+    assert grid['summary']['cells_by_level']['low'] == 0
+
+
+@pytest.mark.asyncio
+async def test_inputs_without_sensors_come_from_providers(sensors, provider_calls):
+    sensors.ingest([reading("r1", "rainfall", 80.0, 19.02, 72.82)])
+    
+    grid = await predictions.get_risk_grid(RiskGridRequest(**BOX))
+    
+    assert grid['input_source'] == {'rainfall': 'sensors', 'soil_saturation': 'providers', 'river_level': 'providers'}
+    assert set(provider_calls) == {'soil_saturation', 'river_level'}
+    assert grid['input_version'].startswith("sensors-1:providers-")
+
+
+@pytest.mark.asyncio
+async def test_grid_is_cached_until_sensors_report(sensors, provider_calls):
+    ingest_all_kinds(sensors)
+    request = RiskGridRequest(**BOX)
+    
+    first = await predictions.get_risk_grid(request)
+    again = await predictions.get_risk_grid(request)
+    sensors.ingest([reading("r1", "rainfall", 5.0, 19.02, 72.82)])
+    updated = await predictions.get_risk_grid(request)
+    
+    assert (first['cached'], again['cached'], updated['cached']) == (False, True, False)
+    assert updated['input_version'] == "sensors-6"
+    assert updated['summary']['mean_risk_score'] < first['summary']['mean_risk_score']
+
+
+def test_latest_in_box_keeps_fresh_sensors_of_a_kind():
+    store = SensorStore(max_age_seconds=3600)
+    ingest_all_kinds(store)
+    store.ingest([{**reading("old", "rainfall", 1.0, 19.05, 72.85), 'timestamp': 0}])
+    
+    lat, lon, values, _ = store.latest_in_box("rainfall", 19.0, 72.8, 19.1, 72.9)
+    
+    assert sorted(values.tolist()) == [10.0, 80.0]
+    assert store.latest_in_box("rainfall", 0.0, 0.0, 1.0, 1.0)[2].size == 0
+    # Large boxes scan every sensor instead of every cell
+    assert sorted(store.latest_in_box("rainfall", -90, -180, 90, 180)[2].tolist()) == [10.0, 80.0, 150.0]
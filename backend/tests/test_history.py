@@ -0,0 +1,157 @@
+"""HistoricalIndex nearest-event queries, rebuilds and reloads."""
+import json
+import threading
+import time
+import numpy as np
+import pytest
+
+from app.ml.history import HistoricalIndex, event_from_incident, event_from_prediction
+
+
+def event(i: int, lat: float, lon: float, rainfall=50.0, saturation=0.7, river=5.0, severity=0.5) -> dict:
+    return {
+        'id': f"event:{i}",
+        'latitude': lat,
+        'longitude': lon,
+        'rainfall': rainfall,
+        'soil_saturation': saturation,
+        'river_level': river,
+        'severity': severity
+    }
+
+
+def random_events(count: int, seed: int = 0, start: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    return [
+        event(
+            start + i,
+            float(rng.uniform(8, 30)), float(rng.uniform(68, 90)),
+            float(rng.uniform(0, 120)), float(rng.uniform(0.2, 1)), float(rng.uniform(1, 10))
+        )
+        for i in range(count)
+    ]
+
+
+def brute_force(index: HistoricalIndex, events: list, conditions: dict, k: int) -> list:
+    features = index._features(events)
+    distances = np.sqrt(((features - index._features([conditions])) ** 2).sum(axis=1))
+    return [events[i]['id'] for i in np.argsort(distances, kind='stable')[:k]]
+
+
+def test_query_matches_brute_force_before_and_after_rebuild():
+    events = random_events(500)
+    index = HistoricalIndex(rebuild_threshold=10000, max_distance=100)
+    index.add_many(events)
+    conditions = {'latitude': 19.0, 'longitude': 72.8, 'rainfall': 80, 'soil_saturation': 0.9, 'river_level': 8}
+    
+    # Pending events are scanned directly
+    pending = [e['id'] for e in index.query(conditions, k=5)]
+    index.rebuild()
+    indexed = [e['id'] for e in index.query(conditions, k=5)]
+    
+    assert pending == indexed == brute_force(index, events, conditions, 5)
+    assert index.stats() == {'events': 500, 'pending': 0, 'rebuilds': 1}
+
+
+def test_query_merges_tree_and_pending_events():
+    index = HistoricalIndex(rebuild_threshold=10000)
+    index.add_many([event(1, 19.0, 72.8), event(2, 25.0, 80.0)])
+    index.rebuild()
+    index.add(event(3, 19.01, 72.8))
+    index.add(None)
+    
+    results = index.query({'latitude': 19.0, 'longitude': 72.8, 'rainfall': 50, 'soil_saturation': 0.7, 'river_level': 5}, k=2)
+    
+    assert [e['id'] for e in results] == ["event:1", "event:3"]
+    assert results[0]['distance'] == 0.0
+    assert results[1]['distance'] == pytest.approx(0.02)
+
+
+def test_dissimilar_events_are_left_out():
+    index = HistoricalIndex(max_distance=1.0)
+    index.add_many([event(1, 19.0, 72.8), event(2, 19.0, 72.8, rainfall=120)])
+    
+    results = index.query({'latitude': 19.0, 'longitude': 72.8, 'rainfall': 50, 'soil_saturation': 0.7, 'river_level': 5})
+    
+    assert [e['id'] for e in results] == ["event:1"]
+    assert index.query({'latitude': -30.0, 'longitude': 0.0}) == []
+
+
+def test_incidents_without_readings_match_on_location():
+    index = HistoricalIndex()
+    incident = event_from_incident({
+        'id': 9, 'type': 'flood', 'severity': 'high', 'title': 'Kurla flooding',
+        'latitude': 19.07, 'longitude': 72.88
+    })
+    index.add_many(random_events(50, start=100) + [incident])
+    index.rebuild()
+    
+    results = index.query({'latitude': 19.07, 'longitude': 72.88}, k=1)
+    
+    assert results[0]['id'] == "incident:9"
+    assert results[0]['severity'] == 0.75
+
+
+def test_event_conversion():
+    prediction = event_from_prediction({
+        'id': 5, 'region_name': 'Dharavi', 'risk_level': 'high', 'probability': None,
+        'center_lat': 19.04, 'center_lon': 72.85, 'rainfall_intensity': 70
+    })
+    
+    assert prediction['id'] == "prediction:5"
+    assert prediction['severity'] == 0.75
+    assert event_from_prediction({'id': 1}) is None
+    assert event_from_incident({'type': 'fire', 'latitude': 1, 'longitude': 2}) is None
+
+
+def test_background_rebuild_once_pending_outgrows_the_threshold():
+    index = HistoricalIndex(rebuild_threshold=20)
+    index.add_many(random_events(19))
+    assert index.rebuilds == 0
+    
+    index.add_many(random_events(1, seed=1, start=19))
+    for _ in range(200):
+        if index.rebuilds:
+            break
+        time.sleep(0.01)
+    
+    assert index.stats() == {'events': 20, 'pending': 0, 'rebuilds': 1}
+
+
+def test_load_reads_seed_files(tmp_path):
+    as_list = tmp_path / "events.json"
+    as_list.write_text(json.dumps(random_events(5)))
+    as_lines = tmp_path / "events.jsonl"
+    as_lines.write_text("\n".join(json.dumps(e) for e in random_events(7)) + "\n")
+    index = HistoricalIndex()
+    
+    assert index.load(None, str(as_list)) == 5
+    assert index.load(None, str(as_lines)) == 7
+    assert index.load(None, str(tmp_path / "missing.json")) == 0
+
+
+def test_load_during_adds_keeps_results_aligned(tmp_path):
+    seed = tmp_path / "events.json"
+    seed.write_text(json.dumps(random_events(300)))
+    index = HistoricalIndex(rebuild_threshold=25, max_distance=100)
+    added = random_events(400, seed=1, start=1000)
+    
+    def add_in_batches():
+        for start in range(0, len(added), 10):
+            index.add_many(added[start:start + 10])
+    
+    writer = threading.Thread(target=add_in_batches)
+    writer.start()
+    for _ in range(5):
+        index.load(None, str(seed))
+    writer.join()
+    index.rebuild()
+    
+    indexed = index._events
+    assert {e['id'] for e in random_events(300)} <= {e['id'] for e in indexed}
+    # Every event is found at its own conditions, so the tree and the
+    # event list it indexes were swapped in together
+    for e in indexed[::10]:
+        nearest = index.query(e, k=1)[0]
+        assert nearest['id'] == e['id']
+        assert nearest['distance'] == 0.0
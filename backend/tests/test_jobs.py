@@ -0,0 +1,192 @@
+"""SQLite job store claims and leases, and the job queue's retries."""
+import asyncio
+import time
+import pytest
+
+from app.services.jobs import (
+    JobQueue, SQLiteJobStore, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, _new_job
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    yield store
+    if store._conn is not None:
+        store._conn.close()
+
+
+def add(store: SQLiteJobStore, max_attempts: int = 3, **fields) -> dict:
+    job = _new_job("test", {'n': 1}, max_attempts)
+    job.update(fields)
+    store._add(job)
+    return job
+
+
+def test_claim_leases_the_oldest_due_job(store):
+    now = time.time()
+    later = add(store, run_at=now - 1)
+    first = add(store, run_at=now - 10)
+    add(store, run_at=now + 3600)
+    
+    job = store._claim(lease_seconds=60)
+    
+    assert job['id'] == first['id']
+    assert job['status'] == JOB_RUNNING
+    assert job['attempts'] == 1
+    assert job['lease_until'] >= now + 59
+    assert store._claim(60)['id'] == later['id']
+    # Only the future job is left
+    assert store._claim(60) is None
+
+
+def test_leased_job_is_not_claimed_twice(store):
+    add(store)
+    
+    assert store._claim(60) is not None
+    assert store._claim(60) is None
+    assert store._counts() == {JOB_RUNNING: 1}
+
+
+def test_expired_lease_is_claimed_again(store):
+    job = add(store)
+    
+    # A worker that took the job and died: its lease is already over
+    store._claim(lease_seconds=-1)
+    reclaimed = store._claim(lease_seconds=60)
+    
+    assert reclaimed['id'] == job['id']
+    assert reclaimed['attempts'] == 2
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(store):
+    poison = add(store, max_attempts=2)
+    healthy = add(store, run_at=time.time() + 0.5)
+    
+    store._claim(lease_seconds=-1)
+    store._claim(lease_seconds=-1)
+    assert store._claim(60) is None
+    
+    failed = store._get(poison['id'])
+    assert failed['status'] == JOB_FAILED
+    assert failed['attempts'] == 2
+    assert "lease expired" in failed['last_error']
+    
+    # Failing the poison job does not block the jobs behind it
+    time.sleep(0.5)
+    assert store._claim(60)['id'] == healthy['id']
+
+
+def test_update_round_trips_payload_and_result(store):
+    job = add(store)
+    job.update(status=JOB_SUCCEEDED, result={'predictions': [1, 2]}, updated_at=time.time())
+    store._update(job)
+    
+    saved = store._get(job['id'])
+    assert saved['status'] == JOB_SUCCEEDED
+    assert saved['payload'] == {'n': 1}
+    assert saved['result'] == {'predictions': [1, 2]}
+    assert [j['id'] for j in store._list(JOB_SUCCEEDED, 10)] == [job['id']]
+
+
+@pytest.mark.asyncio
+async def test_queue_retries_until_the_handler_succeeds(store):
+    queue = JobQueue(store, workers=1, max_attempts=3, retry_base_seconds=0.01, poll_seconds=0.01)
+    calls = []
+    
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 2:
+            raise RuntimeError("transient")
+        return {'done': payload['n']}
+    
+    queue.register("test", flaky)
+    queue.start()
+    try:
+        job_id = await queue.enqueue("test", {'n': 7})
+        for _ in range(200):
+            job = await queue.get(job_id)
+            if job['status'] == JOB_SUCCEEDED:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+    
+    assert job['status'] == JOB_SUCCEEDED
+    assert job['attempts'] == 2
+    assert job['result'] == {'done': 7}
+    assert queue.retried == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_fails_jobs_after_max_attempts(store):
+    queue = JobQueue(store, workers=1, max_attempts=2, retry_base_seconds=0.01, poll_seconds=0.01)
+    
+    async def broken(payload):
+        raise ValueError("bad payload")
+    
+    queue.register("test", broken)
+    queue.start()
+    try:
+        job_id = await queue.enqueue("test", {})
+        for _ in range(200):
+            job = await queue.get(job_id)
+            if job['status'] == JOB_FAILED:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+    
+    assert job['status'] == JOB_FAILED
+    assert job['attempts'] == 2
+    assert job['last_error'] == "bad payload"
+    assert queue.failed == 1
+
+
+@pytest.mark.asyncio
+async def test_enqueue_rejects_unknown_kinds(store):
+    queue = JobQueue(store)
+    
+    with pytest.raises(ValueError):
+        await queue.enqueue("missing", {})
+    assert await store.counts() == {}
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_a_failing_store_update(store, monkeypatch):
+    queue = JobQueue(store, workers=1, poll_seconds=0.01)
+    handled = []
+    
+    async def handler(payload):
+        handled.append(payload['n'])
+        return None
+    
+    update = store.update
+    failures = []
+    
+    async def flaky_update(job):
+        if not failures:
+            failures.append(job['id'])
+            raise RuntimeError("database is locked")
+        await update(job)
+    
+    monkeypatch.setattr(store, 'update', flaky_update)
+    queue.register("test", handler)
+    queue.start()
+    try:
+        await queue.enqueue("test", {'n': 1})
+        second = await queue.enqueue("test", {'n': 2})
+        for _ in range(200):
+            job = await queue.get(second)
+            if job['status'] == JOB_SUCCEEDED:
+                break
+            await asyncio.sleep(0.01)
+        
+        assert not any(task.done() for task in queue._tasks)
+    finally:
+        await queue.stop()
+    
+    assert job['status'] == JOB_SUCCEEDED
+    assert handled == [1, 2]
+    # The first job's outcome was lost; it stays leased until the lease expires
+    assert (await queue.get(failures[0]))['status'] == JOB_RUNNING
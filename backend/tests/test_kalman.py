@@ -0,0 +1,87 @@
+"""River level Kalman filters and the gauge registry."""
+from datetime import datetime
+import pytest
+
+from app.ml.kalman import GaugeRegistry, RiverLevelFilter
+
+START = 1717200000.0  # 2024-06-01 00:00 UTC
+HOUR = 3600.0
+
+
+def test_filter_tracks_a_steady_rise():
+    flt = RiverLevelFilter(measurement_std=0.01)
+    for i in range(24):
+        flt.update(2.0 + 0.1 * i, START + i * HOUR)
+    
+    state = flt.state(START + 23 * HOUR)
+    assert state['level'] == pytest.approx(4.3, abs=0.02)
+    assert state['rate_per_hour'] == pytest.approx(0.1, abs=0.01)
+    assert state['readings'] == 24
+    assert state['updated_at'] == "2024-06-01T23:00:00"
+    
+    forecast = flt.forecast([1, 6], START + 23 * HOUR)
+    assert forecast[0]['level'] == pytest.approx(4.4, abs=0.03)
+    assert forecast[1]['level'] == pytest.approx(4.9, abs=0.1)
+    assert forecast[1]['level_std'] > forecast[0]['level_std']
+
+
+def test_uncertainty_grows_without_readings():
+    flt = RiverLevelFilter()
+    for i in range(5):
+        flt.update(3.0, START + i * HOUR)
+    
+    fresh = flt.state(START + 4 * HOUR)
+    later = flt.state(START + 12 * HOUR)
+    assert later['level_std'] > fresh['level_std']
+    assert later['level'] == pytest.approx(fresh['level'], abs=0.05)
+
+
+def test_late_readings_do_not_move_time_backwards():
+    flt = RiverLevelFilter()
+    flt.update(3.0, START + HOUR)
+    flt.update(3.2, START)
+    
+    assert flt.updated_at == START + HOUR
+    assert flt.readings == 2
+
+
+def test_naive_datetimes_are_utc():
+    flt = RiverLevelFilter()
+    flt.update(3.0, datetime(2024, 6, 1))
+    
+    assert flt.updated_at == START
+
+
+def test_snapshot_prefers_the_first_tracked_nearby_gauge():
+    registry = GaugeRegistry(cell_degrees=0.01)
+    registry.observe("gauge-b", 6.0, START)
+    registry.observe_at(19.076, 72.877, 2.0, START)
+    
+    nearby = registry.snapshot_at(19.076, 72.877, ["gauge-a", "gauge-b"], timestamp=START)
+    virtual = registry.snapshot_at(19.076, 72.877, ["gauge-a"], timestamp=START)
+    
+    assert nearby['gauge'] == "gauge-b"
+    assert nearby['level'] == 6.0
+    assert virtual['gauge'] == registry.gauge_key(19.076, 72.877)
+    assert virtual['level'] == 2.0
+    assert registry.snapshot_at(28.61, 77.20, timestamp=START) is None
+
+
+def test_forecast_hours_follow_the_horizon():
+    registry = GaugeRegistry(forecast_hours=6)
+    
+    snapshot = registry.observe("g", 4.0, START)
+    
+    assert [point['hours'] for point in snapshot['forecast']] == [1, 3, 6]
+
+
+def test_least_recently_updated_gauges_are_dropped():
+    registry = GaugeRegistry(max_gauges=2)
+    registry.observe("a", 1.0, START)
+    registry.observe("b", 1.0, START)
+    registry.observe("a", 1.1, START + HOUR)
+    registry.observe("c", 1.0, START + HOUR)
+    
+    assert registry.snapshot("b") is None
+    assert registry.snapshot("a") is not None
+    assert registry.stats() == {'gauges': 2, 'max_gauges': 2}
@@ -0,0 +1,149 @@
+"""PopulationRaster sums against brute force over the raster cells."""
+import json
+import math
+import os
+import numpy as np
+import pytest
+
+from app.agents.prediction_agent import AREA_DENSITY_PER_KM2, PredictionAgent
+from app.ml import population as population_module
+from app.ml.population import KM_PER_DEG_LAT, PopulationModel, PopulationRaster
+
+NORTH, WEST, CELL = 19.5, 72.5, 0.01
+
+
+@pytest.fixture
+def raster(tmp_path, monkeypatch):
+    # Small chunks so the summed-area table is built in several passes
+    monkeypatch.setattr(population_module, 'SAT_BUILD_CHUNK_ROWS', 7)
+    grid = np.random.default_rng(3).uniform(0, 500, (60, 80))
+    grid[5, 5] = np.nan
+    grid[6, 6] = -10
+    path = tmp_path / "population.npy"
+    np.save(path, grid)
+    (tmp_path / "population.json").write_text(json.dumps({'north': NORTH, 'west': WEST, 'cell_degrees': CELL}))
+    return PopulationRaster(str(path))
+
+
+def cells(raster: PopulationRaster) -> np.ndarray:
+    return np.maximum(np.nan_to_num(np.asarray(raster.raster), nan=0.0), 0)
+
+
+def cell_centers(raster: PopulationRaster):
+    rows, cols = np.mgrid[0:raster.rows, 0:raster.cols]
+    return NORTH - (rows + 0.5) * CELL, WEST + (cols + 0.5) * CELL
+
+
+def test_rect_sum(raster):
+    grid = cells(raster)
+    
+    assert raster.rect_sum(0, raster.rows, 0, raster.cols) == pytest.approx(grid.sum())
+    assert raster.rect_sum(3, 17, 4, 50) == pytest.approx(grid[3:17, 4:50].sum())
+    assert raster.rect_sum(-5, 10, 70, 200) == pytest.approx(grid[0:10, 70:].sum())
+    assert raster.rect_sum(10, 10, 0, 5) == 0.0
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (19.2031, 72.8517, 5.0),
+    (19.4523, 72.5612, 8.0),   # clipped at the raster edge
+    (19.1517, 72.9033, 1.3)
+])
+def test_circle_sum(raster, lat, lon, radius_km):
+    center_lat, center_lon = cell_centers(raster)
+    dy = (center_lat - lat) * KM_PER_DEG_LAT
+    dx = (center_lon - lon) * KM_PER_DEG_LAT * math.cos(math.radians(lat))
+    inside = dx ** 2 + dy ** 2 <= radius_km ** 2
+    
+    assert raster.circle_sum(lat, lon, radius_km) == pytest.approx(cells(raster)[inside].sum())
+
+
+def test_circle_smaller_than_a_cell_takes_a_share(raster):
+    lat, lon = NORTH - 10.1 * CELL, WEST + 20.1 * CELL
+    cell_km2 = (CELL * KM_PER_DEG_LAT) * (CELL * KM_PER_DEG_LAT * math.cos(math.radians(lat)))
+    
+    expected = cells(raster)[10, 20] * math.pi * 0.1 ** 2 / cell_km2
+    assert raster.circle_sum(lat, lon, 0.1) == pytest.approx(expected)
+
+
+def point_in_polygon(lat: np.ndarray, lon: np.ndarray, points) -> np.ndarray:
+    inside = np.zeros(lat.shape, dtype=bool)
+    for (lat0, lon0), (lat1, lon1) in zip(points, points[1:] + points[:1]):
+        crosses = (lat0 > lat) != (lat1 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at = lon0 + (lat - lat0) * (lon1 - lon0) / (lat1 - lat0)
+        inside ^= crosses & (lon < at)
+    return inside
+
+
+@pytest.mark.parametrize("points", [
+    [(19.40, 72.55), (19.40, 73.00), (19.05, 73.00), (19.05, 72.55)],
+    [(19.4513, 72.6021), (19.3017, 72.9512), (19.0811, 72.7003)],
+    [(19.4502, 72.5301), (19.4502, 72.9203), (19.3001, 72.9203),
+     (19.3001, 72.7004), (19.1003, 72.7004), (19.1003, 72.5301)]
+])
+def test_polygon_sum(raster, points):
+    center_lat, center_lon = cell_centers(raster)
+    inside = point_in_polygon(center_lat, center_lon, points)
+    
+    assert raster.polygon_sum(points) == pytest.approx(cells(raster)[inside].sum())
+
+
+def test_degenerate_polygon(raster):
+    assert raster.polygon_sum([(19.2, 72.6), (19.3, 72.7)]) == 0.0
+
+
+def test_summed_area_table_is_rebuilt_when_stale(raster):
+    grid = np.ones((raster.rows, raster.cols))
+    np.save(raster.path, grid)
+    later = os.path.getmtime(raster.sat_path) + 10
+    os.utime(raster.path, (later, later))
+    
+    rebuilt = PopulationRaster(raster.path)
+    
+    assert rebuilt.rect_sum(0, rebuilt.rows, 0, rebuilt.cols) == grid.sum()
+
+
+def test_workers_map_one_summed_area_table(raster, monkeypatch):
+    def build(*args):
+        raise AssertionError("summed-area table rebuilt")
+    
+    # A second worker maps the table the first one built
+    monkeypatch.setattr(population_module, 'build_summed_area_table', build)
+    other = PopulationRaster(raster.path)
+    
+    for sat in (raster.sat, other.sat):
+        assert isinstance(sat, np.memmap)
+        assert not sat.flags.writeable
+        assert os.path.samefile(sat.filename, raster.sat_path)
+    assert other.rect_sum(0, other.rows, 0, other.cols) == raster.rect_sum(0, raster.rows, 0, raster.cols)
+
+
+def test_model_returns_none_without_coverage(raster):
+    model = PopulationModel(raster.path)
+    model.load()
+    
+    assert model.in_circle(19.2, 72.8, 2.0) == pytest.approx(raster.circle_sum(19.2, 72.8, 2.0))
+    assert model.in_circle(28.6, 77.2, 2.0) is None
+    assert PopulationModel().in_circle(19.2, 72.8, 2.0) is None
+
+
+def test_affected_population_without_coverage_uses_the_area_density(raster):
+    agent = PredictionAgent()
+    agent.population = PopulationModel(raster.path)
+    agent.population.load()
+    delhi = {'latitude': 28.6, 'longitude': 77.2}
+    area_km2 = math.pi * 5.0 ** 2
+    
+    assert agent._estimate_affected_population({**delhi, 'area_type': 'urban'}, 0.5) == int(
+        area_km2 * AREA_DENSITY_PER_KM2['urban'] * 0.5
+    )
+    assert agent._estimate_affected_population({**delhi, 'area_type': 'rural'}, 0.5) == int(
+        area_km2 * AREA_DENSITY_PER_KM2['rural'] * 0.5
+    )
+    assert agent._estimate_affected_population(delhi, 0.5) == int(
+        area_km2 * AREA_DENSITY_PER_KM2['suburban'] * 0.5
+    )
+    # Covered locations use the raster
+    assert agent._estimate_affected_population({'latitude': 19.2, 'longitude': 72.8}, 0.5) == int(
+        raster.circle_sum(19.2, 72.8, 5.0) * 0.5
+    )
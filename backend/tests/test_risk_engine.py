@@ -0,0 +1,113 @@
+"""The vectorized RiskEngine matches the agents' scalar scoring."""
+import numpy as np
+import pytest
+
+from app.agents.prediction_agent import PredictionAgent
+from app.ml.risk_engine import RiskEngine, risk_level_codes, risk_level_names
+from app.ml.risk_model import RiskModelServer, WeightedRiskModel
+
+
+@pytest.fixture(scope="module")
+def agent():
+    agent = PredictionAgent()
+    agent.risk_model = RiskModelServer()
+    return agent
+
+
+@pytest.fixture(scope="module")
+def contexts():
+    rng = np.random.default_rng(7)
+    contexts = []
+    for i in range(300):
+        context = {
+            'rainfall': round(float(rng.uniform(0, 150)), 1),
+            'soil_saturation': round(float(rng.uniform(0, 1)), 2),
+            'river_level': round(float(rng.uniform(0, 12)), 1)
+        }
+        if i % 3:
+            context['historical_data'] = [{'severity': float(s)} for s in rng.uniform(0, 1, i % 5)]
+        contexts.append(context)
+    # Threshold edges of every risk factor
+    contexts += [
+        {'rainfall': 50.0, 'soil_saturation': 0.85, 'river_level': 8.0},
+        {'rainfall': 30.0, 'soil_saturation': 0.70, 'river_level': 6.0},
+        {'rainfall': 0.0, 'soil_saturation': 0.0, 'river_level': 0.0}
+    ]
+    return contexts
+
+
+def test_scores_match_the_scalar_path(agent, contexts):
+    batch = RiskEngine(agent.risk_model).score_contexts(contexts)
+    
+    for i, context in enumerate(contexts):
+        zynd = agent.zynd_agent._fallback_analysis(context)
+        assert batch.basic[i] == pytest.approx(agent._basic_risk_score(context))
+        assert batch.zynd[i] == pytest.approx(zynd['risk_score'])
+        assert batch.historical[i] == pytest.approx(agent._calculate_historical_risk(context))
+        assert batch.score[i] == pytest.approx(agent._calculate_comprehensive_risk_score(context, zynd))
+        assert batch.level_names()[i] == agent._score_to_risk_level(float(batch.score[i]))
+        assert batch.factor_labels(i) == agent._identify_risk_factors(context)
+
+
+def test_fallback_analysis_matches_the_zynd_wrapper(agent, contexts):
+    columns = RiskEngine(agent.risk_model).fallback_analysis(
+        [c['rainfall'] for c in contexts],
+        [c['soil_saturation'] for c in contexts],
+        [c['river_level'] for c in contexts]
+    )
+    levels = risk_level_names(columns['level'])
+    
+    for i, context in enumerate(contexts):
+        expected = agent.zynd_agent._fallback_analysis(context)
+        assert columns['risk_score'][i] == pytest.approx(expected['risk_score'])
+        assert levels[i] == expected['risk_level']
+        assert columns['confidence'][i] == expected['confidence']
+        assert columns['river_impact'][i] == pytest.approx(expected['factors']['river_impact'])
+
+
+def test_missing_zynd_scores_fall_back_to_the_basic_score():
+    engine = RiskEngine(RiskModelServer())
+    
+    batch = engine.score([80, 10], [0.9, 0.2], [9, 1], zynd_scores=[0.95, np.nan])
+    
+    assert batch.zynd[0] == 0.95
+    assert batch.zynd[1] == pytest.approx(batch.basic[1])
+    assert batch.historical.tolist() == [0.5, 0.5]
+
+
+def test_score_uses_the_served_model():
+    class Constant:
+        name, version = "constant", "test"
+        
+        def predict(self, features):
+            return np.full(len(features), 0.9)
+    
+    server = RiskModelServer()
+    server.model = Constant()
+    
+    batch = RiskEngine(server).score([1, 2], [0.1, 0.2], [1, 2])
+    
+    assert batch.score.tolist() == [0.9, 0.9]
+    assert batch.level_names().tolist() == ['critical', 'critical']
+
+
+def test_failing_model_falls_back_to_the_weighted_formula():
+    class Broken:
+        name, version = "broken", "test"
+        
+        def predict(self, features):
+            raise RuntimeError("bad model")
+    
+    server = RiskModelServer()
+    server.model = Broken()
+    features = np.array([[60, 0.8, 7, 0.6, 0.5]])
+    
+    assert server.predict(features) == pytest.approx(WeightedRiskModel().predict(features))
+    assert server.stats()['errors'] == 1
+    assert server.stats()['fallback_predictions'] == 1
+
+
+def test_level_thresholds():
+    codes = risk_level_codes(np.array([0.0, 0.3499, 0.35, 0.65, 0.85, 1.0]))
+    
+    assert risk_level_names(codes).tolist() == ['low', 'low', 'medium', 'high', 'critical', 'critical']
@@ -0,0 +1,76 @@
+"""Trained risk models served from memory-mapped tree arrays."""
+import json
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+from app.ml import risk_model as risk_model_module
+from app.ml.risk_model import (
+    META_FILE, MODEL_FEATURES, MODEL_FILE, RiskModelServer, SklearnRiskModel, TreeEnsemble, save_tree_arrays
+)
+
+
+def training_data(count: int = 400, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    features = np.column_stack([
+        rng.uniform(0, 150, count), rng.uniform(0, 1, count), rng.uniform(0, 12, count),
+        rng.uniform(0, 1, count), rng.uniform(0, 1, count)
+    ])
+    target = np.clip(features[:, 0] / 150 * 0.4 + features[:, 1] * 0.3 + rng.normal(0, 0.05, count), 0, 1)
+    return features, target
+
+
+def save_version(directory, estimator) -> None:
+    directory.mkdir()
+    joblib.dump(estimator, directory / MODEL_FILE)
+    trees = save_tree_arrays(estimator, str(directory))
+    (directory / META_FILE).write_text(json.dumps({
+        'version': directory.name, 'features': list(MODEL_FEATURES), 'trees': trees
+    }))
+
+
+@pytest.mark.parametrize("estimator", [
+    GradientBoostingRegressor(n_estimators=50, max_depth=3, learning_rate=0.1, random_state=0),
+    RandomForestRegressor(n_estimators=30, min_samples_leaf=2, random_state=0)
+])
+def test_tree_arrays_predict_like_sklearn(tmp_path, monkeypatch, estimator):
+    # Small chunks so predictions span several passes
+    monkeypatch.setattr(risk_model_module, 'TREE_CHUNK_ROWS', 64)
+    features, target = training_data()
+    estimator.fit(features, target)
+    save_version(tmp_path / "v1", estimator)
+    
+    model = SklearnRiskModel(str(tmp_path / "v1"))
+    test_features, _ = training_data(500, seed=1)
+    # Exactly on split thresholds as well
+    test_features[:20, 0] = np.ravel(estimator.estimators_)[0].tree_.threshold[0]
+    
+    assert isinstance(model.estimator, TreeEnsemble)
+    assert np.allclose(model.predict(test_features), np.clip(estimator.predict(test_features), 0, 1))
+
+
+def test_workers_map_the_arrays_read_only(tmp_path):
+    features, target = training_data()
+    save_version(tmp_path / "v1", GradientBoostingRegressor(n_estimators=10, random_state=0).fit(features, target))
+    
+    first, second = SklearnRiskModel(str(tmp_path / "v1")), SklearnRiskModel(str(tmp_path / "v1"))
+    
+    for model in (first, second):
+        assert isinstance(model.estimator.threshold, np.memmap)
+        assert not model.estimator.threshold.flags.writeable
+    assert first.predict(features).tolist() == second.predict(features).tolist()
+
+
+def test_other_estimators_load_from_joblib(tmp_path):
+    features, target = training_data()
+    estimator = Ridge().fit(features, target)
+    save_version(tmp_path / "v1", estimator)
+    
+    server = RiskModelServer(str(tmp_path))
+    server.load()
+    
+    assert server.stats()['version'] == "v1"
+    assert isinstance(server.model.estimator, Ridge)
+    assert np.allclose(server.predict(features), np.clip(estimator.predict(features), 0, 1))
@@ -0,0 +1,181 @@
+"""LLM scheduler admission order, concurrency limit and token buckets."""
+import asyncio
+import time
+import pytest
+
+from app.core import scheduler as scheduler_module
+from app.core.scheduler import (
+    LLMScheduler, TokenBucket, PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL,
+    estimate_tokens, severity_to_priority
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket_starts_full(clock):
+    bucket = TokenBucket(per_minute=60)
+    
+    assert bucket.wait_time(60) == 0.0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+
+
+def test_token_bucket_refills_at_rate_up_to_capacity(clock):
+    bucket = TokenBucket(per_minute=60, capacity=10)
+    bucket.consume(10)
+    
+    clock.now += 5
+    assert bucket.wait_time(5) == 0.0
+    assert bucket.wait_time(6) == pytest.approx(1.0)
+    
+    clock.now += 3600
+    bucket.wait_time(0)
+    assert bucket.tokens == 10
+
+
+def test_oversized_request_waits_for_a_full_bucket(clock):
+    bucket = TokenBucket(per_minute=60, capacity=10)
+    bucket.consume(4)
+    
+    # Larger than the bucket: admitted once it is full, not never
+    assert bucket.wait_time(1000) == pytest.approx(4.0)
+    clock.now += 4
+    assert bucket.wait_time(1000) == 0.0
+    bucket.consume(1000)
+    assert bucket.tokens == 0
+
+
+def test_priority_helpers():
+    assert severity_to_priority('CRITICAL') == PRIORITY_CRITICAL
+    assert severity_to_priority('low') == PRIORITY_LOW
+    assert severity_to_priority('unknown') == PRIORITY_NORMAL
+    assert estimate_tokens("x" * 400) == 101
+
+
+@pytest.mark.asyncio
+async def test_waiting_calls_are_admitted_by_priority():
+    scheduler = LLMScheduler(max_in_flight=1)
+    order = []
+    
+    async def call(name, priority):
+        async with scheduler.slot(priority=priority):
+            order.append(name)
+    
+    release = asyncio.Event()
+    
+    async def blocker():
+        async with scheduler.slot():
+            await release.wait()
+    
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(call(name, priority))
+        for name, priority in (
+            ('low', PRIORITY_LOW), ('normal', PRIORITY_NORMAL),
+            ('critical', PRIORITY_CRITICAL), ('high', PRIORITY_HIGH)
+        )
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.metrics()['queue_depth'] == 4
+    
+    release.set()
+    await asyncio.gather(holder, *waiting)
+    
+    assert order == ['critical', 'high', 'normal', 'low']
+    assert scheduler.metrics()['completed'] == 5
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_never_exceed_the_limit():
+    scheduler = LLMScheduler(max_in_flight=3)
+    running = peak = 0
+    
+    async def call():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+    
+    results = await asyncio.gather(*(scheduler.run(call) for _ in range(12)))
+    
+    assert results == ["ok"] * 12
+    assert peak == 3
+    metrics = scheduler.metrics()
+    assert metrics['in_flight'] == 0
+    assert metrics['max_queue_depth'] >= 9
+
+
+@pytest.mark.asyncio
+async def test_failed_calls_release_their_slot():
+    scheduler = LLMScheduler(max_in_flight=1)
+    
+    async def fail():
+        raise RuntimeError("upstream error")
+    
+    with pytest.raises(RuntimeError):
+        await scheduler.run(fail)
+    
+    async def succeed():
+        return 1
+    
+    assert await asyncio.wait_for(scheduler.run(succeed), 1) == 1
+    assert scheduler.failed == 1
+    assert scheduler.completed == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_timeout_leaves_the_queue_usable():
+    scheduler = LLMScheduler(max_in_flight=1)
+    release = asyncio.Event()
+    
+    async def blocker():
+        async with scheduler.slot():
+            await release.wait()
+    
+    holder = asyncio.create_task(blocker())
+    await asyncio.sleep(0)
+    
+    with pytest.raises(asyncio.TimeoutError):
+        async with scheduler.slot(timeout=0.01):
+            pass
+    
+    release.set()
+    await holder
+    
+    async def succeed():
+        return "admitted"
+    
+    assert await asyncio.wait_for(scheduler.run(succeed), 1) == "admitted"
+    assert scheduler.metrics()['in_flight'] == 0
+
+
+@pytest.mark.asyncio
+async def test_token_budget_delays_admission():
+    # 6000 tokens/minute = 100 tokens/second
+    scheduler = LLMScheduler(max_in_flight=4, tokens_per_minute=6000)
+    
+    async def call():
+        return time.monotonic()
+    
+    started = time.monotonic()
+    await scheduler.run(call, estimated_tokens=6000)
+    admitted = await scheduler.run(call, estimated_tokens=20)
+    
+    assert admitted - started >= 0.15
+    assert admitted - started < 2.0
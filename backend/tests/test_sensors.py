@@ -0,0 +1,167 @@
+"""Sensor ring buffers and SensorStore ingestion and lookups."""
+import json
+import time
+import numpy as np
+import pytest
+
+from app.services import sensors as sensors_module
+from app.services.sensors import MAX_REPORTED_ERRORS, RingBuffer, SensorStore
+from app.services.timeseries import TimeSeriesStore
+
+MUMBAI = (19.0760, 72.8777)
+
+
+def reading(sensor_id: str, kind: str, value: float, lat=MUMBAI[0], lon=MUMBAI[1], **fields) -> dict:
+    return {'sensor_id': sensor_id, 'kind': kind, 'value': value, 'latitude': lat, 'longitude': lon, **fields}
+
+
+def test_ring_buffer_keeps_the_latest_window():
+    buffer = RingBuffer(4)
+    assert buffer.latest() is None
+    assert buffer.mean() is None
+    
+    for i in range(1, 11):
+        buffer.append(float(i), 100.0 + i)
+    
+    times, values = buffer.window()
+    assert values.tolist() == [7.0, 8.0, 9.0, 10.0]
+    assert times.tolist() == [107.0, 108.0, 109.0, 110.0]
+    assert buffer.latest() == (110.0, 10.0)
+    assert buffer.mean() == pytest.approx(8.5)
+
+
+def test_ring_buffer_partial_window():
+    buffer = RingBuffer(5)
+    buffer.append(2.0, 1.0)
+    buffer.append(4.0, 2.0)
+    
+    assert buffer.window()[1].tolist() == [2.0, 4.0]
+    assert buffer.mean() == 3.0
+
+
+def test_ring_buffer_mean_does_not_drift():
+    buffer = RingBuffer(7)
+    values = np.random.default_rng(1).uniform(0, 1e6, 10007)
+    for i, value in enumerate(values):
+        buffer.append(value, float(i))
+    
+    assert buffer.mean() == pytest.approx(values[-7:].mean(), rel=1e-12)
+
+
+def test_ingest_counts_accepted_and_rejected_rows():
+    store = SensorStore()
+    rows = [
+        reading("r1", "rainfall", 12.0),
+        reading("r2", "flow", 1.0),                       # unknown kind
+        reading("s1", "soil_saturation", 1.5),            # out of range
+        {'sensor_id': "new", 'kind': "rainfall", 'value': 3},  # no location
+        reading("r1", "river_level", 4.0),                # r1 is a rain gauge
+        "not json",
+        reading("v1", "river_level", 4.0, timestamp="2024-06-01T10:00:00Z"),
+    ]
+    
+    result = store.ingest(rows)
+    
+    assert (result['accepted'], result['rejected']) == (2, 5)
+    assert [error['row'] for error in result['errors']] == [2, 3, 4, 5, 6]
+    assert store.stats()['ingested'] == 2
+    assert store.stats()['rejected'] == 5
+    assert store.get("v1").buffer.latest()[0] == 1717236000.0
+
+
+def test_ingest_across_chunks(monkeypatch):
+    monkeypatch.setattr(sensors_module, 'INGEST_CHUNK_ROWS', 3)
+    store = SensorStore()
+    rows = [reading(f"r{i}", "rainfall", float(i), lat=19 + i * 0.001) for i in range(10)]
+    rows[4] = reading("bad", "rainfall", -1.0)
+    
+    result = store.ingest(rows)
+    
+    assert (result['accepted'], result['rejected']) == (9, 1)
+    assert result['errors'][0]['row'] == 5
+    assert store.stats()['sensors'] == 9
+
+
+def test_reported_errors_are_capped():
+    store = SensorStore()
+    
+    result = store.ingest([reading("x", "flow", 1.0)] * (MAX_REPORTED_ERRORS + 5))
+    
+    assert result['rejected'] == MAX_REPORTED_ERRORS + 5
+    assert len(result['errors']) == MAX_REPORTED_ERRORS
+
+
+def test_ingest_text_ndjson_and_csv():
+    store = SensorStore()
+    ndjson = "\n".join(json.dumps(reading(f"n{i}", "rainfall", 5.0)) for i in range(3))
+    csv_text = (
+        "sensor_id,kind,value,timestamp,latitude,longitude\n"
+        f"c1,soil_saturation,0.8,,{MUMBAI[0]},{MUMBAI[1]}\n"
+        f"c2,soil_saturation,0.6,,{MUMBAI[0]},{MUMBAI[1]}\n"
+    )
+    
+    assert store.ingest_text(ndjson)['accepted'] == 3
+    assert store.ingest_text(csv_text, fmt="csv")['accepted'] == 2
+    assert store.value_near("soil_saturation", *MUMBAI) == pytest.approx(0.7)
+
+
+def test_nearby_sensors_by_distance_and_freshness():
+    store = SensorStore(radius_km=10.0, max_age_seconds=3600)
+    lat, lon = MUMBAI
+    store.ingest([
+        reading("near", "rainfall", 10.0, lat=lat + 0.01, lon=lon),
+        reading("closest", "rainfall", 20.0, lat=lat, lon=lon + 0.001),
+        reading("far", "rainfall", 99.0, lat=lat + 0.5, lon=lon),
+        reading("stale", "rainfall", 99.0, timestamp=time.time() - 7200),
+        reading("soil", "soil_saturation", 0.5),
+    ])
+    
+    assert [s.sensor_id for s in store.nearby("rainfall", lat, lon)] == ["closest", "near"]
+    assert store.value_near("rainfall", lat, lon) == pytest.approx(15.0)
+    assert store.value_near("river_level", lat, lon) is None
+    assert store.sensor_data(lat, lon) == {
+        'rainfall_sensors': [20.0, 10.0],
+        'soil_sensors': [0.5],
+        'river_sensors': []
+    }
+    assert store.sensor_data(0.0, 0.0) == {}
+
+
+def test_moved_sensor_is_found_at_its_new_location():
+    store = SensorStore()
+    store.ingest([reading("mobile", "rainfall", 5.0)])
+    store.ingest([reading("mobile", "rainfall", 6.0, lat=28.6139, lon=77.2090)])
+    
+    assert store.value_near("rainfall", *MUMBAI) is None
+    assert store.value_near("rainfall", 28.6139, 77.2090) == 6.0
+
+
+def test_pending_queue_drops_oldest_beyond_max_pending():
+    store = SensorStore(max_pending=5)
+    
+    store.ingest([reading("r1", "rainfall", float(i)) for i in range(8)])
+    
+    assert store.stats()['pending'] == 5
+    assert store.dropped == 3
+    assert [row['value'] for row in store._pending] == [3.0, 4.0, 5.0, 6.0, 7.0]
+
+
+def test_history_summary_from_the_time_series_store(tmp_path):
+    store = SensorStore(history=TimeSeriesStore(str(tmp_path)))
+    now = time.time()
+    store.ingest(
+        [reading("rain", "rainfall", 10.0, timestamp=now - 2 * 3600)] +
+        [reading("rain", "rainfall", 20.0, timestamp=now - 60)] +
+        [reading("river", "river_level", level, timestamp=now - hours * 3600)
+         for hours, level in ((3, 4.0), (0.01, 5.5))]
+    )
+    store.history.flush()
+    
+    summary = store.history_near(*MUMBAI, hours=6)
+    
+    assert summary['hours'] == 6
+    assert summary['rainfall']['sensors'] == 1
+    assert summary['rainfall']['total_mm'] == 30.0
+    assert summary['river_level']['change'] == pytest.approx(1.5)
+    assert 'soil_saturation' not in summary
+    assert store.history_near(0.0, 0.0) is None
@@ -0,0 +1,197 @@
+"""TimeSeriesStore raw columns and rollups against brute force."""
+import os
+import numpy as np
+import pytest
+
+from app.services.timeseries import (
+    DAY_SECONDS, RESOLUTIONS, ROLLUP_FILE, TIMESTAMP_FILE, VALUE_FILE, TimeSeriesStore, _safe_name
+)
+
+DAY = 19875 * DAY_SECONDS  # 2024-06-01 00:00 UTC
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(str(tmp_path))
+
+
+def readings(count: int, seed: int, start: float = DAY, span: float = 2 * DAY_SECONDS):
+    rng = np.random.default_rng(seed)
+    timestamps = np.sort(rng.uniform(start, start + span, count))
+    # float32 on disk, so compare against float32-representable values
+    values = rng.uniform(0, 100, count).astype(np.float32).astype(np.float64)
+    return timestamps, values
+
+
+def append_all(store: TimeSeriesStore, kind: str, sensor_id: str, timestamps, values) -> None:
+    for timestamp, value in zip(timestamps, values):
+        store.append(kind, sensor_id, float(timestamp), float(value))
+
+
+def expected_bins(timestamps, values, start: float, end: float, seconds: int) -> dict:
+    """Per-bin count/mean/min/max the slow way (bins overlapping [start, end))."""
+    first, last = np.floor(start / seconds), np.ceil(end / seconds)
+    bins = np.floor(timestamps / seconds)
+    keep = (bins >= first) & (bins < last)
+    result = {'timestamps': [], 'count': [], 'mean': [], 'min': [], 'max': []}
+    for b in np.unique(bins[keep]):
+        in_bin = values[bins == b]
+        result['timestamps'].append(float(b * seconds))
+        result['count'].append(len(in_bin))
+        result['mean'].append(round(float(in_bin.mean()), 4))
+        result['min'].append(round(float(in_bin.min()), 4))
+        result['max'].append(round(float(in_bin.max()), 4))
+    return result
+
+
+def assert_rollup(actual: dict, expected: dict) -> None:
+    assert actual['timestamps'] == expected['timestamps']
+    assert actual['count'] == expected['count']
+    assert actual['mean'] == pytest.approx(expected['mean'], abs=1e-3)
+    assert actual['min'] == pytest.approx(expected['min'])
+    assert actual['max'] == pytest.approx(expected['max'])
+
+
+@pytest.mark.parametrize("resolution", list(RESOLUTIONS))
+def test_rollups_match_brute_force(store, resolution):
+    timestamps, values = readings(3000, seed=1)
+    # Written over several flushes, so bins are updated incrementally
+    for part in np.array_split(np.arange(len(timestamps)), 4):
+        append_all(store, "rainfall", "r1", timestamps[part], values[part])
+        store.flush()
+    
+    start, end = DAY + 5000.5, DAY + DAY_SECONDS + 40000
+    actual = store.rollup("rainfall", start, end, resolution, ["r1"])
+    
+    assert_rollup(actual, expected_bins(timestamps, values, start, end, RESOLUTIONS[resolution]))
+
+
+def test_kind_rollup_covers_every_sensor(store):
+    series = {sensor: readings(500, seed=i) for i, sensor in enumerate(("a", "b", "c"))}
+    for sensor, (timestamps, values) in series.items():
+        append_all(store, "river_level", sensor, timestamps, values)
+    store.flush()
+    
+    timestamps = np.concatenate([ts for ts, _ in series.values()])
+    values = np.concatenate([v for _, v in series.values()])
+    start, end = DAY, DAY + 2 * DAY_SECONDS
+    
+    assert_rollup(store.rollup("river_level", start, end, '1h'), expected_bins(timestamps, values, start, end, 3600))
+    assert_rollup(
+        store.rollup("river_level", start, end, '1h', ["a", "c"]),
+        expected_bins(
+            np.concatenate([series["a"][0], series["c"][0]]),
+            np.concatenate([series["a"][1], series["c"][1]]),
+            start, end, 3600
+        )
+    )
+
+
+def test_raw_returns_readings_in_range(store):
+    timestamps, values = readings(1000, seed=2)
+    shuffled = np.random.default_rng(0).permutation(len(timestamps))
+    append_all(store, "rainfall", "r/1", timestamps[shuffled], values[shuffled])
+    assert store.flush() == 1000
+    
+    start, end = DAY + 30000, DAY + DAY_SECONDS + 100
+    ts, vs = store.raw("rainfall", "r/1", start, end)
+    
+    keep = (timestamps >= start) & (timestamps < end)
+    assert ts.tolist() == timestamps[keep].tolist()
+    assert vs.tolist() == values[keep].tolist()
+    assert store.raw("rainfall", "other", start, end)[0].size == 0
+
+
+def test_failed_partition_is_buffered_for_the_next_flush(store, monkeypatch):
+    append_all(store, "rainfall", "ok", *readings(100, seed=3))
+    append_all(store, "rainfall", "broken", *readings(100, seed=4))
+    broken_dir = _safe_name("broken")
+    append_columns = store._append_columns
+    
+    def fail_for_broken(directory, *args):
+        if os.path.basename(directory) == broken_dir:
+            raise OSError("disk full")
+        return append_columns(directory, *args)
+    
+    monkeypatch.setattr(store, '_append_columns', fail_for_broken)
+    written = store.flush()
+    
+    assert written == 100
+    assert store.stats()['buffered'] == 100
+    assert store.write_errors > 0
+    # The kind-wide rollups only counted the rows that were written
+    assert sum(store.rollup("rainfall", DAY, DAY + 2 * DAY_SECONDS, '1h')['count']) == 100
+    
+    monkeypatch.undo()
+    assert store.flush() == 100
+    assert store.stats()['buffered'] == 0
+    assert sum(store.rollup("rainfall", DAY, DAY + 2 * DAY_SECONDS, '1h')['count']) == 200
+    assert len(store.raw("rainfall", "broken", DAY, DAY + 2 * DAY_SECONDS)[0]) == 100
+
+
+def test_failed_rollup_rolls_back_the_raw_rows(store, monkeypatch):
+    timestamps, values = readings(50, seed=5, span=3600)
+    append_all(store, "rainfall", "r1", timestamps, values)
+    
+    def fail(*args):
+        raise MemoryError("rollup update failed")
+    
+    monkeypatch.setattr(store, '_rollup_updates', fail)
+    assert store.flush() == 0
+    monkeypatch.undo()
+    
+    assert store.raw("rainfall", "r1", DAY, DAY + DAY_SECONDS)[0].size == 0
+    assert store.flush() == 50
+    ts, _ = store.raw("rainfall", "r1", DAY, DAY + DAY_SECONDS)
+    assert ts.tolist() == timestamps.tolist()
+    assert store.rollup("rainfall", DAY, DAY + DAY_SECONDS, '1h', ["r1"])['count'] == [50]
+
+
+def test_torn_tail_is_ignored_then_dropped(store):
+    timestamps, values = readings(20, seed=6, span=3600)
+    append_all(store, "rainfall", "r1", timestamps[:10], values[:10])
+    store.flush()
+    
+    # A writer that died between the column appends and the rollup update
+    partition = os.path.join(store.root, "rainfall", "2024-06-01", "r1")
+    with open(os.path.join(partition, TIMESTAMP_FILE), 'ab') as f:
+        f.write(np.array([DAY + 1.0] * 3).tobytes())
+    with open(os.path.join(partition, VALUE_FILE), 'ab') as f:
+        f.write(b"\x00\x01")
+    assert len(store.raw("rainfall", "r1", DAY, DAY + DAY_SECONDS)[0]) == 10
+    
+    append_all(store, "rainfall", "r1", timestamps[10:], values[10:])
+    store.flush()
+    
+    ts, vs = store.raw("rainfall", "r1", DAY, DAY + DAY_SECONDS)
+    assert ts.tolist() == timestamps.tolist()
+    assert vs.tolist() == values.tolist()
+    assert os.path.getsize(os.path.join(partition, TIMESTAMP_FILE)) == 20 * 8
+    assert os.path.exists(os.path.join(partition, ROLLUP_FILE))
+
+
+def test_sensor_kind_from_the_partition_layout(store):
+    store.append("river_level", "gauge.7", DAY + 10, 4.2)
+    store.flush()
+    
+    assert store.sensor_kind("gauge.7") == "river_level"
+    assert store.sensor_kind("unknown") is None
+    assert TimeSeriesStore("").sensor_kind("gauge.7") is None
+
+
+def test_buffer_drops_oldest_beyond_max_buffered(tmp_path):
+    store = TimeSeriesStore(str(tmp_path), max_buffered=3)
+    for i in range(5):
+        store.append("rainfall", "r1", DAY + i, float(i))
+    
+    assert store.flush() == 3
+    assert store.dropped == 2
+    assert store.raw("rainfall", "r1", DAY, DAY + 10)[1].tolist() == [2.0, 3.0, 4.0]
+
+
+def test_disabled_store_ignores_readings():
+    store = TimeSeriesStore("")
+    store.append("rainfall", "r1", DAY, 1.0)
+    
+    assert not store.enabled
+    assert store.flush() == 0
@@ -0,0 +1,168 @@
+"""WeatherProvider against the local fake provider (no network)."""
+import asyncio
+import httpx
+import pytest
+import pytest_asyncio
+
+from app.core.circuit_breaker import CircuitBreaker, STATE_CLOSED, STATE_HALF_OPEN, STATE_OPEN
+from app.services.fake_weather import create_fake_weather_app, fake_conditions
+from app.services.weather import WeatherProvider, geohash_center, geohash_encode, parse_conditions
+
+FAKE_URL = "http://fake-weather/data/2.5/weather"
+
+
+@pytest_asyncio.fixture
+async def make_provider():
+    """Factory for a provider wired to a fresh fake app through ASGI."""
+    providers = []
+    
+    def make(latency_ms: float = 0.0, failure_rate: float = 0.0, **options):
+        fake = create_fake_weather_app(latency_ms=latency_ms, failure_rate=failure_rate)
+        breaker = CircuitBreaker("weather-test", window_size=3, min_calls=3, open_seconds=60)
+        provider = WeatherProvider(FAKE_URL, api_key="test", breaker=breaker, **options)
+        provider._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake))
+        providers.append(provider)
+        return provider, fake
+    
+    yield make
+    for provider in providers:
+        await provider.close()
+
+
+def test_geohash_round_trip():
+    lat, lon = 19.0760, 72.8777
+    cell = geohash_encode(lat, lon, 5)
+    
+    assert cell == "te7ud"
+    center_lat, center_lon = geohash_center(cell)
+    assert geohash_encode(center_lat, center_lon, 5) == cell
+    assert abs(center_lat - lat) < 0.05 and abs(center_lon - lon) < 0.05
+
+
+def test_parse_conditions():
+    assert parse_conditions({'rain': {'1h': 12.5}, 'river_level': 4}) == {
+        'rainfall': 12.5, 'soil_saturation': None, 'river_level': 4.0
+    }
+    assert parse_conditions({'rain': {'3h': 9}})['rainfall'] == 3.0
+    assert parse_conditions({})['rainfall'] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_disabled_without_api_key():
+    provider = WeatherProvider(FAKE_URL, api_key="")
+    
+    assert await provider.conditions(19.07, 72.87) is None
+    assert provider.upstream_calls == 0
+
+
+@pytest.mark.asyncio
+async def test_conditions_match_provider_payload(make_provider):
+    provider, fake = make_provider()
+    
+    conditions = await provider.conditions(19.0760, 72.8777)
+    
+    lat, lon = geohash_center(geohash_encode(19.0760, 72.8777, provider.precision))
+    assert conditions == parse_conditions(fake_conditions(round(lat, 5), round(lon, 5)))
+    assert fake.state.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_for_a_cell_are_coalesced(make_provider):
+    provider, fake = make_provider(latency_ms=50)
+    
+    results = await asyncio.gather(*(provider.conditions(19.0760, 72.8777) for _ in range(20)))
+    
+    assert fake.state.requests == 1
+    assert provider.upstream_calls == 1
+    assert provider.flight.coalesced == 19
+    assert all(result == results[0] for result in results)
+
+
+@pytest.mark.asyncio
+async def test_locations_in_one_cell_share_the_cached_reading(make_provider):
+    provider, fake = make_provider()
+    
+    first = await provider.conditions(19.0760, 72.8777)
+    nearby = await provider.conditions(19.0765, 72.8780)
+    elsewhere = await provider.conditions(28.6139, 77.2090)
+    
+    assert geohash_encode(19.0760, 72.8777) == geohash_encode(19.0765, 72.8780)
+    assert nearby == first
+    assert elsewhere != first
+    assert fake.state.requests == 2
+    assert provider.hits == 1
+    assert provider.stats()['cached_cells'] == 2
+
+
+@pytest.mark.asyncio
+async def test_reading_returns_one_input(make_provider):
+    provider, _ = make_provider()
+    
+    conditions = await provider.conditions(19.0760, 72.8777)
+    
+    assert await provider.reading('rainfall', 19.0760, 72.8777) == conditions['rainfall']
+    assert await provider.reading('river_level', 19.0760, 72.8777) == conditions['river_level']
+
+
+@pytest.mark.asyncio
+async def test_failures_open_the_breaker_and_stop_upstream_calls(make_provider):
+    provider, fake = make_provider(failure_rate=1.0)
+    
+    # Distinct cells, so every lookup reaches the provider
+    for lat in (10.0, 20.0, 30.0):
+        assert await provider.conditions(lat, 72.0) is None
+    
+    assert provider.breaker.state == STATE_OPEN
+    assert fake.state.requests == 3
+    
+    assert await provider.conditions(40.0, 72.0) is None
+    assert fake.state.requests == 3
+    assert provider.breaker.rejected == 1
+    assert provider.errors == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_lookups_are_not_cached(make_provider):
+    provider, fake = make_provider(failure_rate=1.0)
+    
+    assert await provider.conditions(19.0760, 72.8777) is None
+    assert await provider.conditions(19.0760, 72.8777) is None
+    
+    assert fake.state.requests == 2
+    assert len(provider.cache) == 0
+
+
+async def cancel_fetch(provider: WeatherProvider, lat: float, lon: float) -> None:
+    """Start an upstream fetch for a cell and cancel it mid-request."""
+    task = asyncio.create_task(provider._fetch_cell(provider.cell_key(lat, lon)))
+    await asyncio.sleep(0.02)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_cancelled_fetch_is_not_a_provider_failure(make_provider):
+    provider, _ = make_provider(latency_ms=500)
+    
+    for lat in (10.0, 20.0, 30.0):
+        await cancel_fetch(provider, lat, 72.0)
+    
+    assert provider.breaker.state == STATE_CLOSED
+    assert provider.breaker.stats()['window_calls'] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_lets_the_next_lookup_probe(make_provider):
+    provider, fake = make_provider(latency_ms=500)
+    provider.breaker.open_seconds = 0.01
+    for _ in range(3):
+        provider.breaker.record(False, 0.01)
+    await asyncio.sleep(0.02)
+    
+    await cancel_fetch(provider, 10.0, 72.0)
+    assert provider.breaker.state == STATE_HALF_OPEN
+    
+    assert await provider.conditions(20.0, 72.0) is not None
+    assert provider.breaker.state == STATE_CLOSED
+    assert fake.state.requests == 2
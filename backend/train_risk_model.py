@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Train the flood risk model served by the API.
+
+Fits a scikit-learn regressor on past predictions (the flood_predictions
+table, or the rows seeded by realistic_mock_data.sql) and writes a new
+version directory that RISK_MODEL_PATH can point at:
+
+    python train_risk_model.py --source seed --output ./models/risk
+    python train_risk_model.py --source database --output ./models/risk
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import re
+import sys
+import numpy as np
+
+from app.config import settings
+from app.ml.history import HistoricalIndex, event_from_prediction
+from app.ml.risk_engine import risk_engine
+from app.ml.risk_model import MODEL_FEATURES, MODEL_FILE, META_FILE, NEUTRAL_HISTORICAL_SCORE, save_tree_arrays
+
+# One seeded flood_predictions row: region, level, probability, confidence,
+# lat, lon, predicted_time, population, forecast, rainfall, saturation,
+# river level, ai_reasoning
+SEED_ROW = re.compile(
+    r"\(\s*'((?:[^']|'')*)',\s*'(\w+)',\s*([\d.]+),\s*([\d.]+),\s*"
+    r"([-\d.]+),\s*([-\d.]+),\s*NOW\(\)[^,]*,\s*"
+    r"(\d+),\s*ARRAY\[[^\]]*\],\s*"
+    r"([\d.]+),\s*([\d.]+),\s*([\d.]+),\s*"
+    r"'((?:[^']|'')*)'::jsonb"
+)
+
+ESTIMATORS = ('gradient_boosting', 'random_forest')
+
+
+def load_seed_rows(path: str) -> List[Dict[str, Any]]:
+    """flood_predictions rows from the INSERT statements of a seed SQL file."""
+    with open(path) as f:
+        sql = f.read()
+    
+    start = sql.find('INSERT INTO flood_predictions')
+    if start < 0:
+        return []
+    end = sql.find('INSERT INTO', start + 1)
+    block = sql[start:end if end > 0 else len(sql)]
+    
+    rows = []
+    for i, match in enumerate(SEED_ROW.finditer(block)):
+        try:
+            ai_reasoning = json.loads(match.group(11).replace("''", "'"))
+        except ValueError:
+            ai_reasoning = {}
+        rows.append({
+            'id': f"seed-{i}",
+            'region_name': match.group(1).replace("''", "'"),
+            'risk_level': match.group(2),
+            'probability': float(match.group(3)),
+            'center_lat': float(match.group(5)),
+            'center_lon': float(match.group(6)),
+            'rainfall_intensity': float(match.group(8)),
+            'soil_saturation': float(match.group(9)),
+            'river_level': float(match.group(10)),
+            'ai_reasoning': ai_reasoning
+        })
+    return rows
+
+
+def load_database_rows(limit: int) -> List[Dict[str, Any]]:
+    """Most recent flood_predictions rows."""
+    from app.database import get_service_client
+    
+    result = get_service_client().table('flood_predictions')\
+        .select('id, region_name, risk_level, probability, center_lat, center_lon, '
+                'rainfall_intensity, soil_saturation, river_level, ai_reasoning, created_at')\
+        .order('created_at', desc=True)\
+        .limit(limit)\
+        .execute()
+    return result.data or []
+
+
+def historical_scores(rows: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    The historical_score the agent would have seen for each row.
+    
+    Each row is matched against the other rows (and the HISTORY_SEED_PATH
+    events) with the same index and neighbour count as serving; its own
+    event is left out, since its probability is the training target.
+    Rows without similar events get the neutral score, as in serving.
+    """
+    index = HistoricalIndex(
+        rebuild_threshold=len(rows) + 1,
+        max_distance=settings.HISTORY_MAX_DISTANCE,
+        max_events=settings.HISTORY_MAX_EVENTS
+    )
+    index.load(None, settings.HISTORY_SEED_PATH)
+    index.add_many(event_from_prediction(row) for row in rows)
+    index.rebuild()
+    
+    k = settings.HISTORY_NEIGHBOURS
+    scores = np.full(len(rows), NEUTRAL_HISTORICAL_SCORE)
+    for i, row in enumerate(rows):
+        if row.get('center_lat') is None or row.get('center_lon') is None:
+            continue
+        neighbours = index.query({
+            'latitude': row['center_lat'],
+            'longitude': row['center_lon'],
+            'rainfall': row.get('rainfall_intensity'),
+            'soil_saturation': row.get('soil_saturation'),
+            'river_level': row.get('river_level')
+        }, k=k + 1)
+        own_id = f"prediction:{row.get('id')}"
+        severities = [e.get('severity', 0.5) for e in neighbours if e.get('id') != own_id][:k]
+        if severities:
+            scores[i] = float(np.mean(severities))
+    return scores
+
+
+def build_features(rows: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Feature matrix (columns as MODEL_FEATURES) and target probabilities.
+    
+    The ZYND score is the one stored with the prediction, or the rule-based
+    analysis when it is missing, matching what the agent scores with offline.
+    The historical score comes from similar past events (historical_scores).
+    """
+    rows = [r for r in rows if r.get('probability') is not None]
+    rainfall = np.array([float(r.get('rainfall_intensity') or 0) for r in rows])
+    saturation = np.array([float(r.get('soil_saturation') or 0) for r in rows])
+    river_level = np.array([float(r.get('river_level') or 0) for r in rows])
+    
+    zynd = risk_engine.fallback_analysis(rainfall, saturation, river_level)['risk_score']
+    for i, row in enumerate(rows):
+        reasoning = row.get('ai_reasoning') or {}
+        stored = (reasoning.get('zynd_analysis') or {}).get('risk_score') if isinstance(reasoning, dict) else None
+        if stored is not None:
+            zynd[i] = float(stored)
+    
+    historical = historical_scores(rows)
+    features = np.column_stack([rainfall, saturation, river_level, zynd, historical])
+    target = np.array([float(r['probability']) for r in rows])
+    return features, target
+
+
+def holdout_split(size: int, share: float, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Shuffled (train, held-out) row indices, holding out at least one row."""
+    order = np.random.default_rng(seed).permutation(size)
+    held_out = min(max(1, int(round(size * share))), size - 1)
+    return order[held_out:], order[:held_out]
+
+
+def make_estimator(name: str, seed: int) -> Any:
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    
+    if name == 'random_forest':
+        return RandomForestRegressor(n_estimators=200, min_samples_leaf=2, random_state=seed)
+    return GradientBoostingRegressor(n_estimators=200, max_depth=3, learning_rate=0.05, random_state=seed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the flood risk model")
+    parser.add_argument('--source', choices=('database', 'seed'), default='database')
+    parser.add_argument('--seed-sql', default='realistic_mock_data.sql')
+    parser.add_argument('--limit', type=int, default=100000, help="database rows to train on")
+    parser.add_argument('--output', default='./models/risk', help="model directory (RISK_MODEL_PATH)")
+    parser.add_argument('--version', default=datetime.utcnow().strftime('v%Y%m%d%H%M%S'))
+    parser.add_argument('--estimator', choices=ESTIMATORS, default='gradient_boosting')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--holdout', type=float, default=0.2, help="share of rows held out for the error metric")
+    args = parser.parse_args()
+    
+    import joblib
+    
+    if args.source == 'seed':
+        rows = load_seed_rows(args.seed_sql)
+    else:
+        rows = load_database_rows(args.limit)
+    features, target = build_features(rows)
+    if len(target) < 2:
+        print(f"❌ Not enough training rows from {args.source} ({len(target)})")
+        sys.exit(1)
+    
+    # Error on rows the model has not seen, then refit on every row
+    train, held_out = holdout_split(len(target), args.holdout, args.seed)
+    estimator = make_estimator(args.estimator, args.seed)
+    estimator.fit(features[train], target[train])
+    mae = float(np.mean(np.abs(np.clip(estimator.predict(features[held_out]), 0, 1) - target[held_out])))
+    
+    estimator = make_estimator(args.estimator, args.seed)
+    estimator.fit(features, target)
+    
+    directory = os.path.join(args.output, args.version)
+    os.makedirs(directory, exist_ok=True)
+    joblib.dump(estimator, os.path.join(directory, MODEL_FILE), compress=3)
+    # Node arrays the API memory-maps, so workers share one copy of the model
+    trees = save_tree_arrays(estimator, directory)
+    with open(os.path.join(directory, META_FILE), 'w') as f:
+        json.dump({
+            'version': args.version,
+            'features': list(MODEL_FEATURES),
+            'estimator': args.estimator,
+            'source': args.source,
+            'rows': int(len(target)),
+            'holdout_rows': int(len(held_out)),
+            'holdout_mae': round(mae, 4),
+            'trees': trees,
+            'trained_at': datetime.utcnow().isoformat()
+        }, f, indent=2)
+    
+    print(f"✅ Trained {args.estimator} on {len(target)} rows (held-out MAE {mae:.4f} on {len(held_out)} rows)")
+    print(f"📦 Saved to {directory}")
+
+
+if __name__ == '__main__':
+    main()
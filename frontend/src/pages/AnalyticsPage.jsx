@@ -1,6 +1,12 @@
-import React from 'react';
+import React, { useEffect, useState } from 'react';
 import { ResponsiveContainer, AreaChart, Area, XAxis, YAxis, CartesianGrid, Tooltip, BarChart, Bar, ScatterChart, Scatter, ZAxis, Legend, LineChart, Line } from 'recharts';
-import { BarChart3, TrendingUp, AlertTriangle, FileText, Download, Activity, Users } from 'lucide-react';
+import { BarChart3, TrendingUp, AlertTriangle, FileText, Download, Activity, Users, CloudRain } from 'lucide-react';
+
+const SENSOR_KINDS = [
+    { kind: 'rainfall', label: 'Rainfall (mm/h)' },
+    { kind: 'river_level', label: 'River Level (m)' },
+    { kind: 'soil_saturation', label: 'Soil Saturation' },
+];
 
 // Mock Data
 const trendData = [
@@ -32,7 +38,42 @@ const accuracyData = [
     { x: 60, y: 90, z: 300 },
 ];
 
+// Hourly sensor rollups from the backend's local history store (last 7 days)
+const useSensorHistory = (kind) => {
+    const [data, setData] = useState([]);
+
+    useEffect(() => {
+        const apiUrl = import.meta.env.VITE_API_URL || 'http://localhost:8000';
+        let cancelled = false;
+
+        const fetchHistory = async () => {
+            try {
+                const res = await fetch(`${apiUrl}/api/sensors/history?kind=${kind}&resolution=1h`);
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                const history = await res.json();
+                if (cancelled) return;
+                setData(history.timestamps.map((ts, i) => ({
+                    time: new Date(ts * 1000).toLocaleString([], { month: 'short', day: 'numeric', hour: '2-digit' }),
+                    mean: history.mean[i],
+                    max: history.max[i],
+                })));
+            } catch (err) {
+                console.error('Error fetching sensor history:', err);
+                if (!cancelled) setData([]);
+            }
+        };
+
+        fetchHistory();
+        return () => { cancelled = true; };
+    }, [kind]);
+
+    return data;
+};
+
 const AnalyticsPage = () => {
+    const [sensorKind, setSensorKind] = useState('rainfall');
+    const sensorHistory = useSensorHistory(sensorKind);
+
     return (
         <div className="min-h-screen bg-transparent text-white pt-24 pb-12 px-6 md:px-12 overflow-x-hidden">
 
@@ -165,7 +206,46 @@ const AnalyticsPage = () => {
                     </div>
                 </div>
 
-                {/* 5. Seasonal Patterns (Monthly Heatmap Simulation) */}
+                {/* 5. Live Sensor History (hourly rollups) */}
+                <div className="bg-[#0a0a0a] border border-white/10 rounded-2xl p-6 lg:col-span-2">
+                    <div className="flex justify-between items-center mb-6">
+                        <h3 className="font-bold text-lg flex items-center gap-2">
+                            <CloudRain className="text-cyan-500" size={20} /> Sensor History (Last 7 Days)
+                        </h3>
+                        <div className="flex gap-2">
+                            {SENSOR_KINDS.map(({ kind, label }) => (
+                                <button
+                                    key={kind}
+                                    onClick={() => setSensorKind(kind)}
+                                    className={`px-3 py-1 rounded-lg text-xs font-bold border transition-colors ${sensorKind === kind ? 'bg-cyan-500/20 border-cyan-500/50 text-cyan-300' : 'bg-white/5 border-white/10 text-gray-400 hover:bg-white/10'}`}
+                                >
+                                    {label}
+                                </button>
+                            ))}
+                        </div>
+                    </div>
+                    <div className="h-[300px] w-full">
+                        {sensorHistory.length ? (
+                            <ResponsiveContainer width="100%" height="100%">
+                                <LineChart data={sensorHistory}>
+                                    <CartesianGrid strokeDasharray="3 3" stroke="#333" />
+                                    <XAxis dataKey="time" stroke="#666" minTickGap={40} />
+                                    <YAxis stroke="#666" />
+                                    <Tooltip contentStyle={{ backgroundColor: '#000', borderColor: '#333' }} />
+                                    <Legend />
+                                    <Line type="monotone" dataKey="mean" stroke="#06b6d4" dot={false} name="Hourly mean" />
+                                    <Line type="monotone" dataKey="max" stroke="#f97316" dot={false} strokeDasharray="5 5" name="Hourly max" />
+                                </LineChart>
+                            </ResponsiveContainer>
+                        ) : (
+                            <div className="h-full flex items-center justify-center text-gray-500 text-sm">
+                                No sensor history recorded yet
+                            </div>
+                        )}
+                    </div>
+                </div>
+
+                {/* 6. Seasonal Patterns (Monthly Heatmap Simulation) */}
                 <div className="bg-[#0a0a0a] border border-white/10 rounded-2xl p-6 lg:col-span-2">
                     <h3 className="font-bold text-lg mb-6 flex items-center gap-2">
                         <Activity className="text-green-500" size={20} /> Seasonal Pattern Analysis